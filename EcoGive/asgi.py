@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'EcoGive.settings')
+#Serve the feed, detail and inquiry pages with the async views under ASGI
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
+
+#Pay the first-request costs now, before the first request comes in
+from ecogiveapp.warmup import warm_up_on_startup  #pylint: disable=wrong-import-position
+
+warm_up_on_startup()
@@ -0,0 +1,27 @@
+"""
+URL configuration for ASGI deployments.
+
+Same routes as EcoGive/urls.py, with the feed, detail and inquiry pages
+served by the async views of ecogiveapp/async_views.py. Selected through
+ROOT_URLCONF when ASYNC_VIEWS is on.
+"""
+
+#For URL routing with the async views swapped in
+
+from django.urls import path
+from ecogiveapp import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+#URL name: async view replacing the sync one
+ASYNC_VIEWS = {
+    'home': async_views.home,
+    'item_list': async_views.item_list,
+    'view_item_detail': async_views.view_item_detail,
+    'inquire_item': async_views.inquire_item,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if getattr(pattern, 'name', None) in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 #All import should start from beginning
 import os
+import tempfile
 
 from pathlib import Path
 
@@ -54,6 +55,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'ecogiveapp.instrumentation.PerformanceMiddleware',  #inactive unless PERF_INSTRUMENTATION is on
+    'ecogiveapp.routers.ReplicaPinMiddleware',  #must run before SessionMiddleware
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,14 +66,31 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'EcoGive.urls'
+#Async feed, detail and inquiry views (ecogiveapp/async_views.py), EcoGive/asgi.py turns them on
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', 'false').lower() == 'true'
+
+ROOT_URLCONF = 'EcoGive.asgi_urls' if ASYNC_VIEWS else 'EcoGive.urls'
+
+#Warm up workers when EcoGive/wsgi.py or asgi.py is loaded, see ecogiveapp/warmup.py.
+#Off unless DJANGO_WARMUP=true (set in .ebextensions), so runserver and imports of the
+#wsgi module in tools and tests do not open the database or build an S3 client
+WARMUP_ON_STARTUP = os.getenv('DJANGO_WARMUP', 'false').lower() == 'true'
+#gc.freeze() the warmed objects so forked workers keep sharing their pages
+WARMUP_GC_FREEZE = True
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        #DjangoTemplates that also reports render time to PerformanceMiddleware
+        'BACKEND': 'ecogiveapp.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            #Templates are compiled once per process; restart the server after editing one
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -91,10 +111,67 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        #Keep connections open between requests, the PRAGMA profile is applied per connection.
+        #Not with the async views: their ORM calls run in sync_to_async threads whose
+        #connections the request cycle never closes, so they would pile up
+        'CONN_MAX_AGE': 0 if ASYNC_VIEWS else int(os.getenv('DJANGO_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+#Read replicas, see ecogiveapp/routers.py. DJANGO_REPLICA_DATABASES is a comma
+#separated list of SQLite files kept in sync with the primary (e.g. by Litestream)
+DATABASE_REPLICAS = []
+REPLICA_FILES = [name.strip() for name in os.getenv('DJANGO_REPLICA_DATABASES', '').split(',')]
+for number, replica in enumerate(filter(None, REPLICA_FILES), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': replica,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['ecogiveapp.routers.PrimaryReplicaRouter']
+REPLICA_PIN_COOKIE = 'ecogive_primary'
+REPLICA_PIN_SECONDS = 10  #reads stay on the primary this long after a user's write
+
+#Every SQLite connection gets the PRAGMA profile of ecogiveapp/sqlite.py (WAL, 5 s busy_timeout);
+#set SQLITE_PRAGMAS to a {name: value} dict to replace it
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# LocMem is per process; with several gunicorn workers use a shared backend such as
+# django.core.cache.backends.filebased.FileBasedCache so invalidations reach every worker
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', 'ecogive'),
     }
 }
 
 
+#Caches every worker reads and writes; per-process backends only see their own evictions,
+#so the card and page caches of ecogiveapp/caching.py are only on with a shared cache
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache'))
+
+#Write-through cached sessions and a cached request.user, see ecogiveapp/sessions.py
+#and ecogiveapp/auth_backends.py. Only with a shared cache: a logout, deactivation or
+#password change handled by one worker must evict the session and user of all of them
+SESSION_ENGINE = (
+    'ecogiveapp.sessions' if SHARED_CACHE else 'ecogiveapp.db_sessions')
+SESSION_CACHE_ALIAS = 'default'
+SESSION_GC_BATCH_SIZE = 1000  #rows per DELETE of "manage.py clearsessions"
+#ModelBackend stays listed so sessions stored with its path are still valid
+AUTHENTICATION_BACKENDS = (
+    ['ecogiveapp.auth_backends.CachedModelBackend'] if SHARED_CACHE else []
+) + ['django.contrib.auth.backends.ModelBackend']
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TTL = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -137,6 +214,12 @@ STATICFILES_DIRS = [
     BASE_DIR / 'ecogiveapp/static',
 ]
 
+#collectstatic writes content-hashed names plus .gz/.br copies, see ecogiveapp/static_assets.py
+STATICFILES_STORAGE = 'ecogiveapp.static_assets.CompressedManifestStaticFilesStorage'
+
+#Serve Bootstrap from the copy stored by the vendor_bootstrap command instead of the CDN
+BOOTSTRAP_VENDORED = os.getenv('DJANGO_BOOTSTRAP_VENDORED', 'false').lower() == 'true'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -171,5 +254,83 @@ AWS_STORAGE_BUCKET_NAME = os.getenv("AWS_STORAGE_BUCKET_NAME")
 AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
 AWS_DEFAULT_ACL = None
 AWS_LOCATION = 'media'
-MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/'
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+if AWS_STORAGE_BUCKET_NAME:
+    MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/{AWS_LOCATION}/'
+    DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+    #Browsers upload photos straight to the bucket (needs a CORS rule allowing POST)
+    DIRECT_UPLOAD_BACKEND = 'ecogiveapp.direct_uploads.S3Presigner'
+else:
+    #Without a bucket (local development, tests) media is kept under MEDIA_ROOT
+    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    DIRECT_UPLOAD_BACKEND = 'ecogiveapp.direct_uploads.LocalPresigner'
+#The storage class can always be swapped explicitly
+DEFAULT_FILE_STORAGE = os.getenv('DJANGO_FILE_STORAGE', DEFAULT_FILE_STORAGE)
+
+#Uploads are hashed while they are read, for content-addressed storage (ecogiveapp/blobs.py)
+FILE_UPLOAD_HANDLERS = [
+    'ecogiveapp.blobs.HashingMemoryFileUploadHandler',
+    'ecogiveapp.blobs.HashingTemporaryFileUploadHandler',
+]
+
+#Direct-to-storage uploads, see ecogiveapp/direct_uploads.py
+DIRECT_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+DIRECT_UPLOAD_EXPIRY_SECONDS = 600
+
+#Number of items per page on the home, item list and dashboard feeds
+ITEMS_PAGE_SIZE = int(os.getenv('ITEMS_PAGE_SIZE', '24'))
+
+#Full-text search backend for item search, see ecogiveapp/search.py
+SEARCH_BACKEND = 'ecogiveapp.search.SQLiteFTS5Backend'
+
+#Thumbnails produced for item images, see ecogiveapp/thumbnails.py
+THUMBNAIL_SIZES = {'card': (400, 300)}  #name: (width, height)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_ASYNC = True  #False generates the thumbnails inside the request
+THUMBNAIL_WORKERS = 2
+
+#Outbound email queue drained by "manage.py send_queued_email", see ecogiveapp/outbox.py
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60  #doubled after every failed attempt
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300  #how long a claimed batch is hidden from other workers
+
+#Inquiry digests sent by "manage.py send_inquiry_digests", see ecogiveapp/inquiries.py
+INQUIRY_DIGEST_WINDOW_SECONDS = 3600  #owners who opted in get at most one email per window
+INQUIRY_DIGEST_BATCH_SIZE = 100  #owners per run
+
+#Deferred media deletion drained by "manage.py purge_storage", see ecogiveapp/storage_gc.py
+STORAGE_GC_BATCH_SIZE = 1000  #one S3 DeleteObjects call
+STORAGE_GC_MAX_ATTEMPTS = 5
+STORAGE_GC_LEASE_SECONDS = 300  #also the delay before a failed delete is retried
+
+#Media URL cache used by the list pages, see ecogiveapp/media_urls.py
+MEDIA_URL_CACHE_ALIAS = 'default'
+MEDIA_URL_CACHE_TTL = 24 * 60 * 60  #for unsigned URLs
+MEDIA_URL_CACHE_EXPIRY_MARGIN = 300  #signed URLs leave the cache this long before they expire
+
+#Request throttling of abuse-prone views, see ecogiveapp/throttling.py
+#Every worker must see the same counters, or each one allows the full limit. Without
+#a shared default cache they go to a file-based cache the workers of this host share
+THROTTLE_ENABLED = True
+if not SHARED_CACHE:
+    CACHES['throttle'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'ecogive-throttle'),
+    }
+THROTTLE_CACHE_ALIAS = 'default' if SHARED_CACHE else 'throttle'
+THROTTLE_CLIENT_IP_HEADER = os.getenv('DJANGO_CLIENT_IP_HEADER') or None  #e.g. HTTP_X_FORWARDED_FOR
+THROTTLE_RATES = {  #scope: {ip | user | item | username: "count/period"}
+    'inquiry': {'ip': '5/10m', 'user': '5/10m', 'item': '20/h'},
+    'login': {'ip': '30/5m', 'username': '10/5m'},
+}
+
+#Card fragment and anonymous page cache, see ecogiveapp/caching.py
+PAGE_CACHE_ALIAS = 'default'
+CARD_CACHE_TTL = 600  #capped by the lifetime of signed media URLs
+
+#Per-request timing (Server-Timing header and /perf/ report), see ecogiveapp/instrumentation.py
+PERF_INSTRUMENTATION = os.getenv('PERF_INSTRUMENTATION', 'false').lower() == 'true'
+PERF_HISTORY_SIZE = 500  #latest requests kept per route
+PERF_NPLUSONE_THRESHOLD = 5  #same statement this often in one request is reported
+PERF_SLOWEST_ROUTES = 10
@@ -18,8 +18,9 @@ Including another URLconf
 #For URL routing with admin and users mapping views
 
 from django.contrib import admin
-from django.urls import path
-from ecogiveapp import views
+from django.conf import settings
+from django.urls import path, re_path
+from ecogiveapp import api, static_assets, views
 
 urlpatterns = [
     path('admin/', admin.site.urls),    #for admin view
@@ -37,7 +38,29 @@ urlpatterns = [
         views.inquire_item, name='inquire_item'), #for Inquiry view
     path('dashboard/', views.dashboard, name='dashboard'),  #for User Dashboard view
     path('items/<int:item_id>/edit/', views.edit_item, name='edit_item'),  #for Edit item view
+    path(
+        'inquiries/preferences/',
+        views.inquiry_preferences, name='inquiry_preferences'),  #for Inquiry digest opt-in
     path(
         'items/<int:item_id>/delete/', 
         views.delete_item, name='delete_item'),  #for Delete item view
+    path(
+        'uploads/presign/',
+        views.presign_upload, name='presign_upload'),  #for Direct upload target
+    path(
+        'uploads/local/',
+        views.local_upload, name='local_upload'),  #for Local presigned POST stand-in
+    path('api/items/', api.item_list_api, name='item_list_api'),  #for Item list JSON API
+    path(
+        'api/items/search/',
+        api.item_search_api, name='item_search_api'),  #for Search JSON API
+    path(
+        'api/items/<int:item_id>/',
+        api.item_detail_api, name='item_detail_api'),  #for Item detail JSON API
+    path(
+        'perf/',
+        views.performance_report, name='performance_report'),  #for staff performance report
+    re_path(
+        rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$',
+        static_assets.serve, name='static_asset'),  #for Fingerprinted, precompressed static files
 ]
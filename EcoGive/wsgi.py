@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'EcoGive.settings')
 
 application = get_wsgi_application()
+
+#Pay the first-request costs now, in the gunicorn master with --preload (see Procfile)
+from ecogiveapp.warmup import warm_up_on_startup  #pylint: disable=wrong-import-position
+
+warm_up_on_startup()
@@ -1,9 +1,124 @@
 """ A file automatically created in each Django project. """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.html import format_html
 
+from .caching import invalidate_items
 #Import the Item model to admin
-from .models import Item
+from .models import Inquiry, Item
+from .pagination import EstimatedCountPaginator
+from .search import get_search_backend
 
-#Register the Item model to be accessible through the admin interface.
-admin.site.register(Item)
+#Most search matches the admin looks at, best match first
+ADMIN_SEARCH_LIMIT = 1000
+
+
+def delete_items(queryset, batch_size=500):
+    """
+    Delete the items of the queryset in batches. Their inquiries go first in
+    one DELETE per batch, so the collector has no related rows to fetch;
+    the post_delete receivers of Item still run for every item (image
+    references, cached cards). Returns the number of deleted items.
+    """
+    with transaction.atomic():
+        ids = list(queryset.order_by().values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            Inquiry.objects.filter(item_id__in=batch).delete()
+            Item.objects.filter(id__in=batch).delete()
+    return len(ids)
+
+
+class OwnerFilter(admin.SimpleListFilter):
+    """
+    Filter by owner id, set from the owner column. Never lists every user.
+    """
+    title = 'owner'
+    parameter_name = 'owner'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        owner = User.objects.filter(pk=value).first()
+        return [(value, str(owner or value))]
+
+    def has_output(self):
+        return bool(self.value())
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            #Served by the item_owner_posted_idx index
+            return queryset.filter(owner_id=value)
+        return queryset
+
+
+#Admin of the Item model, kept fast for large catalogues
+@admin.register(Item)
+class ItemAdmin(admin.ModelAdmin):
+    """
+    Every changelist query is served by an index: newest first on
+    item_posted_idx, per owner on item_owner_posted_idx and search on the
+    search backend. Bulk deletes go in batches and thumbnail resets in one UPDATE.
+    """
+    list_display = ('id', 'title', 'owner_link', 'quantity', 'thumbnails_ready', 'posted_at')
+    list_select_related = ('owner',)
+    list_filter = (('posted_at', admin.DateFieldListFilter), OwnerFilter)
+    #Sorting on other columns would sort the whole table
+    sortable_by = ('id', 'posted_at')
+    ordering = ('-posted_at', '-id')
+    search_fields = ('title',)
+    search_help_text = ('Searches title and description, or an item id. '
+                        f'Shows the best {ADMIN_SEARCH_LIMIT} matches at most.')
+    raw_id_fields = ('owner',)
+    readonly_fields = ('image_digest', 'posted_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    #Django's delete_selected stays, with its confirmation page and LogEntry per item
+    actions = ('regenerate_thumbnails',)
+
+    @admin.display(description='owner')
+    def owner_link(self, item):
+        """Owner name, linking to the items of that owner."""
+        return format_html('<a href="?{}={}">{}</a>',
+                           OwnerFilter.parameter_name, item.owner_id, item.owner)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        ids = get_search_backend().search_ids(term, 0, ADMIN_SEARCH_LIMIT)
+        if len(ids) >= ADMIN_SEARCH_LIMIT:
+            self.message_user(
+                request, f'Only the best {ADMIN_SEARCH_LIMIT} matches are listed, '
+                'refine the search to see the others.', messages.WARNING)
+        if term.isdigit():
+            ids.append(int(term))
+        return queryset.filter(id__in=ids), False
+
+    def delete_queryset(self, request, queryset):
+        """
+        Used by Django's delete_selected action once the deletions are
+        logged: the items go in batches with their inquiries deleted first.
+        """
+        delete_items(queryset)
+
+    @admin.action(permissions=['change'], description='Regenerate thumbnails of selected items')
+    def regenerate_thumbnails(self, request, queryset):
+        """
+        Mark the thumbnails as missing in one UPDATE; the generate_thumbnails
+        command stores them again.
+        """
+        with transaction.atomic():
+            ids = list(queryset.order_by().values_list('id', flat=True))
+            updated = queryset.order_by().update(
+                thumbnails_ready=False, updated_at=timezone.now())
+        invalidate_items(ids)
+        self.message_user(
+            request,
+            f'{updated} items will get new thumbnails on the next generate_thumbnails run.',
+            messages.SUCCESS)
@@ -0,0 +1,241 @@
+"""
+Read-only JSON API for the mobile client: item list, detail and search.
+Rows are read with .values() so no model instances are built, lists are
+streamed as they come off the database cursor, and every response carries an
+ETag built from the database (the item count and the latest Item.updated_at),
+so a client revalidating an unchanged page gets a 304 after one indexed
+aggregate query, whichever worker it reaches.
+Clients can ask for a subset of the fields with ?fields=id,title,image_url.
+"""
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from .media_urls import resolve_urls
+from .models import Item
+from .pagination import (
+    CURSOR_PARAM, NEXT, decode_cursor, decode_offset_cursor, encode_cursor,
+    encode_offset_cursor, get_page_size, older_than)
+from .query_budgets import query_budget
+from .search import get_search_backend
+from .thumbnails import thumbnail_name
+
+#API field: database columns it needs
+FIELDS = {
+    'id': ('id',),
+    'title': ('title',),
+    'description': ('description',),
+    'quantity': ('quantity',),
+    'posted_at': ('posted_at',),
+    'owner': ('owner__username',),
+    'image_url': ('image',),
+    'thumbnail_url': ('image', 'thumbnails_ready'),
+}
+
+#Largest page a client may ask for with ?limit=
+MAX_PAGE_SIZE = 100
+
+#Rows whose image URLs are resolved in one cache round-trip while streaming
+URL_BATCH_SIZE = 50
+
+
+class FieldError(ValueError):
+    """
+    The client asked for a field the API does not have.
+    """
+
+
+def _requested_fields(request):
+    requested = [name for name in request.GET.get('fields', '').split(',') if name]
+    unknown = [name for name in requested if name not in FIELDS]
+    if unknown:
+        raise FieldError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or list(FIELDS)
+
+
+def _columns(fields):
+    #id and posted_at are always read, the cursor is built from them
+    columns = {'id': None, 'posted_at': None}
+    for field in fields:
+        columns.update(dict.fromkeys(FIELDS[field]))
+    return list(columns)
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', ''))
+    except ValueError:
+        return get_page_size()
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _media_name(row, field):
+    #Same fallback as the thumbnail_url template tag: the original until thumbnails exist
+    image = row.get('image')
+    if image and field == 'thumbnail_url' and row['thumbnails_ready']:
+        return thumbnail_name(image, 'card', 'jpeg')
+    return image
+
+
+def _image_names(row, fields):
+    return [_media_name(row, field) for field in ('image_url', 'thumbnail_url')
+            if field in fields and row.get('image')]
+
+
+def _serialize(row, fields, urls):
+    data = {}
+    for field in fields:
+        if field == 'owner':
+            data[field] = row['owner__username']
+        elif field in ('image_url', 'thumbnail_url'):
+            data[field] = urls.get(_media_name(row, field), '') if row.get('image') else ''
+        else:
+            data[field] = row[field]
+    return data
+
+
+def _serialized_batches(rows, fields):
+    #Resolve the media URLs of a batch of rows at once, like prefetch_item_urls
+    storage = Item.image_storage()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == URL_BATCH_SIZE:
+            yield from _serialize_batch(storage, batch, fields)
+            batch = []
+    yield from _serialize_batch(storage, batch, fields)
+
+
+def _serialize_batch(storage, batch, fields):
+    names = [name for row in batch for name in _image_names(row, fields)]
+    urls = resolve_urls(storage, names) if names else {}
+    for row in batch:
+        yield row, _serialize(row, fields, urls)
+
+
+def _stream_page(rows, fields, size, next_cursor):
+    """
+    Yield a JSON page {"results": [...], "next": cursor} chunk by chunk.
+    rows holds up to size + 1 rows; the extra row only tells that a next page
+    exists. next_cursor(last row) builds the cursor of the following page.
+    """
+    yield '{"results": ['
+    last = None
+    count = 0
+    for row, data in _serialized_batches(rows, fields):
+        if count == size:
+            yield '], "next": ' + json.dumps(next_cursor(last)) + '}'
+            return
+        yield (', ' if count else '') + json.dumps(data, cls=DjangoJSONEncoder)
+        last, count = row, count + 1
+    yield '], "next": null}'
+
+
+def _bad_request(error):
+    return JsonResponse({'error': str(error)}, status=400)
+
+
+def _etag(request, *parts):
+    path = hashlib.md5(request.get_full_path().encode('utf-8'), usedforsecurity=False)
+    return 'W/"' + '-'.join([*map(str, parts), path.hexdigest()]) + '"'
+
+
+#Validators for conditional GET, read from the database so every worker agrees.
+#The feeds have no Last-Modified: deleting an item lowers the count in the ETag
+#but can leave the latest updated_at where it was.
+def _feed_etag(request, *args, **kwargs):  #pylint: disable=unused-argument
+    state = Item.objects.aggregate(count=Count('id'), latest=Max('updated_at'))
+    latest = state['latest'].timestamp() if state['latest'] else 0
+    return _etag(request, state['count'], latest)
+
+
+def _item_updated_at(request, item_id):
+    #condition() asks for the ETag and Last-Modified separately, one query for both
+    if not hasattr(request, 'item_updated_at'):
+        request.item_updated_at = Item.objects.filter(id=item_id).values_list(
+            'updated_at', flat=True).first()
+    return request.item_updated_at
+
+
+def _item_etag(request, item_id):
+    updated_at = _item_updated_at(request, item_id)
+    return _etag(request, updated_at.timestamp()) if updated_at else None
+
+
+def _item_last_modified(request, item_id):
+    return _item_updated_at(request, item_id)
+
+
+#For the item list API
+@query_budget(2)
+@require_GET
+@condition(etag_func=_feed_etag)
+def item_list_api(request):
+    """
+    Stream one page of items, newest first. ?cursor= continues after the last page.
+    """
+    try:
+        fields = _requested_fields(request)
+    except FieldError as error:
+        return _bad_request(error)
+    size = _page_size(request)
+
+    queryset = Item.objects.order_by('-posted_at', '-id')
+    position = decode_cursor(request.GET.get(CURSOR_PARAM, ''))
+    if position is not None and position[2] == NEXT:
+        queryset = older_than(queryset, position[0], position[1])
+    rows = queryset.values(*_columns(fields))[:size + 1].iterator()
+
+    def next_cursor(row):
+        return encode_cursor(row['posted_at'], row['id'], NEXT)
+
+    return StreamingHttpResponse(
+        _stream_page(rows, fields, size, next_cursor), content_type='application/json')
+
+
+#For the item search API
+@query_budget(3)
+@require_GET
+@condition(etag_func=_feed_etag)
+def item_search_api(request):
+    """
+    Stream one page of the items matching ?query=, best match first.
+    """
+    try:
+        fields = _requested_fields(request)
+    except FieldError as error:
+        return _bad_request(error)
+    query = request.GET.get('query', '').strip()
+    if not query:
+        return _bad_request('The query parameter is required.')
+    size = _page_size(request)
+
+    offset = decode_offset_cursor(request.GET.get(CURSOR_PARAM, ''))
+    ids = get_search_backend().search_ids(query, offset, size + 1)
+    rows = {row['id']: row for row in Item.objects.filter(id__in=ids).values(*_columns(fields))}
+    ranked = (rows[pk] for pk in ids if pk in rows)
+
+    return StreamingHttpResponse(
+        _stream_page(ranked, fields, size, lambda row: encode_offset_cursor(offset + size)),
+        content_type='application/json')
+
+
+#For the item detail API
+@query_budget(2)
+@require_GET
+@condition(etag_func=_item_etag, last_modified_func=_item_last_modified)
+def item_detail_api(request, item_id):
+    """
+    Return one item.
+    """
+    try:
+        fields = _requested_fields(request)
+    except FieldError as error:
+        return _bad_request(error)
+    row = Item.objects.filter(id=item_id).values(*_columns(fields)).first()
+    if row is None:
+        return JsonResponse({'error': 'Item not found.'}, status=404)
+    urls = resolve_urls(Item.image_storage(), _image_names(row, fields))
+    return JsonResponse(_serialize(row, fields, urls))
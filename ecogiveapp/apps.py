@@ -2,6 +2,8 @@
 This module contains the configuration for the ecogiveapp application.
 """
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 class EcogiveappConfig(AppConfig):
     """
@@ -9,3 +11,11 @@ class EcogiveappConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ecogiveapp'
+
+    def ready(self):
+        #Imported here because the app registry is not ready at module import time
+        from .search import install_search_index  #pylint: disable=import-outside-toplevel
+        from .sqlite import apply_pragmas  #pylint: disable=import-outside-toplevel
+        from . import signals  #pylint: disable=import-outside-toplevel, unused-import
+        post_migrate.connect(install_search_index, sender=self)
+        connection_created.connect(apply_pragmas, dispatch_uid='ecogiveapp.sqlite.apply_pragmas')
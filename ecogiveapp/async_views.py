@@ -0,0 +1,134 @@
+"""
+ASGI-native versions of the busiest public views: home, item_list,
+view_item_detail and inquire_item.
+They read through Django's async ORM (aget, async for), so a request only
+leaves the event loop to render its template, which Django does synchronously
+(context processors read the session and the user, template tags resolve
+image URLs), and to store an inquiry with its email in one transaction
+(arecord_inquiry), which the async ORM cannot open. EcoGive/asgi_urls.py
+routes the four URLs here when ASYNC_VIEWS is on, which EcoGive/asgi.py does;
+WSGI deployments keep the sync views of views.py.
+Django 4.2's csrf_protect and require_http_methods do not wrap async views,
+POSTs are still checked by CsrfViewMiddleware.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404, HttpResponseNotAllowed
+from django.shortcuts import redirect, render
+from .caching import cache_anonymous_page, card_cache_ttl, remember_page_items
+from .cards import CARD_FIELDS, prepare_cards
+from .inquiries import arecord_inquiry
+from .models import Item
+from .pagination import KeysetPaginator, RankedPaginator
+from .query_budgets import query_budget
+from .search import get_search_backend
+from .throttling import throttle
+
+
+def require_http_methods_async(methods):
+    """
+    require_http_methods for async views.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return await view_func(request, *args, **kwargs)
+        return inner
+    return decorator
+
+
+async def aget_object_or_404(queryset, **lookup):
+    """
+    get_object_or_404 with the async ORM.
+    """
+    try:
+        return await queryset.aget(**lookup)
+    except queryset.model.DoesNotExist as error:
+        name = queryset.model._meta.object_name  #pylint: disable=protected-access
+        raise Http404(f'No {name} matches the given query.') from error
+
+
+def _authenticated_user(request):
+    #Resolving the lazy request.user reads the session and the user row
+    return request.user if request.user.is_authenticated else None
+
+
+def _render_feed(request, template_name, page):
+    #Card values and the template in one trip off the event loop
+    prepare_cards(page.object_list)
+    remember_page_items(request, page.object_list)
+    return render(request, template_name, {
+        'items': page.object_list, 'page': page, 'card_ttl': card_cache_ttl()})
+
+
+#For home page view
+@query_budget(2)
+@cache_anonymous_page
+async def home(request):
+    """
+    Async home page with the search query function for filtered view.
+    """
+    query = request.GET.get('query', '').strip()
+    if query:
+        backend = get_search_backend()
+        page = await RankedPaginator(
+            lambda offset, limit: backend.search(query, offset, limit)).aget_page(request)
+    else:
+        page = await KeysetPaginator(Item.objects.only(*CARD_FIELDS)).aget_page(request)
+    return await sync_to_async(_render_feed)(request, 'home.html', page)
+
+
+#For item list view
+@query_budget(3)
+@cache_anonymous_page
+async def item_list(request):
+    """
+    Async item list: all items with "all=true" or for public users,
+    otherwise the logged-in user's items.
+    """
+    all_items = request.GET.get('all', 'false').lower() == 'true'
+    user = None if all_items else await sync_to_async(_authenticated_user)(request)
+
+    items = Item.objects.only(*CARD_FIELDS)
+    if user is not None:
+        items = items.filter(owner=user)
+    page = await KeysetPaginator(items).aget_page(request)
+    return await sync_to_async(_render_feed)(request, 'item_list.html', page)
+
+
+#View Item Detail Displays for an individual item
+@query_budget(1)
+async def view_item_detail(request, item_id):
+    """
+    Async detail page of a specific item.
+    """
+    item = await aget_object_or_404(Item.objects.only(*CARD_FIELDS), id=item_id)
+    return await sync_to_async(render)(request, 'item_detail.html', {'item': item})
+
+
+#For item inquiry
+@query_budget(5)
+@require_http_methods_async(["GET", "POST"])
+@throttle('inquiry') #every inquiry is an email on our quota
+async def inquire_item(request, item_id):
+    """
+    Async inquiry form; the email to the owner is queued in the outbox.
+    """
+    item = await aget_object_or_404(
+        Item.objects.select_related('owner', 'owner__inquiry_preference'), id=item_id)
+    if request.method == 'POST':
+        email = request.POST.get('email', '').strip()
+        message = request.POST.get('message', '').strip()
+
+        if not email:
+            messages.error(request, "Email is required to send an inquiry.")
+            return await sync_to_async(render)(request, 'inquire_item.html', {'item': item})
+
+        await arecord_inquiry(item, email, message)
+        messages.success(request, 'Inquiry sent successfully.')
+        return redirect('item_list')
+
+    return await sync_to_async(render)(request, 'inquire_item.html', {'item': item})
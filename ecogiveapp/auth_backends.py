@@ -0,0 +1,55 @@
+"""
+Authentication backend that caches the logged-in user.
+AuthenticationMiddleware loads request.user on every authenticated request;
+CachedModelBackend.get_user serves it from the cache for USER_CACHE_TTL
+seconds instead of running an auth_user SELECT. The signal receivers in
+signals.py evict a user whenever it is saved or deleted, which includes
+password changes and the last_login update of every login. Queryset
+update() calls skip those signals and are only seen after the TTL. Evictions
+only reach every worker through a shared cache, so settings.py lists this
+backend only when SHARED_CACHE is on. ModelBackend is listed after it, so
+sessions stored with ModelBackend's path stay logged in across the switch.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+
+
+def _cache():
+    return caches[getattr(settings, 'USER_CACHE_ALIAS', 'default')]
+
+
+def user_cache_key(user_id):
+    """
+    Return the cache key of a user.
+    """
+    return f'auth:user:{user_id}'
+
+
+def evict_user(user_id):
+    """
+    Drop a user from the cache.
+    """
+    _cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user reads through the cache.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            #Stops authenticate() before ModelBackend hashes the same password again
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = _cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                _cache().set(key, user, getattr(settings, 'USER_CACHE_TTL', 300))
+        return user if user is not None and self.user_can_authenticate(user) else None
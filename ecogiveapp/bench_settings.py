@@ -0,0 +1,22 @@
+"""
+Settings overrides of the benchmarks.
+Imports nothing from Django, so startup_probe can apply them before the
+application loads and benchmark and the query budget plugin after.
+"""
+
+
+def bench_settings(settings, media_root, static_root):
+    """
+    Return the settings every benchmark runs with: local media and static
+    files, the local stand-ins for uploads and email and no throttle limits.
+    """
+    #Repeated logins and inquiries would be throttled; keep the check, lift the limits
+    unlimited = {scope: dict.fromkeys(limits, '1000000000/s')
+                 for scope, limits in getattr(settings, 'THROTTLE_RATES', {}).items()}
+    return {
+        'DEFAULT_FILE_STORAGE': 'django.core.files.storage.FileSystemStorage',
+        'MEDIA_ROOT': media_root, 'MEDIA_URL': '/media/', 'STATIC_ROOT': static_root,
+        'DIRECT_UPLOAD_BACKEND': 'ecogiveapp.direct_uploads.LocalPresigner',
+        'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+        'THROTTLE_RATES': unlimited,
+    }
@@ -0,0 +1,563 @@
+"""
+Benchmark harness for every route in EcoGive/urls.py.
+seed() creates users and items with placeholder images, run_routes() drives
+each route through the Django test client and records latency percentiles,
+query counts and response sizes, and compare() diffs a run against a stored
+JSON baseline. The benchmark_routes management command wires these together
+inside a throwaway test database.
+compare_servers() drives the public pages through Django's WSGI and ASGI
+handlers with many concurrent requests and reports throughput and peak
+memory, for the benchmark_servers command.
+compare_card_counts() times preparing and rendering the shared item card
+for large feeds, for the benchmark_cards command.
+measure_startup() loads the application in fresh interpreters, with and
+without the warm-up, and times the first request of every route, for the
+benchmark_startup command.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import Client
+from django.template import engines
+from django.templatetags.static import static
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment)
+from django.urls import reverse
+from .bench_settings import bench_settings
+from .blobs import acquire
+from .cards import prepare_cards
+from .direct_uploads import LocalPresigner, new_key
+from .models import ImageBlob, Inquiry, Item
+from .sqlite import checkpoint
+
+#Password of every seeded user
+PASSWORD = 'Bench-P@ssw0rd'
+
+#Seeded superuser for the admin routes
+ADMIN_USERNAME = 'admin-bench'
+
+#Server setups compared by compare_servers: label: (handler, ROOT_URLCONF)
+SERVER_MODES = {
+    'wsgi': ('wsgi', 'EcoGive.urls'),
+    'asgi sync views': ('asgi', 'EcoGive.urls'),
+    'asgi async views': ('asgi', 'EcoGive.asgi_urls'),
+}
+
+#Colours of the placeholder images shared by the seeded items
+PLACEHOLDER_COLOURS = ['#098666', '#198754', '#207f5e', '#d1f5e0', '#e6f2eb']
+
+
+def placeholder_jpeg(colour='#098666', size=(800, 600)):
+    """
+    Return the bytes of a plain JPEG used as item photo.
+    """
+    buffer = BytesIO()
+    Image.new('RGB', size, colour).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def seed(users=20, items=500, batch_size=500):
+    """
+    Create users bench0..benchN and items spread over them. The items share a
+    few placeholder images stored in the configured (local) storage.
+    Returns the list of created users.
+    """
+    password = make_password(PASSWORD)  #hash once, it is the slow part
+    User.objects.bulk_create(
+        [User(username=f'bench{n}', email=f'bench{n}@example.com', password=password)
+         for n in range(users)],
+        batch_size=batch_size)
+    owners = list(User.objects.filter(username__startswith='bench').order_by('id'))
+    User.objects.create(
+        username=ADMIN_USERNAME, password=password, is_staff=True, is_superuser=True)
+
+    storage = Item.image_storage()
+    photos = [placeholder_jpeg(colour) for colour in PLACEHOLDER_COLOURS]
+    images = [storage.save(f'images/bench-placeholder-{n}.jpg', ContentFile(photo))
+              for n, photo in enumerate(photos)]
+
+    pending = []
+    for n in range(items):
+        pending.append(Item(
+            owner=owners[n % len(owners)],
+            title=f'Bench item {n}',
+            description=f'Seeded item number {n} for the route benchmark. ' * 3,
+            quantity=n % 5 + 1,
+            image=images[n % len(images)],
+        ))
+        if len(pending) >= batch_size:
+            Item.objects.bulk_create(pending)
+            pending = []
+    Item.objects.bulk_create(pending)
+    #Counted like uploads, so releasing one reference leaves the shared image alone
+    ImageBlob.objects.bulk_create([
+        ImageBlob(name=name, digest=hashlib.sha256(photo).hexdigest(),
+                  refcount=len(range(n, items, len(images))))
+        for n, (name, photo) in enumerate(zip(images, photos))])
+    return owners
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class Route:
+    """
+    One benchmarked request. request(ctx, n) returns (path, data) for the n-th
+    iteration; login is the username to log in as, or None for anonymous.
+    headers are extra request headers, e.g. Accept-Encoding.
+    """
+    #pylint: disable-next=too-many-arguments, too-many-positional-arguments
+    def __init__(self, label, url_name, request, method='get', login=None, headers=None):
+        self.label = label
+        self.url_name = url_name
+        self.request = request
+        self.method = method
+        self.login = login
+        self.headers = headers
+
+
+def _item_of_owner(ctx):
+    return Item.objects.filter(owner=ctx['owner']).order_by('-id').first()
+
+
+def _fresh_item(ctx):
+    #delete_item removes an item per iteration, so each one gets its own. Like a
+    #real listing it has an inquiry and an image only it uses, so deleting or
+    #replacing it takes the last-reference path of blobs.release
+    name = f'images/bench-{uuid.uuid4().hex}.jpg'
+    acquire(name, hashlib.sha256(name.encode()).hexdigest())
+    item = Item.objects.create(
+        owner=ctx['owner'], title='Bench throwaway', description='To be deleted', image=name)
+    Inquiry.objects.create(item=item, owner=ctx['owner'], email='visitor@example.com',
+                           message='Is it still available?')
+    return item
+
+
+def _edit_image(ctx, n):
+    #A photo not stored yet replaces the only reference to the old one
+    colour = f'#{(n * 7919) % 0xffffff:06x}'
+    return reverse('edit_item', args=[_fresh_item(ctx).id]), {
+        'title': f'Edited {n}', 'description': 'Edited', 'quantity': 2,
+        'image': SimpleUploadedFile(f'edited{n}.jpg', placeholder_jpeg(colour), 'image/jpeg')}
+
+
+def _local_upload(ctx, n):
+    storage = Item.image_storage()
+    target = LocalPresigner(storage).presign(new_key(ctx['owner'], 'image/jpeg'), 'image/jpeg')
+    file = SimpleUploadedFile(f'direct{n}.jpg', ctx['photo'], 'image/jpeg')
+    return target['url'], {**target['fields'], 'file': file}
+
+
+def default_routes():
+    """
+    Return the routes covering every URL name in EcoGive/urls.py.
+    """
+    owner = 'bench0'
+    return [
+        Route('home', 'home', lambda ctx, n: (reverse('home'), None)),
+        Route('home?query', 'home', lambda ctx, n: (reverse('home'), {'query': 'bench item'})),
+        Route('register GET', 'register', lambda ctx, n: (reverse('register'), None)),
+        Route('register POST', 'register', lambda ctx, n: (reverse('register'), {
+            'username': f'newuser{n}', 'email': f'newuser{n}@example.com',
+            'password': 'P@ssw0rd123', 'confirm_password': 'P@ssw0rd123'}), method='post'),
+        Route('login GET', 'login', lambda ctx, n: (reverse('login'), None)),
+        Route('login POST', 'login', lambda ctx, n: (reverse('login'), {
+            'username': owner, 'password': PASSWORD}), method='post'),
+        Route('logout', 'logout', lambda ctx, n: (reverse('logout'), None), login=owner),
+        Route('item_list', 'item_list', lambda ctx, n: (reverse('item_list'), None), login=owner),
+        Route('item_list?all=true', 'item_list',
+              lambda ctx, n: (reverse('item_list'), {'all': 'true'})),
+        Route('view_item_detail', 'view_item_detail', lambda ctx, n: (
+            reverse('view_item_detail', args=[ctx['item'].id]), None)),
+        Route('add_item GET', 'add_item', lambda ctx, n: (reverse('add_item'), None), login=owner),
+        Route('add_item POST', 'add_item', lambda ctx, n: (reverse('add_item'), {
+            'title': f'Added {n}', 'description': 'Benchmark upload', 'quantity': 1,
+            'image': SimpleUploadedFile(f'added{n}.jpg', ctx['photo'], 'image/jpeg')}),
+              method='post', login=owner),
+        Route('inquire_item GET', 'inquire_item', lambda ctx, n: (
+            reverse('inquire_item', args=[ctx['item'].id]), None)),
+        Route('inquire_item POST', 'inquire_item', lambda ctx, n: (
+            reverse('inquire_item', args=[ctx['item'].id]),
+            {'email': 'visitor@example.com', 'message': 'Is it still available?'}), method='post'),
+        Route('dashboard', 'dashboard', lambda ctx, n: (reverse('dashboard'), None), login=owner),
+        Route('inquiry_preferences', 'inquiry_preferences', lambda ctx, n: (
+            reverse('inquiry_preferences'), {'digest': 'on' if n % 2 else ''}),
+              method='post', login=owner),
+        Route('edit_item GET', 'edit_item', lambda ctx, n: (
+            reverse('edit_item', args=[_item_of_owner(ctx).id]), None), login=owner),
+        Route('edit_item POST', 'edit_item', lambda ctx, n: (
+            reverse('edit_item', args=[_item_of_owner(ctx).id]),
+            {'title': f'Edited {n}', 'description': 'Edited', 'quantity': 2}),
+              method='post', login=owner),
+        Route('edit_item POST image', 'edit_item', _edit_image, method='post', login=owner),
+        Route('delete_item GET', 'delete_item', lambda ctx, n: (
+            reverse('delete_item', args=[_item_of_owner(ctx).id]), None), login=owner),
+        Route('delete_item POST', 'delete_item', lambda ctx, n: (
+            reverse('delete_item', args=[_fresh_item(ctx).id]), None),
+              method='post', login=owner),
+        Route('admin item changelist', 'admin:ecogiveapp_item_changelist', lambda ctx, n: (
+            reverse('admin:ecogiveapp_item_changelist'), None), login=ADMIN_USERNAME),
+        Route('presign_upload', 'presign_upload', lambda ctx, n: (reverse('presign_upload'), {
+            'content_type': 'image/jpeg', 'size': len(ctx['photo'])}), method='post', login=owner),
+        Route('local_upload', 'local_upload', _local_upload, method='post'),
+        Route('item_list_api', 'item_list_api', lambda ctx, n: (reverse('item_list_api'), None)),
+        Route('item_search_api', 'item_search_api', lambda ctx, n: (
+            reverse('item_search_api'), {'query': 'bench item'})),
+        Route('item_detail_api', 'item_detail_api', lambda ctx, n: (
+            reverse('item_detail_api', args=[ctx['item'].id]), None)),
+        Route('performance_report', 'performance_report', lambda ctx, n: (
+            reverse('performance_report'), None), login=ADMIN_USERNAME),
+        Route('static_asset', 'static_asset', lambda ctx, n: (static('styles.css'), None)),
+        Route('static_asset gzip', 'static_asset', lambda ctx, n: (static('styles.css'), None),
+              headers={'Accept-Encoding': 'gzip, deflate, br'}),
+    ]
+
+
+def run_route(route, ctx, iterations):  #pylint: disable=too-many-locals
+    """
+    Run one route `iterations` times and return its measurements.
+    """
+    client = Client()
+    if route.login:
+        client.login(username=route.login, password=PASSWORD)
+    latencies, queries, sizes, statuses = [], [], [], set()
+    for n in range(iterations):
+        path, data = route.request(ctx, n)  #setup work is not timed
+        if route.login and not client.session.get('_auth_user_id'):
+            client.login(username=route.login, password=PASSWORD)  #logout ends the session
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(client, route.method)(path, data, headers=route.headers)
+            if response.streaming:
+                body = b''.join(response.streaming_content)
+            else:
+                body = response.content
+            elapsed = time.perf_counter() - start
+        latencies.append(elapsed * 1000)
+        queries.append(len(captured))
+        sizes.append(len(body))
+        statuses.add(response.status_code)
+    return {
+        'url_name': route.url_name,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': max(queries),
+        'bytes': max(sizes),
+        'status': sorted(statuses),
+    }
+
+
+def route_context():
+    """
+    Return the seeded objects the route requests are built from.
+    """
+    return {
+        'owner': User.objects.get(username='bench0'),
+        'item': Item.objects.order_by('id').first(),
+        'photo': placeholder_jpeg(),
+    }
+
+
+def run_routes(iterations=20, routes=None):
+    """
+    Benchmark every route against the seeded data and return {label: measurements}.
+    """
+    ctx = route_context()
+    return {route.label: run_route(route, ctx, iterations) for route in routes or default_routes()}
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Return a list of human-readable regressions of results against baseline:
+    p95 latency more than `threshold` slower, or more queries than before.
+    """
+    regressions = []
+    for label, current in results.items():
+        previous = baseline.get(label)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f"{label}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f"{label}: queries {previous['queries']} -> {current['queries']}")
+    return regressions
+
+
+def load_baseline(path):
+    """
+    Read a baseline written by save_baseline.
+    """
+    with open(path, encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results):
+    """
+    Write benchmark results as a JSON baseline.
+    """
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+
+@contextmanager
+def benchmark_environment(database_file=None):
+    """
+    Run the block against a throwaway test database, local media and the
+    local stand-ins for uploads and email, so no benchmark touches the real
+    database or bucket. Static files are collected into a temporary
+    STATIC_ROOT, so pages link the fingerprinted, precompressed assets.
+    SQLite test databases live in memory unless database_file is given.
+    Yields the media and static roots.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+    if database_file:
+        connection.settings_dict['TEST']['NAME'] = database_file
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    media_root = tempfile.mkdtemp(prefix='ecogive-bench-')
+    static_root = tempfile.mkdtemp(prefix='ecogive-bench-static-')
+    try:
+        with override_settings(**bench_settings(settings, media_root, static_root)):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            for cache in caches.all():
+                cache.clear()
+            yield {'media_root': media_root, 'static_root': static_root}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+        teardown_test_environment()
+        shutil.rmtree(media_root, ignore_errors=True)
+        shutil.rmtree(static_root, ignore_errors=True)
+
+
+def server_paths():
+    """
+    Return the anonymous GET paths used to compare WSGI and ASGI: the pages
+    that have async views.
+    """
+    item = Item.objects.order_by('id').first()
+    return [
+        (reverse('home'), ''),
+        (reverse('home'), 'query=bench+item'),
+        (reverse('item_list'), 'all=true'),
+        (reverse('view_item_detail', args=[item.id]), ''),
+        (reverse('inquire_item', args=[item.id]), ''),
+    ]
+
+
+def _wsgi_request(handler, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'HTTP_HOST': 'testserver', 'SERVER_NAME': 'testserver'}
+    setup_testing_defaults(environ)
+    status = []
+    body = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def _asgi_request(handler, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    status = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:  #the client stays connected until the response is sent
+            await asyncio.Event().wait()
+        sent = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await handler(scope, receive, send)
+    return status[0]
+
+
+def _run_wsgi(paths, concurrency, requests):
+    handler = WSGIHandler()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(
+            lambda n: _wsgi_request(handler, *paths[n % len(paths)]), range(requests)))
+
+
+def _run_asgi(paths, concurrency, requests):
+    handler = ASGIHandler()
+
+    async def run():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(n):
+            async with slots:
+                return await _asgi_request(handler, *paths[n % len(paths)])
+        return await asyncio.gather(*(one(n) for n in range(requests)))
+    return asyncio.run(run())
+
+
+def measure_server(mode, paths, concurrency=100, requests=1000):
+    """
+    Serve `requests` GETs spread over paths, `concurrency` at a time, through
+    the handler of a SERVER_MODES entry. Returns requests per second and the
+    peak Python heap of a second, traced pass (tracing slows the requests).
+    """
+    server, urlconf = SERVER_MODES[mode]
+    run = _run_wsgi if server == 'wsgi' else _run_asgi
+    with override_settings(ROOT_URLCONF=urlconf):
+        run(paths, concurrency, len(paths))  #warm up the caches and templates
+        start = time.perf_counter()
+        statuses = run(paths, concurrency, requests)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        try:
+            run(paths, concurrency, requests)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {
+        'requests_per_second': round(requests / elapsed, 1),
+        'peak_memory_mib': round(peak / 2 ** 20, 2),
+        'status': sorted(set(statuses)),
+    }
+
+
+def compare_servers(concurrency=100, requests=1000, modes=None):
+    """
+    Measure every SERVER_MODES entry against the seeded data and return {mode: measurements}.
+    """
+    paths = server_paths()
+    return {mode: measure_server(mode, paths, concurrency, requests)
+            for mode in modes or SERVER_MODES}
+
+
+#Feed of cards as home.html renders it, without the fragment cache
+CARD_FEED = ("{% for item in items %}{% include 'item_card.html' with "
+             "details_class='btn-outline-success' inquire_class='btn-success' %}{% endfor %}")
+
+#Card counts of the render benchmark
+CARD_COUNTS = (1000, 10000, 50000)
+
+
+def card_items(count):
+    """
+    Return `count` unsaved items shaped like real feed items: most with an
+    image, some with thumbnails, long enough descriptions to be truncated.
+    """
+    items = []
+    for n in range(count):
+        item = Item(id=n + 1, owner_id=1, title=f'Bench item {n}', quantity=1 + n % 3,
+                    description=f'Bench item {n} for the card render benchmark. ' * 4,
+                    thumbnails_ready=n % 4 == 0)
+        if n % 5:
+            item.image.name = f'images/bench{n}.jpg'
+        items.append(item)
+    return items
+
+
+def measure_cards(count):
+    """
+    Time preparing and rendering `count` cards and return the totals and the
+    microseconds per card of each step.
+    """
+    template = engines.all()[0].from_string(CARD_FEED)
+    items = card_items(count)
+    template.render({'items': items[:1]})  #compile the card outside the timing
+
+    start = time.perf_counter()
+    prepare_cards(items)
+    prepared = time.perf_counter()
+    html = template.render({'items': items})
+    rendered = time.perf_counter()
+    return {
+        'cards': count,
+        'prepare_ms': round((prepared - start) * 1000, 1),
+        'render_ms': round((rendered - prepared) * 1000, 1),
+        'prepare_us_per_card': round((prepared - start) * 1e6 / count, 2),
+        'render_us_per_card': round((rendered - prepared) * 1e6 / count, 2),
+        'bytes_per_card': len(html) // count,
+    }
+
+
+def compare_card_counts(counts=CARD_COUNTS):
+    """
+    Measure the card render path for every count and return {count: measurements}.
+    """
+    return {count: measure_cards(count) for count in counts}
+
+
+def _probe(label, database, roots, warm):
+    #Every probe gets its own copy, write routes must not affect the next one
+    with tempfile.TemporaryDirectory(prefix='ecogive-probe-') as directory:
+        copy = os.path.join(directory, 'db.sqlite3')
+        shutil.copyfile(database, copy)
+        command = [sys.executable, '-m', 'ecogiveapp.startup_probe', '--route', label,
+                   '--db', copy, '--media-root', roots['media_root'],
+                   '--static-root', roots['static_root']]
+        if warm:
+            command.append('--warm')
+        #DJANGO_SETTINGS_MODULE is inherited from this process
+        result = subprocess.run(command, capture_output=True, text=True, check=True,
+                                cwd=settings.BASE_DIR)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(roots, labels=None):
+    """
+    Start a fresh interpreter per route, once cold and once with the warm-up,
+    and return {label: {'cold': probe, 'warm': probe}} where every probe holds
+    the application load time (imports included) and the first and second
+    request latency. Run inside benchmark_environment(database_file=...) after seed().
+    """
+    checkpoint(connection)  #the probes copy the database file without its WAL
+    database = connection.settings_dict['NAME']
+    routes = [route for route in default_routes() if not labels or route.label in labels]
+    return {route.label: {'cold': _probe(route.label, database, roots, warm=False),
+                          'warm': _probe(route.label, database, roots, warm=True)}
+            for route in routes}
@@ -0,0 +1,150 @@
+"""
+Content-addressed storage of item images.
+Uploads are hashed (SHA-256) by the upload handlers while the request body is
+read, and every distinct image is stored once as images/<digest>.<ext>. An
+ImageBlob row counts the items using each stored image; the image (and its
+thumbnails) is handed to the storage GC only when the last one lets go.
+Uploading a photo that is already stored costs no storage write at all.
+"""
+import hashlib
+import os
+from collections import Counter, defaultdict
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import ImageBlob, Item, PendingDeletion
+from .storage_gc import schedule_image_deletion, schedule_image_deletions
+
+#Directory of the stored images, same as Item.image upload_to
+BLOB_DIRECTORY = 'images'
+
+
+class HashingUploadMixin:
+    """
+    Computes the SHA-256 of an uploaded file chunk by chunk and stores it on
+    the resulting UploadedFile as .sha256.
+    """
+    def new_file(self, *args, **kwargs):
+        """Start a new hash for every file of the request."""
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        """Hash the chunk, then hand it on unchanged."""
+        #An inactive memory handler passes the data on to the next handler
+        if getattr(self, 'activated', True):
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        """Store the hex digest on the UploadedFile this handler produced."""
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self.hasher.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    """MemoryFileUploadHandler that hashes the upload."""
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    """TemporaryFileUploadHandler that hashes the upload."""
+
+
+def hash_file(content, chunk_size=64 * 1024):
+    """
+    Return the SHA-256 of a file, reading it in chunks, and rewind it.
+    """
+    hasher = hashlib.sha256()
+    content.seek(0)
+    for chunk in iter(lambda: content.read(chunk_size), b''):
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+def blob_name(digest, original_name):
+    """
+    Return the storage name of a blob: images/<digest> plus the original extension.
+    """
+    extension = os.path.splitext(original_name or '')[1].lower()
+    return f'{BLOB_DIRECTORY}/{digest}{extension}'
+
+
+def save_blob(content):
+    """
+    Store the file once per content and return (storage name, digest).
+    Nothing is written when a blob with the same digest exists.
+    """
+    digest = getattr(content, 'sha256', None) or hash_file(content)
+    existing = ImageBlob.objects.filter(digest=digest).values_list('name', flat=True).first()
+    if existing:
+        return existing, digest
+    storage = Item.image_storage()
+    name = blob_name(digest, content.name)
+    #The object can outlive its last blob row until the storage GC runs
+    if not storage.exists(name):
+        name = storage.save(name, content)
+    return name, digest
+
+
+def acquire(name, digest, count=1):
+    """
+    Record `count` more items using the stored image. Returns True when the
+    image was already in use. Call it inside the transaction that stores the
+    items, it also cancels the tombstones of an image released just before.
+    """
+    if ImageBlob.objects.filter(name=name).update(refcount=F('refcount') + count):
+        return True
+    try:
+        with transaction.atomic():
+            ImageBlob.objects.create(name=name, digest=digest, refcount=count)
+    except IntegrityError:  #another request created it in the meantime
+        ImageBlob.objects.filter(name=name).update(refcount=F('refcount') + count)
+        return True
+    #save_blob may have reused an object its last item let go of; keep it from the GC
+    PendingDeletion.objects.filter(source=name).delete()
+    return False
+
+
+def release(name):
+    """
+    Record that one item stopped using the stored image. The last release
+    tombstones the image and its thumbnails for the storage GC.
+    Images stored before deduplication have no blob and are tombstoned directly.
+    """
+    if ImageBlob.objects.filter(name=name, refcount__gt=1).update(refcount=F('refcount') - 1):
+        return
+    ImageBlob.objects.filter(name=name).delete()
+    schedule_image_deletion(name)
+
+
+def release_many(names, batch_size=500):
+    """
+    release() for many items at once, e.g. a bulk delete: one UPDATE per
+    distinct number of references dropped from an image, one DELETE of the
+    blobs nobody uses any more and one tombstone INSERT, per batch of images.
+    Call it inside the transaction that deletes the items.
+    """
+    by_count = defaultdict(list)
+    for name, count in Counter(name for name in names if name).items():
+        by_count[count].append(name)
+    for count, group in by_count.items():
+        for start in range(0, len(group), batch_size):
+            batch = group[start:start + batch_size]
+            blobs = dict(ImageBlob.objects.filter(name__in=batch).values_list('name', 'refcount'))
+            unused = [name for name in batch if blobs.get(name, 0) <= count]
+            ImageBlob.objects.filter(name__in=unused, refcount__lte=count).delete()
+            ImageBlob.objects.filter(name__in=batch, refcount__gt=count).update(
+                refcount=F('refcount') - count)
+            schedule_image_deletions(unused)
+
+
+def store_image(upload):
+    """
+    Store an uploaded image and count the new reference.
+    Returns (storage name, digest, True if the image was already stored).
+    """
+    name, digest = save_blob(upload)
+    return name, digest, acquire(name, digest)
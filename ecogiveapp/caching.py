@@ -0,0 +1,207 @@
+"""
+Rendered-fragment and anonymous page caching for the item feeds.
+Cache keys embed version stamps instead of being deleted: every item has a
+stamp that is part of its card fragment keys, and a cached anonymous page is
+stored with the stamps of the items on it and is only served while they are
+unchanged. Writing an item bumps its own stamp, which evicts its cards and the
+pages it is on. Pages that can gain an item are keyed by a stamp of their own:
+a new item is bumped into the first pages of the feeds, and any write into the
+search results. No cache keys ever have to be scanned or deleted.
+Only on with SHARED_CACHE (file-based, memcached, redis): under a per-process
+LocMemCache the workers that did not handle a write would keep serving what
+it changed, so cards and pages are then rendered on every request.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from .media_urls import url_ttl
+from .models import Item
+from .pagination import CURSOR_PARAM, NEXT, decode_cursor
+
+#Version stamps in the cached page keys
+PAGES_ALL = 'pages:all'  #every page, bumped by bulk imports
+PAGES_HEAD = 'pages:head'  #first pages and pages before a cursor, where new items show up
+PAGES_SEARCH = 'pages:search'  #search results, any write can change what matches
+
+
+def _cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def caching_enabled():
+    """
+    Return whether cards and pages are cached: only when every worker shares the cache.
+    """
+    return getattr(settings, 'SHARED_CACHE', False)
+
+
+def _stamp():
+    return time.time_ns()
+
+
+def item_scope(item_id):
+    """
+    Return the version stamp name of one item.
+    """
+    return f'item:{item_id}'
+
+
+def get_versions(scopes):
+    """
+    Return {scope: stamp} for the scopes, creating stamps that do not exist yet.
+    """
+    cache = _cache()
+    keys = {scope: f'version:{scope}' for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        if key not in found:
+            #add() keeps a stamp another process created in the meantime
+            cache.add(key, _stamp(), None)
+            found[key] = cache.get(key)
+        versions[scope] = found[key]
+    return versions
+
+
+def bump(*scopes):
+    """
+    Give the scopes new version stamps, which orphans every key built from the old ones.
+    """
+    stamp = _stamp()
+    _cache().set_many({f'version:{scope}': stamp for scope in scopes}, None)
+
+
+def invalidate_items(item_ids, added=False):
+    """
+    Evict the cards of the given items, the pages they are on and the search
+    pages; added items also evict the first pages of the feeds.
+    """
+    scopes = [PAGES_SEARCH, *(item_scope(item_id) for item_id in item_ids)]
+    if added:
+        scopes.append(PAGES_HEAD)
+    bump(*scopes)
+
+
+def card_cache_ttl():
+    """
+    Return how long card fragments and pages may be cached. Cards contain image
+    URLs, so they must not outlive a signed URL. 0 when caching is off, which
+    makes {% cache %} store nothing.
+    """
+    if not caching_enabled():
+        return 0
+    ttl = getattr(settings, 'CARD_CACHE_TTL', 600)
+    return min(ttl, url_ttl(Item.image_storage()))
+
+
+def attach_card_versions(items):
+    """
+    Store each item's version stamp on item.cache_version for the {% cache %}
+    tag of the card templates, in one cache round-trip for the page.
+    """
+    if not caching_enabled():
+        for item in items:
+            item.cache_version = 0
+        return items
+    versions = get_versions([item_scope(item.pk) for item in items])
+    for item in items:
+        item.cache_version = versions[item_scope(item.pk)]
+    return items
+
+
+def remember_page_items(request, items):
+    """
+    Record the card versions of the items a feed view renders (after
+    attach_card_versions), a cached copy of the page is only served while
+    none of them has changed.
+    """
+    request.page_item_versions = {item_scope(item.pk): item.cache_version for item in items}
+
+
+def _has_pending_messages(request):
+    #len() loads the stored messages without marking them as shown
+    return len(get_messages(request)) > 0
+
+
+def _is_personal(request):
+    #Reading request.user loads the session and the user, which is synchronous ORM work
+    return (request.method != 'GET' or request.user.is_authenticated
+            or _has_pending_messages(request))
+
+
+def _page_scopes(request):
+    #Pages after a cursor only ever lose items, a new item is newer than all of them
+    scopes = [PAGES_ALL]
+    if request.GET.get('query', '').strip():
+        scopes.append(PAGES_SEARCH)
+    cursor = decode_cursor(request.GET.get(CURSOR_PARAM))
+    if cursor is None or cursor[2] != NEXT:
+        scopes.append(PAGES_HEAD)
+    return scopes
+
+
+def _cached_page(request, view_func):
+    #Return the page cache key and the cached response, if any
+    versions = get_versions(_page_scopes(request))
+    path = hashlib.md5(request.get_full_path().encode('utf-8'), usedforsecurity=False)
+    stamps = '.'.join(str(versions[scope]) for scope in sorted(versions))
+    key = f'page:{view_func.__name__}:{path.hexdigest()}:{stamps}'
+    cache = _cache()
+    cached = cache.get(key)
+    if cached is None:
+        return key, None
+    content, content_type, item_versions = cached
+    #An item on the page was written (or its stamp evicted) since it was stored
+    current = cache.get_many([f'version:{scope}' for scope in item_versions])
+    if any(current.get(f'version:{scope}') != version
+           for scope, version in item_versions.items()):
+        return key, None
+    return key, HttpResponse(content, content_type=content_type)
+
+
+def _store_page(key, request, response):
+    #Responses that set cookies are specific to this visitor
+    if response.status_code == 200 and not response.streaming and not response.cookies:
+        ttl = card_cache_ttl()
+        if ttl:
+            item_versions = getattr(request, 'page_item_versions', {})
+            _cache().set(key, (response.content, response['Content-Type'], item_versions), ttl)
+
+
+def cache_anonymous_page(view_func):
+    """
+    Cache the whole response of a public feed view for anonymous GET requests,
+    keyed by the full path (query string included) and the page stamps, and
+    valid while the items recorded by remember_page_items are unchanged.
+    Works on sync and async views.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not caching_enabled() or await sync_to_async(_is_personal)(request):
+                return await view_func(request, *args, **kwargs)
+            key, cached = await sync_to_async(_cached_page)(request, view_func)
+            if cached is not None:
+                return cached
+            response = await view_func(request, *args, **kwargs)
+            await sync_to_async(_store_page)(key, request, response)
+            return response
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not caching_enabled() or _is_personal(request):
+            return view_func(request, *args, **kwargs)
+        key, cached = _cached_page(request, view_func)
+        if cached is not None:
+            return cached
+        response = view_func(request, *args, **kwargs)
+        _store_page(key, request, response)
+        return response
+    return wrapper
@@ -0,0 +1,59 @@
+"""
+Precomputed values of the item cards.
+The home, item list and dashboard pages render every item through the shared
+item_card.html component. Whatever a card shows beyond the plain fields is
+computed here once per item before rendering, so the template only reads
+attributes: the item URLs, the truncated description and the image URLs,
+resolved for the whole page in one cache round-trip by prefetch_item_urls.
+"""
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.text import Truncator
+from .caching import attach_card_versions
+from .media_urls import prefetch_item_urls
+from .templatetags.item_images import thumbnail_url
+
+#Columns the feeds and the detail page load: what a card shows and the
+#posted_at of the page cursor. Anything else read in a template would be
+#one more query per item.
+CARD_FIELDS = ('id', 'title', 'description', 'image', 'thumbnails_ready', 'quantity', 'posted_at')
+
+#Length of the description shown on a card
+SUMMARY_LENGTH = 100
+
+#Card image of items without one
+PLACEHOLDER_IMAGE = 'images/default-placeholder.png'
+
+
+def attach_card_fields(items, owned=False):
+    """
+    Store the values item_card.html shows on each item: detail_url,
+    inquire_url, summary, card_image and card_webp ('' until the thumbnails
+    exist), and edit_url and delete_url on the owner's own cards.
+    """
+    placeholder = None
+    for item in items:
+        item.detail_url = reverse('view_item_detail', args=[item.pk])
+        item.inquire_url = reverse('inquire_item', args=[item.pk])
+        if owned:
+            item.edit_url = reverse('edit_item', args=[item.pk])
+            item.delete_url = reverse('delete_item', args=[item.pk])
+        item.summary = Truncator(item.description).chars(SUMMARY_LENGTH)
+        if item.image:
+            item.card_image = thumbnail_url(item, 'card', 'jpeg')
+            item.card_webp = thumbnail_url(item, 'card', 'webp') if item.thumbnails_ready else ''
+        else:
+            placeholder = placeholder or static(PLACEHOLDER_IMAGE)
+            item.card_image, item.card_webp = placeholder, ''
+    return items
+
+
+def prepare_cards(items, owned=False):
+    """
+    Get a page of items ready for item_card.html: image URLs, card fragment
+    versions and the precomputed card values, with the edit and delete links
+    when the items are the viewer's own.
+    """
+    items = prefetch_item_urls(items)
+    attach_card_versions(items)
+    return attach_card_fields(items, owned)
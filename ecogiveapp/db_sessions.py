@@ -0,0 +1,17 @@
+"""
+Session engine: database sessions with batched garbage collection
+(SESSION_ENGINE = 'ecogiveapp.db_sessions'), used when the cache is per
+process and ecogiveapp.sessions would serve sessions other workers ended.
+"""
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from .sessions import clear_expired_in_batches
+
+
+class SessionStore(DBStore):
+    """
+    Database session store with batched garbage collection.
+    """
+    @classmethod
+    def clear_expired(cls):
+        """Delete the expired sessions, SESSION_GC_BATCH_SIZE rows at a time."""
+        return clear_expired_in_batches(cls.get_model_class())
@@ -0,0 +1,197 @@
+"""
+Direct-to-storage uploads of item images.
+The browser asks presign_upload for an upload target, sends the photo straight
+to the storage (a presigned S3 POST) and then submits add_item/edit_item with
+only the object key, so no Django worker carries the image bytes. The key is
+checked to belong to the user and the stored object is checked for size and
+content type, sniffed from its bytes with Pillow, before an item may use it.
+The presigner is chosen with the DIRECT_UPLOAD_BACKEND setting: S3Presigner
+for S3Boto3Storage, LocalPresigner (with the local_upload view) as a stand-in
+for local development and tests that honours the same contract.
+"""
+import mimetypes
+import time
+import uuid
+from PIL import Image, UnidentifiedImageError
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from .models import Item
+
+#Objects uploaded directly are stored below this directory, one folder per user
+DIRECT_UPLOAD_DIRECTORY = 'images/direct'
+
+#Salt of the local stand-in's upload policies
+POLICY_SALT = 'ecogiveapp.direct_uploads.policy'
+
+
+class UploadError(ValueError):
+    """
+    An upload request or uploaded object that cannot be accepted.
+    """
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def allowed_content_types():
+    """
+    Return {content type: file extension} of the images users may upload.
+    """
+    return _setting('DIRECT_UPLOAD_CONTENT_TYPES', {
+        'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'})
+
+
+def max_upload_bytes():
+    """Largest accepted image in bytes."""
+    return _setting('DIRECT_UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+
+
+def user_prefix(user):
+    """
+    Return the key prefix of a user's direct uploads.
+    """
+    return f'{DIRECT_UPLOAD_DIRECTORY}/{user.pk}/'
+
+
+def new_key(user, content_type):
+    """
+    Return a fresh object key for an upload of the given content type.
+    """
+    extension = allowed_content_types().get(content_type)
+    if extension is None:
+        raise UploadError(f'Unsupported image type {content_type!r}.')
+    return f'{user_prefix(user)}{uuid.uuid4().hex}{extension}'
+
+
+class Presigner:
+    """
+    Issues upload targets and inspects uploaded objects. presign returns
+    {'method': 'POST', 'url': ..., 'fields': {...}, 'key': ...}; the browser
+    posts the fields plus the file (as the last field, named "file") to url.
+    """
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def expires_in(self):
+        """Seconds an upload target stays valid."""
+        return _setting('DIRECT_UPLOAD_EXPIRY_SECONDS', 600)
+
+    def presign(self, key, content_type):
+        """Return the upload target for key."""
+        raise NotImplementedError
+
+    def stat(self, key):
+        """Return (size in bytes, content type) of an uploaded object."""
+        raise NotImplementedError
+
+
+class S3Presigner(Presigner):
+    """
+    Presigned S3 POST. The policy pins the key, the content type and the size
+    range, so S3 itself refuses anything else.
+    """
+    def _object_key(self, key):
+        #_normalize_name prefixes AWS_LOCATION like every other storage call
+        return self.storage._normalize_name(key)  #pylint: disable=protected-access
+
+    def presign(self, key, content_type):
+        client = self.storage.bucket.meta.client
+        target = client.generate_presigned_post(
+            Bucket=self.storage.bucket_name,
+            Key=self._object_key(key),
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 1, max_upload_bytes()],
+            ],
+            ExpiresIn=self.expires_in,
+        )
+        return {'method': 'POST', 'url': target['url'], 'fields': target['fields'], 'key': key}
+
+    def stat(self, key):
+        head = self.storage.bucket.Object(self._object_key(key))
+        return head.content_length, head.content_type
+
+
+class LocalPresigner(Presigner):
+    """
+    Stand-in for S3 presigned POSTs: the policy is a signed token checked by
+    the local_upload view, which writes the file into the configured storage.
+    """
+    def presign(self, key, content_type):
+        policy = signing.dumps({
+            'key': key, 'type': content_type, 'max': max_upload_bytes(),
+            'exp': int(time.time()) + self.expires_in,
+        }, salt=POLICY_SALT)
+        return {
+            'method': 'POST', 'url': reverse('local_upload'),
+            'fields': {'key': key, 'Content-Type': content_type, 'policy': policy},
+            'key': key,
+        }
+
+    def stat(self, key):
+        content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        return self.storage.size(key), content_type
+
+
+def check_policy(token, key, content_type, size):
+    """
+    Validate an upload against a LocalPresigner policy like S3 would.
+    """
+    try:
+        policy = signing.loads(token, salt=POLICY_SALT)
+    except signing.BadSignature as error:
+        raise UploadError('Invalid upload policy.') from error
+    if policy['exp'] < time.time():
+        raise UploadError('The upload policy has expired.')
+    if (policy['key'], policy['type']) != (key, content_type):
+        raise UploadError('The upload does not match its policy.')
+    if not 0 < size <= policy['max']:
+        raise UploadError('The file size is not allowed.')
+
+
+def get_presigner():
+    """
+    Return the presigner of the DIRECT_UPLOAD_BACKEND setting for the image storage.
+    """
+    backend = _setting('DIRECT_UPLOAD_BACKEND', 'ecogiveapp.direct_uploads.LocalPresigner')
+    return import_string(backend)(Item.image_storage())
+
+
+def sniff_content_type(storage, key):
+    """
+    Return the content type of a stored image read from its bytes, whatever
+    its name or declared type says; raises UploadError for anything else.
+    """
+    try:
+        with storage.open(key, 'rb') as stored, Image.open(stored) as image:
+            image.verify()  #reads the whole file, truncated or corrupt images fail
+            return Image.MIME.get(image.format, 'application/octet-stream')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as error:
+        raise UploadError('The upload is not a valid image.') from error
+
+
+def verify_upload(key, user):
+    """
+    Check that key is an object the user uploaded directly and that it is an
+    image of an allowed type and size whose bytes match that type.
+    Returns the key; raises UploadError.
+    """
+    if not key.startswith(user_prefix(user)) or '..' in key:
+        raise UploadError('Unknown upload.')
+    storage = Item.image_storage()
+    if not storage.exists(key):
+        raise UploadError('The upload has not finished.')
+    size, content_type = get_presigner().stat(key)
+    if content_type not in allowed_content_types():
+        raise UploadError(f'Unsupported image type {content_type!r}.')
+    if not 0 < size <= max_upload_bytes():
+        raise UploadError('The image is too large.')
+    #The name (LocalPresigner) and the declared type (S3) are chosen by the client
+    if sniff_content_type(storage, key) != content_type:
+        raise UploadError('The upload is not a valid image.')
+    return key
@@ -0,0 +1,146 @@
+"""
+Inquiries from visitors to item owners.
+Every inquiry is stored. By default the owner is emailed right away through
+the outbox; owners who opt into the digest get the pending inquiries of all
+their items in one email per INQUIRY_DIGEST_WINDOW_SECONDS, grouped per
+item. The send_inquiry_digests command queues each digest in the outbox
+and marks its inquiries in one transaction per owner, so the outbox worker
+delivers them with its retries, backoff and dead-lettering and a refused
+address only holds up its own digest.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from .models import Inquiry, InquiryPreference
+from .outbox import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def inquiry_email(item, email, message):
+    """
+    Return the enqueue_email arguments of an inquiry to the item owner.
+    """
+    #Prepare the email message content
+    inquiry_message = f"""
+        You have a new inquiry as below:
+
+        Message:
+        {message}
+        """
+    return {
+        'subject': f'Inquiry about {item.title}',
+        'body': inquiry_message,
+        'to': [item.owner.email],  #Send to item owner
+        'reply_to': [email],  #Set reply-to to the user's email
+    }
+
+
+def wants_digest(owner):
+    """
+    True when the owner opted into inquiry digests. Select
+    owner__inquiry_preference with the item to avoid a query.
+    """
+    try:
+        return owner.inquiry_preference.digest
+    except InquiryPreference.DoesNotExist:
+        return False
+
+
+def set_digest(owner, digest):
+    """
+    Store whether the owner gets inquiries as a digest.
+    """
+    InquiryPreference.objects.update_or_create(owner=owner, defaults={'digest': digest})
+
+
+def record_inquiry(item, email, message):
+    """
+    Store an inquiry and, unless the owner takes digests, queue its email.
+    item.owner must be loaded.
+    """
+    digest = wants_digest(item.owner)
+    with transaction.atomic():
+        inquiry = Inquiry.objects.create(
+            item=item, owner=item.owner, email=email, message=message,
+            notified_at=None if digest else timezone.now())
+        if not digest:
+            enqueue_email(**inquiry_email(item, email, message))
+    return inquiry
+
+
+async def arecord_inquiry(item, email, message):
+    """
+    Async version of record_inquiry for async views.
+    """
+    return await sync_to_async(record_inquiry)(item, email, message)
+
+
+def due_owners(now=None, limit=None):
+    """
+    Return the ids of the owners whose oldest pending inquiry is older than
+    the digest window.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=_setting('INQUIRY_DIGEST_WINDOW_SECONDS', 3600))
+    owners = (Inquiry.objects.filter(notified_at__isnull=True)
+              .values('owner').annotate(oldest=Min('created_at'))
+              .filter(oldest__lte=cutoff).order_by('oldest').values_list('owner', flat=True))
+    return list(owners[:limit or _setting('INQUIRY_DIGEST_BATCH_SIZE', 100)])
+
+
+def digest_email(owner, inquiries):
+    """
+    Return the enqueue_email arguments of one owner's digest, grouped per item.
+    """
+    per_item = defaultdict(list)
+    for inquiry in inquiries:
+        per_item[inquiry.item].append(inquiry)
+
+    sections = []
+    for item, item_inquiries in per_item.items():
+        lines = [f'{item.title} ({len(item_inquiries)} new)']
+        for inquiry in item_inquiries:
+            lines.append(f'  From {inquiry.email} on {inquiry.created_at:%Y-%m-%d %H:%M}:')
+            lines.append(f'  {inquiry.message}')
+        sections.append('\n'.join(lines))
+    body = ('You have new inquiries about your items on EcoGive. '
+            'Reply to the addresses below to answer them.\n\n' + '\n\n'.join(sections))
+    count = len(inquiries)
+    subject = f"{count} new {'inquiry' if count == 1 else 'inquiries'} about your items"
+    return {'subject': subject, 'body': body, 'to': [owner.email]}
+
+
+def queue_digests(now=None):
+    """
+    Queue one digest for every due owner and return the queued owner and
+    inquiry counts. Run one digest worker at a time.
+    """
+    now = now or timezone.now()
+    owner_ids = due_owners(now)
+    if not owner_ids:
+        return {'owners': 0, 'inquiries': 0}
+
+    pending = (Inquiry.objects.filter(owner_id__in=owner_ids, notified_at__isnull=True,
+                                      created_at__lte=now)
+               .select_related('item', 'owner').order_by('owner_id', 'item_id', 'created_at'))
+    per_owner = defaultdict(list)
+    for inquiry in pending:
+        per_owner[inquiry.owner].append(inquiry)
+
+    for owner, inquiries in per_owner.items():
+        #The digest is queued exactly when its inquiries are marked
+        with transaction.atomic():
+            enqueue_email(**digest_email(owner, inquiries))
+            Inquiry.objects.filter(id__in=[inquiry.id for inquiry in inquiries]).update(
+                notified_at=now)
+    return {'owners': len(per_owner), 'inquiries': sum(map(len, per_owner.values()))}
@@ -0,0 +1,243 @@
+"""
+Per-request performance instrumentation.
+PerformanceMiddleware (enabled with the PERF_INSTRUMENTATION setting) times
+every request routed to an ecogiveapp view: database queries through an
+execute wrapper installed on every connection as it is opened, in whatever
+thread (the async views query in sync_to_async threads), template rendering through
+InstrumentedDjangoTemplates, and storage and email work through span().
+The numbers are sent back in a Server-Timing header and kept in a rolling
+in-process histogram per route, together with repeated-query (N+1) patterns,
+for the staff-only performance_report view.
+"""
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+#Metrics of the request being handled by the current thread or task
+_current = ContextVar('ecogive_request_metrics', default=None)
+
+#Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape so repeated lookups with different
+    parameters compare equal, e.g. IN (%s, %s, %s) -> IN (...).
+    """
+    return _LITERAL_RE.sub('?', _IN_LIST_RE.sub('IN (...)', sql))
+
+
+class RequestMetrics:
+    """
+    Timings collected while one request is handled.
+    """
+    def __init__(self):
+        self.spans = {}
+        self.queries = []
+
+    def add(self, name, elapsed_ms):
+        """Accumulate a timed span."""
+        count, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (count + 1, total + elapsed_ms)
+
+    def add_query(self, sql, elapsed_ms):
+        """Record one executed statement."""
+        self.queries.append((normalize_sql(sql), elapsed_ms))
+        self.add('db', elapsed_ms)
+
+    def repeated_queries(self, threshold):
+        """Return {sql: count} for statements run at least threshold times."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block of work under `name` for the current request, if instrumented.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, (time.perf_counter() - start) * 1000)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper that times every statement for the request of the
+    current context; sync_to_async copies the context into its threads.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, (time.perf_counter() - start) * 1000)
+
+
+def instrument_connection(connection, **kwargs):  #pylint: disable=unused-argument
+    """
+    Install record_query on a connection once; connection_created receiver.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class _TimedTemplate:
+    """
+    Wraps a backend template so that render() is reported as the 'template' span.
+    """
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        """Render the wrapped template inside a span."""
+        with span('template'):
+            return self.template.render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend that times top-level template rendering.
+    """
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+class PerformanceStore:
+    """
+    Thread-safe rolling latency history and N+1 findings per route.
+    """
+    def __init__(self, history_size=500):
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._repeated = {}
+
+    def record(self, route, total_ms, repeated):
+        """Add one request of `route` and its repeated-query patterns."""
+        with self._lock:
+            self._latencies.setdefault(route, deque(maxlen=self.history_size)).append(total_ms)
+            for sql, count in repeated.items():
+                seen, worst = self._repeated.get((route, sql), (0, 0))
+                self._repeated[(route, sql)] = (seen + 1, max(worst, count))
+
+    def clear(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._latencies.clear()
+            self._repeated.clear()
+
+    @staticmethod
+    def _histogram(samples):
+        buckets = Counter()
+        for sample in samples:
+            bound = next((b for b in BUCKETS_MS if sample <= b), None)
+            buckets[f'<={bound}ms' if bound else f'>{BUCKETS_MS[-1]}ms'] += 1
+        return dict(buckets)
+
+    @staticmethod
+    def _percentile(ordered, pct):
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    def report(self, limit=10):
+        """
+        Return the slowest routes by p95 latency and the N+1 patterns found.
+        """
+        with self._lock:
+            latencies = {route: list(samples) for route, samples in self._latencies.items()}
+            repeated = dict(self._repeated)
+
+        routes = []
+        for route, samples in latencies.items():
+            ordered = sorted(samples)
+            routes.append({
+                'route': route,
+                'requests': len(ordered),
+                'p50_ms': round(self._percentile(ordered, 50), 3),
+                'p95_ms': round(self._percentile(ordered, 95), 3),
+                'p99_ms': round(self._percentile(ordered, 99), 3),
+                'max_ms': round(ordered[-1], 3),
+                'histogram': self._histogram(ordered),
+            })
+        routes.sort(key=lambda row: row['p95_ms'], reverse=True)
+
+        patterns = [
+            {'route': route, 'sql': sql, 'requests': seen, 'max_repeats': worst}
+            for (route, sql), (seen, worst) in repeated.items()
+        ]
+        patterns.sort(key=lambda row: (row['max_repeats'], row['requests']), reverse=True)
+        return {'slowest_routes': routes[:limit], 'n_plus_one': patterns}
+
+
+store = PerformanceStore(getattr(settings, 'PERF_HISTORY_SIZE', 500))
+
+
+def server_timing(metrics, total_ms):
+    """
+    Format the metrics as a Server-Timing header value.
+    """
+    entries = []
+    for name, (count, elapsed) in metrics.spans.items():
+        unit = 'queries' if name == 'db' else 'calls'
+        entries.append(f'{name};dur={elapsed:.2f};desc="{count} {unit}"')
+    entries.append(f'total;dur={total_ms:.2f}')
+    return ', '.join(entries)
+
+
+class PerformanceMiddleware:
+    """
+    Instrument requests handled by the ecogiveapp views. Put it first in
+    MIDDLEWARE so the session and auth queries are counted too.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'PERF_NPLUSONE_THRESHOLD', 5)
+        #Connections opened from now on, in any thread
+        connection_created.connect(instrument_connection, dispatch_uid='ecogiveapp_perf_queries')
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            #Connections of this thread opened before the middleware was loaded
+            for connection in connections.all(initialized_only=True):
+                instrument_connection(connection)
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = request.resolver_match
+        if match is not None and match.func.__module__.startswith('ecogiveapp.'):
+            response['Server-Timing'] = server_timing(metrics, total_ms)
+            store.record(match.view_name, total_ms, metrics.repeated_queries(self.threshold))
+        return response
@@ -0,0 +1,41 @@
+"""
+Management command that measures the render time of the item cards.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from ecogiveapp import benchmark
+
+class Command(BaseCommand):
+    """
+    Prepare and render the shared item card for feeds of 1k, 10k and 50k
+    items (or --count) and report the time per card, optionally failing when
+    rendering a card takes longer than --budget-us.
+    """
+    help = 'Report the render time per item card for large feeds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, action='append',
+                            help='Number of cards to render, can be repeated '
+                                 '(default: 1000, 10000 and 50000).')
+        parser.add_argument('--budget-us', type=float, default=None,
+                            help='Fail when preparing and rendering a card takes longer.')
+
+    def handle(self, *args, **options):
+        with benchmark.benchmark_environment():
+            results = benchmark.compare_card_counts(options['count'] or benchmark.CARD_COUNTS)
+
+        header = (f"{'cards':>8}{'prepare ms':>12}{'render ms':>12}"
+                  f"{'prepare us/card':>17}{'render us/card':>16}{'bytes/card':>12}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for count, row in results.items():
+            self.stdout.write(
+                f"{count:>8}{row['prepare_ms']:>12.1f}{row['render_ms']:>12.1f}"
+                f"{row['prepare_us_per_card']:>17.2f}{row['render_us_per_card']:>16.2f}"
+                f"{row['bytes_per_card']:>12}")
+
+        budget = options['budget_us']
+        if budget is not None:
+            over = [count for count, row in results.items()
+                    if row['prepare_us_per_card'] + row['render_us_per_card'] > budget]
+            if over:
+                raise CommandError(f'Cards over the {budget} us budget for {over} items.')
@@ -0,0 +1,56 @@
+"""
+Management command that benchmarks every route of EcoGive/urls.py.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from ecogiveapp import benchmark
+from ecogiveapp.thumbnails import wait_for_pending
+
+class Command(BaseCommand):
+    """
+    Seed a throwaway test database with users and items, drive every route
+    through the test client and report p50/p95/p99 latency, query count and
+    bytes rendered. With --baseline the run fails when a route regressed.
+    """
+    help = 'Benchmark every URL route against seeded data.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--baseline', help='JSON baseline to compare against.')
+        parser.add_argument('--save-baseline', help='Write the results as a JSON baseline.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p95 slowdown before a route counts as regressed.')
+
+    def handle(self, *args, **options):
+        results = self._run(options)
+        self._print(results)
+
+        if options['save_baseline']:
+            benchmark.save_baseline(options['save_baseline'], results)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+
+        if options['baseline']:
+            regressions = benchmark.compare(
+                results, benchmark.load_baseline(options['baseline']), options['threshold'])
+            if regressions:
+                raise CommandError('Regressed routes:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No route regressed against the baseline.'))
+
+    def _run(self, options):
+        #Never touch the real database or bucket: use a test database and local media
+        with benchmark.benchmark_environment():
+            benchmark.seed(users=options['users'], items=options['items'])
+            results = benchmark.run_routes(iterations=options['iterations'])
+            wait_for_pending()
+        return results
+
+    def _print(self, results):
+        header = (f"{'route':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+                  f"{'queries':>9}{'bytes':>9}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, row in results.items():
+            self.stdout.write(
+                f"{label:<22}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['queries']:>9}{row['bytes']:>9}")
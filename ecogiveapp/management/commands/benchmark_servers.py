@@ -0,0 +1,36 @@
+"""
+Management command that compares the WSGI and ASGI request paths.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp import benchmark
+
+class Command(BaseCommand):
+    """
+    Seed a throwaway test database, serve the public pages through Django's
+    WSGI handler (thread pool) and ASGI handler (event loop), with the sync
+    and the async views, and report requests per second and peak memory.
+    """
+    help = 'Compare throughput and memory of the WSGI and ASGI handlers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=100,
+                            help='Requests in flight at once (WSGI threads / ASGI tasks).')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--mode', action='append', choices=list(benchmark.SERVER_MODES),
+                            help='Only measure this setup, can be repeated.')
+
+    def handle(self, *args, **options):
+        with benchmark.benchmark_environment():
+            benchmark.seed(users=options['users'], items=options['items'])
+            results = benchmark.compare_servers(
+                options['concurrency'], options['requests'], options['mode'])
+
+        header = f"{'mode':<20}{'req/s':>10}{'peak MiB':>10}  status"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for mode, row in results.items():
+            self.stdout.write(
+                f"{mode:<20}{row['requests_per_second']:>10.1f}{row['peak_memory_mib']:>10.2f}"
+                f"  {','.join(map(str, row['status']))}")
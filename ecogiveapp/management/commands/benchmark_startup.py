@@ -0,0 +1,39 @@
+"""
+Management command that measures the cold start of every route.
+"""
+import os
+import tempfile
+from django.core.management.base import BaseCommand
+from ecogiveapp import benchmark
+
+class Command(BaseCommand):
+    """
+    Seed a throwaway SQLite database file, then load the application in a
+    fresh interpreter per route, without and with the warm-up, and report
+    the load time (imports included) and the first and second request latency.
+    """
+    help = 'Report import time and first-request latency per route, cold and warmed up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--route', action='append',
+                            help='Only probe the route with this label, can be repeated.')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory(prefix='ecogive-startup-') as directory:
+            database = os.path.join(directory, 'bench.sqlite3')
+            with benchmark.benchmark_environment(database_file=database) as roots:
+                benchmark.seed(users=options['users'], items=options['items'])
+                results = benchmark.measure_startup(roots, options['route'])
+
+        header = (f"{'route':<22}{'load ms':>9}{'warm load':>11}"
+                  f"{'first ms':>10}{'warm first':>12}{'steady ms':>11}  status")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for label, row in results.items():
+            cold, warm = row['cold'], row['warm']
+            self.stdout.write(
+                f"{label:<22}{cold['startup_ms']:>9.1f}{warm['startup_ms']:>11.1f}"
+                f"{cold['first_ms']:>10.1f}{warm['first_ms']:>12.1f}{warm['second_ms']:>11.1f}"
+                f"  {','.join(map(str, sorted(set(cold['status'] + warm['status']))))}")
@@ -0,0 +1,31 @@
+"""
+Management command to export every item as CSV or JSON Lines.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp.transfer import FORMATS, detect_format, export_rows, write_rows
+
+class Command(BaseCommand):
+    """
+    Stream the Item table to a file or stdout in the import_items format.
+    """
+    help = 'Export items to CSV or JSONL (readable by import_items).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None,
+                            help='File to write (default: stdout).')
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='File format (default: from the file extension, CSV on stdout).')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or (detect_format(output) if output else 'csv')
+        rows = export_rows(chunk_size=options['chunk_size'])
+        if output is None:
+            self.stdout.ending = ''  #the rows carry their own line endings
+            write_rows(rows, self.stdout, fmt)
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            count = write_rows(rows, stream, fmt)
+        self.stdout.write(self.style.SUCCESS(f'Exported {count} items to {output}.'))
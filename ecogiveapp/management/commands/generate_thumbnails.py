@@ -0,0 +1,32 @@
+"""
+Management command to (re)generate item thumbnails, e.g. for items that were
+created before the thumbnail pipeline existed.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp.models import Item
+from ecogiveapp.thumbnails import generate_thumbnails
+
+class Command(BaseCommand):
+    """
+    Generate the thumbnails of every item that has an image but no thumbnails yet.
+    """
+    help = 'Generate missing item thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Regenerate the thumbnails of every item, not only the missing ones.')
+
+    def handle(self, *args, **options):
+        items = Item.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            items = items.filter(thumbnails_ready=False)
+
+        done = failed = 0
+        for item_id in items.values_list('id', flat=True).iterator():
+            if generate_thumbnails(item_id):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated thumbnails for {done} items ({failed} failed).'))
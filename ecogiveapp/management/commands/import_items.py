@@ -0,0 +1,50 @@
+"""
+Management command to bulk import items from a CSV or JSON Lines file.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from ecogiveapp.transfer import FORMATS, detect_format, import_items
+
+class Command(BaseCommand):
+    """
+    Stream an import file into the Item table in fixed-size chunks.
+    """
+    help = ('Import items from CSV or JSONL with the columns owner (username), title, '
+            'description, quantity, image and posted_at.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=FORMATS, default=None,
+                            help='File format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows created per bulk_create.')
+        parser.add_argument('--image-root', default=None,
+                            help='Directory of the image files named in the image column. '
+                                 'Without it the column holds names already in storage.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Concurrent image uploads.')
+        parser.add_argument('--checkpoint', default=None,
+                            help='Progress file; an existing one resumes the import.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        fmt = options['format'] or detect_format(options['path'])
+        created = failed = 0
+        try:
+            with open(options['path'], encoding='utf-8', newline='') as stream:
+                progress = import_items(
+                    stream, fmt, batch_size=options['batch_size'],
+                    image_root=options['image_root'], workers=options['workers'],
+                    checkpoint=options['checkpoint'])
+                for done, chunk_created, errors in progress:
+                    created += chunk_created
+                    failed += len(errors)
+                    for row, message in errors:
+                        self.stderr.write(f'Row {row}: {message}')
+                    self.stdout.write(f'{done} rows processed.')
+        except OSError as error:
+            raise CommandError(error) from error
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} items ({failed} rows skipped). '
+            'Run generate_thumbnails to create their thumbnails.'))
@@ -0,0 +1,27 @@
+"""
+Management command that runs the local SMTP stand-in for offline development.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp.smtp_standin import LocalSMTPServer
+
+class Command(BaseCommand):
+    """
+    Run LocalSMTPServer in the foreground. Point EMAIL_HOST/EMAIL_PORT at it
+    and set EMAIL_USE_TLS to False.
+    """
+    help = 'Run a local SMTP server that stores emails in memory or in a directory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--output-dir', default=None,
+                            help='Directory where every received email is written as .eml.')
+
+    def handle(self, *args, **options):
+        server = LocalSMTPServer(port=options['port'], output_dir=options['output_dir'])
+        self.stdout.write(f'Local SMTP server listening on {server.host}:{server.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,32 @@
+"""
+Management command that runs the storage garbage collection worker.
+"""
+import time
+from django.core.management.base import BaseCommand
+from ecogiveapp.storage_gc import purge_pending
+
+class Command(BaseCommand):
+    """
+    Delete tombstoned storage objects once, or keep polling with --loop.
+    """
+    help = 'Delete the storage objects listed in PendingDeletion.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Objects deleted per batch (default STORAGE_GC_BATCH_SIZE).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll for tombstones.')
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help='Seconds to sleep when nothing is pending (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = purge_pending(batch_size=options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Deleted {counts['deleted']}, kept {counts['kept']} referenced, "
+                    f"{counts['failed']} failed.")
+            if not options['loop']:
+                break
+            if not any(counts.values()):
+                time.sleep(options['interval'])
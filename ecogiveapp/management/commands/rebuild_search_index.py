@@ -0,0 +1,18 @@
+"""
+Management command to rebuild the item full-text search index from scratch.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp.search import get_search_backend
+
+class Command(BaseCommand):
+    """
+    Rebuild the index of the configured search backend, e.g. after a bulk
+    import that bypassed it or after restoring a database backup.
+    """
+    help = 'Rebuild the item full-text search index.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {type(backend).__name__} index for {count} items.'))
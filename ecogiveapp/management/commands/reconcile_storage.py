@@ -0,0 +1,45 @@
+"""
+Management command that finds storage objects no item references.
+"""
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from ecogiveapp.models import Item, PendingDeletion
+from ecogiveapp.storage_gc import find_orphans
+
+class Command(BaseCommand):
+    """
+    List orphaned media objects under the storage location (AWS_LOCATION on S3)
+    and optionally hand them to the purge_storage worker.
+    """
+    help = 'Find media objects that no item references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='',
+                            help='Only look below this path of the storage location.')
+        parser.add_argument('--min-age', type=int, default=60,
+                            help='Ignore objects younger than this many minutes '
+                                 '(uploads whose item is not saved yet).')
+        parser.add_argument('--delete', action='store_true',
+                            help='Tombstone the orphans for purge_storage '
+                                 'instead of only listing them.')
+
+    def handle(self, *args, **options):
+        storage = Item.image_storage()
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+        orphans = []
+        for name in find_orphans(options['prefix']):
+            if options['min_age'] and storage.get_modified_time(name) > cutoff:
+                continue
+            orphans.append(name)
+            self.stdout.write(name)
+
+        if options['delete'] and orphans:
+            with transaction.atomic():
+                PendingDeletion.objects.bulk_create(
+                    [PendingDeletion(name=name, source=name) for name in orphans], batch_size=500)
+            self.stdout.write(self.style.SUCCESS(
+                f'Scheduled {len(orphans)} orphaned objects for deletion.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Found {len(orphans)} orphaned objects.'))
@@ -0,0 +1,32 @@
+"""
+Management command that queues the inquiry digests in the outbox.
+"""
+import time
+from django.core.management.base import BaseCommand
+from ecogiveapp.inquiries import queue_digests
+
+class Command(BaseCommand):
+    """
+    Queue a digest for every owner who opted into digests and whose oldest
+    pending inquiry is older than INQUIRY_DIGEST_WINDOW_SECONDS, once or with
+    --loop. send_queued_email delivers them.
+    """
+    help = 'Queue the inquiry digests that are due.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and queue digests as they become due.')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds to sleep when no digest is due (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = queue_digests()
+            if counts['owners']:
+                self.stdout.write(
+                    f"Queued {counts['owners']} digests with {counts['inquiries']} inquiries.")
+            if not options['loop']:
+                break
+            #Go straight to the next batch while owners are due, sleep otherwise
+            if not counts['owners']:
+                time.sleep(options['interval'])
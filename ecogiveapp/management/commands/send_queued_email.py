@@ -0,0 +1,33 @@
+"""
+Management command that runs the outbound email worker.
+"""
+import time
+from django.core.management.base import BaseCommand
+from ecogiveapp.outbox import drain_outbox
+
+class Command(BaseCommand):
+    """
+    Drain the outbox once, or keep polling it with --loop.
+    """
+    help = 'Send queued outbound emails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Emails claimed per batch (default OUTBOX_BATCH_SIZE).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and poll the outbox.')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty (with --loop).')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = drain_outbox(batch_size=options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retried']}, "
+                    f"dead-lettered {counts['dead']}.")
+            if not options['loop']:
+                break
+            #Go straight to the next batch while there is work, sleep otherwise
+            if not any(counts.values()):
+                time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+"""
+Management command for periodic SQLite maintenance, e.g. from cron.
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from ecogiveapp.sqlite import checkpoint, optimize
+
+class Command(BaseCommand):
+    """
+    Checkpoint the WAL and refresh the query planner statistics.
+    """
+    help = 'Run PRAGMA wal_checkpoint and PRAGMA optimize on an SQLite database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Database alias (default: "default").')
+        parser.add_argument('--mode', default='TRUNCATE',
+                            choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+                            help='wal_checkpoint mode.')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running and repeat every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=300.0,
+                            help='Seconds between runs (with --loop).')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database {options['database']} is not SQLite.")
+        while True:
+            busy, wal_pages, moved = checkpoint(connection, options['mode'])
+            optimize(connection)
+            self.stdout.write(
+                f'Checkpointed {moved} of {wal_pages} WAL pages'
+                f"{' (blocked by a reader)' if busy else ''}, statistics optimized.")
+            if not options['loop']:
+                break
+            connection.close_if_unusable_or_obsolete()
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+"""
+Management command that stores a local copy of Bootstrap.
+"""
+import base64
+import hashlib
+import os
+from urllib.request import urlopen
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ecogiveapp.templatetags.assets import (
+    BOOTSTRAP_CDN, BOOTSTRAP_CSS, BOOTSTRAP_JS, BOOTSTRAP_JS_INTEGRITY, vendored_name)
+
+def integrity(content):
+    """
+    Return the sha384 subresource integrity value of the content.
+    """
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode()
+
+class Command(BaseCommand):
+    """
+    Download the Bootstrap CSS and JS bundle into ecogiveapp/static/vendor so
+    they can be served fingerprinted with BOOTSTRAP_VENDORED on. The bundle is
+    checked against the integrity hash base.html has always used.
+    """
+    help = 'Download Bootstrap into the static files (use with BOOTSTRAP_VENDORED).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', default=str(settings.STATICFILES_DIRS[0]),
+                            help='Static files directory to write into.')
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Seconds to wait for the CDN.')
+
+    def handle(self, *args, **options):
+        for name in (BOOTSTRAP_CSS, BOOTSTRAP_JS):
+            with urlopen(BOOTSTRAP_CDN + name, timeout=options['timeout']) as response:
+                content = response.read()
+            if name == BOOTSTRAP_JS and integrity(content) != BOOTSTRAP_JS_INTEGRITY:
+                raise CommandError(f'{name} does not match its integrity hash, not stored.')
+            path = os.path.join(options['target'], vendored_name(name))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as target:
+                target.write(content)
+            self.stdout.write(f'Stored {path} ({integrity(content)}).')
+        self.stdout.write(self.style.SUCCESS(
+            'Run collectstatic and set DJANGO_BOOTSTRAP_VENDORED=true to serve them.'))
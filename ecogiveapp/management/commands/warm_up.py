@@ -0,0 +1,18 @@
+"""
+Management command that runs the worker warm-up steps.
+"""
+from django.core.management.base import BaseCommand
+from ecogiveapp.warmup import warm_up
+
+class Command(BaseCommand):
+    """
+    Run the steps EcoGive/wsgi.py and asgi.py run at startup and report how
+    long each took, e.g. to check a deploy before it takes traffic.
+    """
+    help = 'Run the worker warm-up steps and report their timings.'
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        for step, elapsed in timings.items():
+            self.stdout.write(f'{step:<22}{elapsed:>10.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Warmed up in {sum(timings.values()):.1f} ms.'))
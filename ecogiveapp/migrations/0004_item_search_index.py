@@ -0,0 +1,42 @@
+# Full-text search index for Item, see ecogiveapp/search.py
+"""
+FTS5 index of the item titles and descriptions, see ecogiveapp/search.py.
+"""
+
+from django.db import migrations
+from ecogiveapp.search import SQLiteFTS5Backend
+
+#External-content FTS5 table over ecogiveapp_item plus the triggers that keep it
+#in sync, the statements the search backend reinstalls after every migrate
+FTS_STATEMENTS = SQLiteFTS5Backend.install_statements + [
+    "INSERT INTO ecogiveapp_item_fts(ecogiveapp_item_fts) VALUES ('rebuild')",
+]
+
+DROP_STATEMENTS = [
+    'DROP TRIGGER IF EXISTS ecogiveapp_item_fts_update',
+    'DROP TRIGGER IF EXISTS ecogiveapp_item_fts_delete',
+    'DROP TRIGGER IF EXISTS ecogiveapp_item_fts_insert',
+    'DROP TABLE IF EXISTS ecogiveapp_item_fts',
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):  #pylint: disable=unused-argument
+        #Only SQLite has FTS5, other databases use their own search backend
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Create the FTS5 table and its sync triggers on SQLite."""
+
+    dependencies = [
+        ('ecogiveapp', '0003_alter_item_quantity'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FTS_STATEMENTS), _run(DROP_STATEMENTS)),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:04
+"""
+Item.thumbnails_ready, set by the thumbnail worker.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add Item.thumbnails_ready."""
+
+    dependencies = [
+        ('ecogiveapp', '0004_item_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
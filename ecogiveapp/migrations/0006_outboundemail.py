@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:06
+"""
+OutboundEmail, the persistent email queue of ecogiveapp/outbox.py.
+"""
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    """Create OutboundEmail."""
+
+    dependencies = [
+        ('ecogiveapp', '0005_item_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True,
+                                           serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('from_email', models.CharField(blank=True, max_length=254)),
+                ('to', models.JSONField(default=list)),
+                ('reply_to', models.JSONField(default=list)),
+                ('status', models.CharField(
+                    choices=[('pending', 'Pending'), ('sent', 'Sent'), ('dead', 'Dead-lettered')],
+                    default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:10
+"""
+Item indexes matching the feed orders and an auth_user email index.
+"""
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Add the feed indexes and drop the redundant owner index."""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ecogiveapp', '0006_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['owner', '-posted_at', '-id'], name='item_owner_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['-posted_at', '-id'], name='item_posted_idx'),
+        ),
+        #The FK index on owner is a prefix of item_owner_posted_idx, drop it once that exists
+        migrations.AlterField(
+            model_name='item',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE,
+                                    to=settings.AUTH_USER_MODEL),
+        ),
+        #RegistrationForm.clean_email looks users up by email on every registration
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS ecogive_auth_user_email_idx ON auth_user (email)',
+            'DROP INDEX IF EXISTS ecogive_auth_user_email_idx',
+        ),
+    ]
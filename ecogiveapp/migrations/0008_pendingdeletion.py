@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:21
+"""
+PendingDeletion, the storage objects waiting for purge_storage.
+"""
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    """Create PendingDeletion."""
+
+    dependencies = [
+        ('ecogiveapp', '0007_item_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True,
+                                           serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('source', models.CharField(max_length=255)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['next_attempt_at'], name='pending_deletion_due_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:23
+"""
+ImageBlob and Item.image_digest, see ecogiveapp/blobs.py.
+"""
+
+import hashlib
+from django.db import migrations, models
+
+#Items hashed per bulk_update
+BATCH_SIZE = 500
+
+
+def backfill_image_digests(apps, schema_editor):
+    """
+    Hash the existing item images and count the items using each stored file.
+    Files are not moved, so duplicates stored before keep their own names.
+    """
+    Item = apps.get_model('ecogiveapp', 'Item')
+    ImageBlob = apps.get_model('ecogiveapp', 'ImageBlob')
+    db = schema_editor.connection.alias
+    items = Item.objects.using(db).exclude(image='').exclude(image__isnull=True).only('id', 'image')
+    blobs, pending = {}, []
+    for item in items.iterator(BATCH_SIZE):
+        hasher = hashlib.sha256()
+        try:
+            with item.image.storage.open(item.image.name, 'rb') as image:
+                for chunk in image.chunks():
+                    hasher.update(chunk)
+        except OSError:
+            continue  #missing file, the item keeps an empty digest
+        item.image_digest = hasher.hexdigest()
+        digest, count = blobs.get(item.image.name, (item.image_digest, 0))
+        blobs[item.image.name] = (digest, count + 1)
+        pending.append(item)
+        if len(pending) >= BATCH_SIZE:
+            Item.objects.using(db).bulk_update(pending, ['image_digest'])
+            pending = []
+    Item.objects.using(db).bulk_update(pending, ['image_digest'])
+    ImageBlob.objects.using(db).bulk_create(
+        [ImageBlob(name=name, digest=digest, refcount=count)
+         for name, (digest, count) in blobs.items()],
+        batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    """Create ImageBlob and backfill the digests of the existing images."""
+
+    dependencies = [
+        ('ecogiveapp', '0008_pendingdeletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True,
+                                           serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='image_digest',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_image_digests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:37
+"""
+Inquiry and InquiryPreference, see ecogiveapp/inquiries.py.
+"""
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    """Create Inquiry and InquiryPreference."""
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ecogiveapp', '0009_image_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InquiryPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True,
+                                           serialize=False, verbose_name='ID')),
+                ('digest', models.BooleanField(default=False)),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE,
+                                               related_name='inquiry_preference',
+                                               to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Inquiry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True,
+                                           serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                           related_name='inquiries', to='ecogiveapp.item')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                            related_name='inquiries',
+                                            to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['notified_at', 'owner', 'created_at'],
+                                 name='inquiry_pending_idx'),
+                ],
+            },
+        ),
+    ]
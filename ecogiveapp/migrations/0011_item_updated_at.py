@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-18 10:46
+"""
+Item.updated_at, the validators of the JSON API.
+"""
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Add Item.updated_at."""
+
+    dependencies = [
+        ('ecogiveapp', '0010_inquiries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -1,15 +1,22 @@
 """
 This module defines the models for the EcoGive application.
 In this model, Item represents an item that users can add, share, or inquire about.
+OutboundEmail is the persistent queue of emails sent by the background worker.
+PendingDeletion lists storage objects waiting to be removed by the purge_storage worker.
+ImageBlob counts the items sharing each content-addressed image.
+Inquiry stores the questions sent to item owners, InquiryPreference whether an
+owner gets them one by one or as a digest.
 """
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 #Item model for the items listed by users on EcoGive
 class Item(models.Model):
     """Foreign key to link an item to its owner (user)
     CASCADE will ensure if a user is deleted, their items are also will be deleted """
-    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    #No separate FK index, owner lookups use the item_owner_posted_idx prefix
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     #Title of the item and character limit with 100
     title = models.CharField(max_length=100)
     #Description of the item
@@ -18,9 +25,123 @@ class Item(models.Model):
     """Image associated with the item.
     Uploads will be stored in the 'images/' directory"""
     image = models.ImageField(upload_to='images/', blank=True, null=True)
+    #SHA-256 of the image content, see ecogiveapp/blobs.py
+    image_digest = models.CharField(max_length=64, blank=True, default='')
+
+    #Set by the thumbnail worker once the derivatives of the image are stored
+    thumbnails_ready = models.BooleanField(default=False)
 
     #Available Quantity for the item; defaults to 1
     quantity = models.PositiveIntegerField(default=1)
 
     #Automatically set to the current date and time when an item is created
     posted_at = models.DateTimeField(auto_now_add=True)
+    #Set on every save (and by the UPDATEs of thumbnails.py and the admin),
+    #the JSON API builds its ETag and Last-Modified from it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        """Indexes match the (posted_at, id) newest-first order of the feeds,
+        including the id tie-breaker, so neither feed needs a sort step."""
+        indexes = [
+            #Dashboard and "My Items": filter(owner=...) newest first
+            models.Index(fields=['owner', '-posted_at', '-id'], name='item_owner_posted_idx'),
+            #Public feed: newest first
+            models.Index(fields=['-posted_at', '-id'], name='item_posted_idx'),
+        ]
+
+    @classmethod
+    def image_storage(cls):
+        """Storage the item images are kept in (S3 in production)"""
+        return cls._meta.get_field('image').storage
+
+#Outbound email waiting to be delivered by the send_queued_email worker
+class OutboundEmail(models.Model):
+    """Persistent outbox entry. Views enqueue with a single INSERT and the
+    worker delivers, retries with backoff and dead-letters failures."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead-lettered'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    #Lists of addresses
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    #Number of delivery attempts made so far and when the next one is due
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        """The worker polls for due pending entries."""
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+#Storage object waiting to be removed by the purge_storage worker
+class PendingDeletion(models.Model):
+    """Tombstone written in the same transaction that stops referencing the
+    object, so a rolled back edit never loses its image."""
+    #Storage name of the object, relative to the storage location (AWS_LOCATION)
+    name = models.CharField(max_length=255)
+    #Item image the object belongs to; it is kept if an item references it again
+    source = models.CharField(max_length=255)
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """The worker polls for due tombstones."""
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='pending_deletion_due_idx'),
+        ]
+
+#Content-addressed image shared by the items that uploaded the same file
+class ImageBlob(models.Model):
+    """One stored image and the number of items using it. Images stored before
+    deduplication keep their own names, so a digest can appear more than once."""
+    #Storage name of the image, the same value as Item.image
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64, db_index=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+#Question a visitor sent to the owner of an item
+class Inquiry(models.Model):
+    """Every inquiry is kept. Owners with the digest preference get the
+    pending ones in one email per window from the send_inquiry_digests command."""
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='inquiries')
+    #Same as item.owner, kept so digests group without a join
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inquiries')
+    email = models.EmailField()
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    #When the owner was emailed: right away, or with the digest
+    notified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        """The digest command looks for pending inquiries per owner."""
+        indexes = [
+            models.Index(fields=['notified_at', 'owner', 'created_at'], name='inquiry_pending_idx'),
+        ]
+
+#How an owner wants to be told about inquiries
+class InquiryPreference(models.Model):
+    """Owners without a row get every inquiry as its own email."""
+    owner = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name='inquiry_preference')
+    digest = models.BooleanField(default=False)
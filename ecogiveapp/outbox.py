@@ -0,0 +1,148 @@
+"""
+Persistent outbound email queue.
+Views call enqueue_email (aenqueue_email in async views), which costs one
+INSERT, and the send_queued_email worker drains the queue over a single
+reused mail connection, retrying failed messages with exponential backoff
+and dead-lettering them after OUTBOX_MAX_ATTEMPTS attempts.
+"""
+import logging
+from datetime import timedelta
+from smtplib import SMTPException, SMTPRecipientsRefused
+from django.conf import settings
+from django.core.mail import BadHeaderError, EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+from .instrumentation import span
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+#Errors that will not go away by retrying
+PERMANENT_ERRORS = (BadHeaderError, SMTPRecipientsRefused, ValueError)
+#Errors worth another attempt later
+TRANSIENT_ERRORS = (SMTPException, OSError)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(subject, body, to, from_email=None, reply_to=None):
+    """
+    Store an email in the outbox and return the OutboundEmail row.
+    """
+    with span('email'):
+        return OutboundEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+            to=list(to),
+            reply_to=list(reply_to or []),
+        )
+
+
+async def aenqueue_email(subject, body, to, from_email=None, reply_to=None):
+    """
+    Async version of enqueue_email for async views.
+    """
+    with span('email'):
+        return await OutboundEmail.objects.acreate(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+            to=list(to),
+            reply_to=list(reply_to or []),
+        )
+
+
+def retry_delay(attempts):
+    """
+    Return how long to wait before the next attempt after `attempts` failures.
+    """
+    base = _setting('OUTBOX_RETRY_BASE_SECONDS', 60)
+    ceiling = _setting('OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def claim_batch(batch_size, now=None):
+    """
+    Return up to batch_size due entries and lease them so that a second worker
+    does not pick them up while they are being sent.
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status=OutboundEmail.STATUS_PENDING, next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboundEmail.objects.filter(id__in=[entry.id for entry in batch]).update(
+            next_attempt_at=now + lease)
+    return batch
+
+
+def _as_message(entry, mail_connection):
+    return EmailMessage(
+        subject=entry.subject,
+        body=entry.body,
+        from_email=entry.from_email or None,
+        to=entry.to,
+        reply_to=entry.reply_to,
+        connection=mail_connection,
+    )
+
+
+def _record_failure(entry, error, now, permanent):
+    entry.attempts += 1
+    entry.last_error = f'{type(error).__name__}: {error}'
+    if permanent or entry.attempts >= _setting('OUTBOX_MAX_ATTEMPTS', 5):
+        entry.status = OutboundEmail.STATUS_DEAD
+        logger.error('Dead-lettered outbound email %s: %s', entry.id, entry.last_error)
+    else:
+        entry.next_attempt_at = now + retry_delay(entry.attempts)
+
+
+def drain_outbox(batch_size=None, mail_connection=None):
+    """
+    Send one batch of due emails and return a dict with the sent, retried
+    and dead-lettered counts.
+    """
+    batch_size = batch_size or _setting('OUTBOX_BATCH_SIZE', 50)
+    batch = claim_batch(batch_size)
+    counts = {'sent': 0, 'retried': 0, 'dead': 0}
+    if not batch:
+        return counts
+
+    mail_connection = mail_connection or get_connection(fail_silently=False)
+    now = timezone.now()
+    mail_connection.open()
+    try:
+        for entry in batch:
+            try:
+                mail_connection.send_messages([_as_message(entry, mail_connection)])
+            except PERMANENT_ERRORS as error:
+                _record_failure(entry, error, now, permanent=True)
+            except TRANSIENT_ERRORS as error:
+                _record_failure(entry, error, now, permanent=False)
+                #The SMTP session may be broken, the next message reconnects
+                mail_connection.close()
+            else:
+                entry.status = OutboundEmail.STATUS_SENT
+                entry.attempts += 1
+                entry.sent_at = now
+                entry.last_error = ''
+    finally:
+        mail_connection.close()
+
+    for entry in batch:
+        if entry.status == OutboundEmail.STATUS_SENT:
+            counts['sent'] += 1
+        elif entry.status == OutboundEmail.STATUS_DEAD:
+            counts['dead'] += 1
+        else:
+            counts['retried'] += 1
+    OutboundEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    return counts
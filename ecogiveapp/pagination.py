@@ -0,0 +1,284 @@
+"""
+Keyset (cursor) pagination for the EcoGive item feeds.
+Pages are ordered newest first on (posted_at, id) and the next/previous
+positions are handed to the browser as opaque signed cursor tokens, so every
+page costs one indexed range query no matter how deep the user has scrolled.
+EstimatedCountPaginator serves the admin, where numbered pages are expected,
+without counting every row of a large table.
+"""
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections, router
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+#Query string parameter that carries the cursor token
+CURSOR_PARAM = 'cursor'
+
+#Salt keeps the cursor tokens separate from other signed values of the site
+CURSOR_SALT = 'ecogiveapp.pagination.cursor'
+
+#Directions stored in a cursor token
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def get_page_size():
+    """
+    Return the configured number of items per feed page.
+    """
+    return getattr(settings, 'ITEMS_PAGE_SIZE', 24)
+
+
+def encode_cursor(posted_at, pk, direction):
+    """
+    Build an opaque, tamper-proof token for the position (posted_at, pk).
+    """
+    return signing.dumps(
+        {'t': posted_at.isoformat(), 'i': pk, 'd': direction},
+        salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """
+    Return (posted_at, pk, direction) for a cursor token, or None if the token
+    is missing, tampered with or malformed.
+    """
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        direction = data['d']
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        return datetime.fromisoformat(data['t']), int(data['i']), direction
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def encode_offset_cursor(offset):
+    """
+    Build an opaque token for a position inside a relevance ranked result list.
+    """
+    return signing.dumps({'o': offset}, salt=CURSOR_SALT)
+
+
+def decode_offset_cursor(token):
+    """
+    Return the offset stored in a ranked cursor token, or 0 when it is invalid.
+    """
+    if not token:
+        return 0
+    try:
+        return max(int(signing.loads(token, salt=CURSOR_SALT)['o']), 0)
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return 0
+
+
+def older_than(queryset, posted_at, pk):
+    """
+    Return the rows of queryset after position (posted_at, pk), newest first.
+    """
+    #posted_at <= t is the indexed range, the OR only breaks ties inside it
+    return queryset.filter(
+        Q(posted_at__lte=posted_at) & (Q(posted_at__lt=posted_at) | Q(id__lt=pk))
+    ).order_by('-posted_at', '-id')
+
+
+class CursorPage:
+    """
+    One page of a keyset paginated feed with links to its neighbours.
+    """
+    def __init__(self, object_list, request, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.request = request
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        """True when there are older items after this page."""
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        """True when there are newer items before this page."""
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        """True when either neighbour exists."""
+        return self.has_next or self.has_previous
+
+    def _query_string(self, cursor):
+        #Keep the other parameters (search query, all=true, ...) on the link
+        params = self.request.GET.copy()
+        params[CURSOR_PARAM] = cursor
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        """Query string for the next (older) page."""
+        return self._query_string(self.next_cursor) if self.has_next else ''
+
+    @property
+    def previous_query(self):
+        """Query string for the previous (newer) page."""
+        return self._query_string(self.previous_cursor) if self.has_previous else ''
+
+
+class KeysetPaginator:
+    """
+    Paginate an Item queryset newest first, seeking on (posted_at, id)
+    instead of using OFFSET so deep pages are as cheap as the first one.
+    """
+    ordering = ('-posted_at', '-id')
+
+    def __init__(self, queryset, page_size=None):
+        self.queryset = queryset
+        self.page_size = page_size or get_page_size()
+
+    @staticmethod
+    def _position(row):
+        return row.posted_at, row.pk
+
+    def _rows_after(self, posted_at, pk):
+        return older_than(self.queryset, posted_at, pk)
+
+    def _rows_before(self, posted_at, pk):
+        return self.queryset.filter(
+            Q(posted_at__gte=posted_at) & (Q(posted_at__gt=posted_at) | Q(id__gt=pk))
+        ).order_by('posted_at', 'id')
+
+    def _window(self, position):
+        #The size + 1 rows to read for a position; the extra row tells whether more exist
+        size = self.page_size
+        if position is None:
+            return self.queryset.order_by(*self.ordering)[:size + 1]
+        posted_at, pk, direction = position
+        if direction == NEXT:
+            return self._rows_after(posted_at, pk)[:size + 1]
+        return self._rows_before(posted_at, pk)[:size + 1]
+
+    def _page(self, rows, request, position):
+        size = self.page_size
+        has_more, rows = len(rows) > size, rows[:size]
+        if position is None:
+            has_newer, has_older = False, has_more
+        elif position[2] == NEXT:
+            has_newer, has_older = True, has_more
+        else:
+            rows.reverse()
+            has_newer, has_older = has_more, True
+
+        next_cursor = previous_cursor = None
+        if rows and has_older:
+            next_cursor = encode_cursor(*self._position(rows[-1]), NEXT)
+        if rows and has_newer:
+            previous_cursor = encode_cursor(*self._position(rows[0]), PREVIOUS)
+        return CursorPage(rows, request, next_cursor, previous_cursor)
+
+    def get_page(self, request):
+        """
+        Return the CursorPage selected by the cursor in the request query string.
+        Invalid cursors fall back to the first page.
+        """
+        position = decode_cursor(request.GET.get(CURSOR_PARAM, ''))
+        return self._page(list(self._window(position)), request, position)
+
+    async def aget_page(self, request):
+        """
+        Async version of get_page for async views, using the async ORM.
+        """
+        position = decode_cursor(request.GET.get(CURSOR_PARAM, ''))
+        rows = [row async for row in self._window(position)]
+        return self._page(rows, request, position)
+
+
+class RankedPaginator:
+    """
+    Paginate a relevance ranked result list such as search results.
+    fetch(offset, limit) returns the rows at that rank window; ranking has to
+    look at every match anyway so the cost follows the number of matches.
+    """
+    def __init__(self, fetch, page_size=None):
+        self.fetch = fetch
+        self.page_size = page_size or get_page_size()
+
+    def _page(self, rows, request, offset):
+        size = self.page_size
+        has_more, rows = len(rows) > size, rows[:size]
+        next_cursor = encode_offset_cursor(offset + size) if has_more else None
+        previous_cursor = encode_offset_cursor(max(offset - size, 0)) if offset else None
+        return CursorPage(rows, request, next_cursor, previous_cursor)
+
+    def get_page(self, request):
+        """
+        Return the CursorPage selected by the cursor in the request query string.
+        """
+        offset = decode_offset_cursor(request.GET.get(CURSOR_PARAM, ''))
+        return self._page(list(self.fetch(offset, self.page_size + 1)), request, offset)
+
+    async def aget_page(self, request):
+        """
+        Async version of get_page; fetch runs in a thread, search backends are synchronous.
+        """
+        offset = decode_offset_cursor(request.GET.get(CURSOR_PARAM, ''))
+        rows = await sync_to_async(lambda: list(self.fetch(offset, self.page_size + 1)))()
+        return self._page(rows, request, offset)
+
+
+def estimated_row_count(model, using=None):
+    """
+    Return the planner's estimate of the number of rows of the model's table,
+    or None when the database keeps no statistics for it. SQLite has them once
+    ANALYZE or PRAGMA optimize ran (see the sqlite_maintenance command).
+    """
+    connection = connections[using or router.db_for_read(model)]
+    table = model._meta.db_table  #pylint: disable=protected-access
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            #The first number of every index entry is the row count of the table
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+            counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+            return max(counts) if counts else None
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for the admin changelists of large tables. An unfiltered
+    changelist takes the row count from the table statistics instead of a
+    COUNT(*) over the whole table once the estimate is above
+    ADMIN_EXACT_COUNT_LIMIT; filtered and small ones are counted exactly.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > getattr(
+                    settings, 'ADMIN_EXACT_COUNT_LIMIT', 10000):
+                return estimate
+        return super().count
@@ -0,0 +1,81 @@
+"""
+Pytest plugin enforcing the per-view query budgets (see query_budgets).
+Enable it with pytest_plugins = ['ecogiveapp.query_budget_plugin'] in the
+top-level conftest.py. It provides two fixtures:
+
+budget_data seeds realistic data: several users, feeds longer than one page,
+items with and without thumbnails, inquiries and a digest preference.
+
+assert_query_budget(route, urlconf=None) runs a benchmark.Route against it
+on a cold start (empty caches, fresh login) and fails with every executed
+statement when the view of the route goes over its @query_budget.
+"""
+import pytest
+
+#Users seeded for the budget runs; bench0 owns more than a page of items
+BUDGET_USERS = 3
+
+
+@pytest.fixture
+def budget_data(db, settings, tmp_path):  #pylint: disable=unused-argument, redefined-outer-name
+    """
+    Seed the benchmark users and items and return benchmark.route_context().
+    """
+    #Imported here, the plugin is loaded before the apps are ready
+    #pylint: disable=import-outside-toplevel
+    from .benchmark import route_context, seed
+    from .inquiries import set_digest
+    from .models import Inquiry, Item
+    from .pagination import get_page_size
+    from .bench_settings import bench_settings
+
+    for name, value in bench_settings(settings, tmp_path / 'media', tmp_path / 'static').items():
+        setattr(settings, name, value)
+    owners = seed(users=BUDGET_USERS, items=BUDGET_USERS * (get_page_size() + 2))
+    #Half of the cards link WebP thumbnails
+    Item.objects.filter(
+        id__in=Item.objects.order_by('id').values_list('id', flat=True)[::2]).update(
+            thumbnails_ready=True)
+    Inquiry.objects.bulk_create([
+        Inquiry(item=item, owner=item.owner, email=f'visitor{n}@example.com', message='Available?')
+        for n, item in enumerate(Item.objects.select_related('owner').order_by('id')[:10])])
+    set_digest(owners[1], True)
+    return route_context()
+
+
+@pytest.fixture
+def assert_query_budget(budget_data):  #pylint: disable=redefined-outer-name
+    """
+    Return check(route, urlconf=None): run the route once on a cold start,
+    fail with the offending SQL when it goes over the budget of its URL name
+    and return the response.
+    """
+    #pylint: disable=import-outside-toplevel
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, override_settings
+    from .query_budgets import budgets, check_budget
+
+    def check(route, urlconf=None):
+        #Changing ROOT_URLCONF clears the URL caches
+        with override_settings(ROOT_URLCONF=urlconf or settings.ROOT_URLCONF):
+            budget = budgets().get(route.url_name)
+            if budget is None:
+                pytest.fail(f'{route.url_name} has no @query_budget')
+            path, data = route.request(budget_data, 0)  #setup queries are not counted
+            for cache in caches.all():
+                cache.clear()
+            client = Client()
+            if route.login:
+                client.force_login(User.objects.get(username=route.login))
+            with CaptureQueriesContext(connection) as captured:
+                response = getattr(client, route.method)(path, data, headers=route.headers)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+        check_budget(route.label, captured.captured_queries, budget)
+        return response
+
+    return check
@@ -0,0 +1,71 @@
+"""
+Per-view query budgets.
+Every view routed in EcoGive/urls.py declares the most database queries one
+request may run with @query_budget(n), counted on a cold start: empty caches
+and a session whose user is not cached yet. budgets() collects them by URL
+name, and the query_budget_plugin pytest plugin runs every benchmark route
+against seeded data and fails with the offending SQL when a view goes over
+its budget, e.g. when a template change adds a query per item (N+1).
+"""
+from collections import Counter
+from django.urls import URLPattern, URLResolver, get_resolver
+from .instrumentation import normalize_sql
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    A request ran more queries than the budget of its view.
+    """
+
+
+def query_budget(max_queries):
+    """
+    Declare the most queries one request to the decorated view may run.
+    The budget is kept on the view function, decorators applied on top
+    copy it with functools.wraps.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def _patterns(patterns):
+    #Included URLconfs (the admin) are namespaced and not budgeted here
+    for pattern in patterns:
+        if isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+        elif isinstance(pattern, URLResolver) and not pattern.namespace:
+            yield from _patterns(pattern.url_patterns)
+
+
+def budgets(urlconf=None):
+    """
+    Return {url_name: max_queries} of the named URL patterns of the URLconf,
+    None for a view without a budget.
+    """
+    return {pattern.name: getattr(pattern.callback, 'query_budget', None)
+            for pattern in _patterns(get_resolver(urlconf).url_patterns)}
+
+
+def report(label, queries, budget):
+    """
+    Return the failure message for queries (CaptureQueriesContext entries)
+    over budget: every statement in order, repeated shapes marked.
+    """
+    shapes = Counter(normalize_sql(query['sql']) for query in queries)
+    lines = [f'{label}: {len(queries)} queries, budget {budget}']
+    for n, query in enumerate(queries, 1):
+        repeats = shapes[normalize_sql(query['sql'])]
+        marker = f' [x{repeats}]' if repeats > 1 else ''
+        lines.append(f'  {n}.{marker} {query["sql"]}')
+    return '\n'.join(lines)
+
+
+def check_budget(label, queries, budget):
+    """
+    Raise QueryBudgetExceeded with the offending SQL when the captured
+    queries are more than budget.
+    """
+    if len(queries) > budget:
+        raise QueryBudgetExceeded(report(label, queries, budget))
@@ -0,0 +1,134 @@
+"""
+Primary/replica database routing.
+Writes always go to the primary ("default") and reads are spread over the
+aliases in DATABASE_REPLICAS. Auth, sessions and the other framework tables
+are always read from the primary, because a login must never see a stale
+password or session. ReplicaPinMiddleware sends all reads of a request to the
+primary once it wrote something, and keeps the browser on the primary for
+REPLICA_PIN_SECONDS afterwards with a cookie, so users see their own edits
+while the replicas catch up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+#Apps whose tables are read from the primary only
+PRIMARY_ONLY_APPS = {'auth', 'sessions', 'contenttypes', 'admin'}
+
+#Methods that never write, every other method pins the request to the primary
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class _Pin:
+    #Mutable so writes flagged deep inside a request are visible to the middleware
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_pin = ContextVar('ecogive_replica_pin', default=None)
+
+
+def get_replicas():
+    """
+    Return the aliases of the configured read replicas.
+    """
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def primary():
+    """
+    Read from the primary inside the block, e.g. in background jobs that
+    look up rows another process has just written.
+    """
+    token = _pin.set(_Pin(pinned=True))
+    try:
+        yield
+    finally:
+        _pin.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router for one primary and any number of replicas.
+    """
+    def db_for_read(self, model, **hints):  #pylint: disable=unused-argument
+        """Pick a replica unless the model or the current request needs the primary."""
+        replicas = get_replicas()
+        pin = _pin.get()
+        app_label = model._meta.app_label  #pylint: disable=protected-access
+        if not replicas or app_label in PRIMARY_ONLY_APPS or (pin and pin.pinned):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):  #pylint: disable=unused-argument
+        """Always write to the primary and pin the rest of the request to it."""
+        pin = _pin.get()
+        if pin is not None:
+            pin.pinned = pin.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):  #pylint: disable=unused-argument
+        """Rows of the primary and its replicas are the same rows."""
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        #pylint: disable-next=protected-access
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    #pylint: disable-next=unused-argument
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only the primary is migrated, replicas are copies of it."""
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """
+    Route the reads of a request to the primary when the request writes or
+    the browser wrote recently. Put it before SessionMiddleware so session
+    writes are seen too. Runs natively under WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie = getattr(settings, 'REPLICA_PIN_COOKIE', 'ecogive_primary')
+        self.seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _pin_for(self, request):
+        return _Pin(pinned=request.method not in SAFE_METHODS or self.cookie in request.COOKIES)
+
+    def _set_cookie(self, pin, response):
+        if pin.wrote and get_replicas():
+            response.set_cookie(
+                self.cookie, '1', max_age=self.seconds, httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        pin = self._pin_for(request)
+        token = _pin.set(pin)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pin.reset(token)
+        return self._set_cookie(pin, response)
+
+    async def __acall__(self, request):
+        #sync_to_async copies the context, the shared _Pin still sees writes made in threads
+        pin = self._pin_for(request)
+        token = _pin.set(pin)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pin.reset(token)
+        return self._set_cookie(pin, response)
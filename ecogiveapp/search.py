@@ -0,0 +1,163 @@
+"""
+Full-text search for EcoGive items.
+The search backend is chosen with the SEARCH_BACKEND setting so the SQLite FTS5
+index can later be swapped for a Postgres tsvector implementation without
+touching the views. Backends return items in relevance order.
+"""
+import re
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.utils.module_loading import import_string
+from .models import Item
+
+#Words of the search query; punctuation is dropped so users cannot inject FTS syntax
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchBackend:
+    """
+    Interface of a search backend. Subclasses implement search_ids and rebuild.
+    """
+    def search_ids(self, query, offset, limit):
+        """
+        Return the ids of the items matching query, best match first.
+        """
+        raise NotImplementedError
+
+    def rebuild(self):
+        """
+        Rebuild the whole index from the Item table and return the number of items indexed.
+        """
+        raise NotImplementedError
+
+    def install(self, using=DEFAULT_DB_ALIAS):
+        """
+        Create whatever the backend needs in the database. Called after every
+        migrate, so it has to be idempotent.
+        """
+
+    def search(self, query, offset=0, limit=None):
+        """
+        Return the matching Item objects, best match first.
+        """
+        ids = self.search_ids(query, offset, limit)
+        items = Item.objects.in_bulk(ids)
+        return [items[pk] for pk in ids if pk in items]
+
+
+class BasicSearchBackend(SearchBackend):
+    """
+    Fallback backend for databases without a full-text index.
+    It scans title and description and orders by newest first.
+    """
+    def search_ids(self, query, offset, limit):
+        queryset = Item.objects.filter(title__icontains=query) | Item.objects.filter(
+            description__icontains=query)
+        queryset = queryset.order_by('-posted_at', '-id').values_list('id', flat=True)
+        end = None if limit is None else offset + limit
+        return list(queryset[offset:end])
+
+    def rebuild(self):
+        return Item.objects.count()
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Search the ecogiveapp_item_fts virtual table, ranked with BM25, newest
+    first among equal scores. The table is an external-content FTS5 index over
+    ecogiveapp_item kept in sync by SQLite triggers (see install), so it is
+    read from whichever database the router picks for Item reads.
+    """
+    table = 'ecogiveapp_item_fts'
+
+    #BM25 column weights, a hit in the title counts more than one in the description
+    title_weight = 10.0
+    description_weight = 1.0
+
+    #SQLite drops the triggers whenever a migration rebuilds ecogiveapp_item,
+    #so install() recreates them after every migrate. Migration 0004 runs them too.
+    install_statements = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS ecogiveapp_item_fts USING fts5(
+            title, description,
+            content='ecogiveapp_item', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS ecogiveapp_item_fts_insert
+        AFTER INSERT ON ecogiveapp_item BEGIN
+            INSERT INTO ecogiveapp_item_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS ecogiveapp_item_fts_delete
+        AFTER DELETE ON ecogiveapp_item BEGIN
+            INSERT INTO ecogiveapp_item_fts(ecogiveapp_item_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS ecogiveapp_item_fts_update
+        AFTER UPDATE OF title, description ON ecogiveapp_item BEGIN
+            INSERT INTO ecogiveapp_item_fts(ecogiveapp_item_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO ecogiveapp_item_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ]
+
+    def install(self, using=DEFAULT_DB_ALIAS):
+        target = connections[using]
+        if target.vendor != 'sqlite':
+            return
+        with target.cursor() as cursor:
+            for statement in self.install_statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def match_expression(query):
+        """
+        Turn free text into an FTS5 MATCH expression where every word is a
+        quoted prefix term, e.g. 'red bik' -> '"red"* "bik"*'.
+        """
+        tokens = _TOKEN_RE.findall(query)
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search_ids(self, query, offset, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        sql = (
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+            f'ORDER BY bm25({self.table}, %s, %s), rowid DESC LIMIT %s OFFSET %s'
+        )
+        params = [
+            expression, self.title_weight, self.description_weight,
+            -1 if limit is None else limit, offset,
+        ]
+        with connections[router.db_for_read(Item)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connections[router.db_for_write(Item)].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+        return Item.objects.count()
+
+
+def get_search_backend():
+    """
+    Return an instance of the backend configured in settings.SEARCH_BACKEND.
+    """
+    backend_path = getattr(settings, 'SEARCH_BACKEND', 'ecogiveapp.search.SQLiteFTS5Backend')
+    return import_string(backend_path)()
+
+
+def install_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):  #pylint: disable=unused-argument
+    """
+    post_migrate receiver that (re)installs the configured search backend.
+    """
+    get_search_backend().install(using=using)
@@ -0,0 +1,42 @@
+"""
+Session engine: write-through cached sessions (SESSION_ENGINE = 'ecogiveapp.sessions').
+Sessions are written to the database and the cache together and read from
+the cache, so a request only reads django_session when its session is not
+cached (first request after a restart or an eviction). clear_expired, run by
+"manage.py clearsessions", deletes expired sessions in small batches walking
+the expire_date index, so it never scans the table or holds a long write lock.
+Without a shared cache settings.py uses ecogiveapp.db_sessions, the same
+garbage collection over plain database sessions.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+
+def clear_expired_in_batches(model):
+    """
+    Delete the expired sessions of model, SESSION_GC_BATCH_SIZE rows at a time,
+    and return how many were deleted.
+    """
+    batch_size = getattr(settings, 'SESSION_GC_BATCH_SIZE', 1000)
+    now = timezone.now()
+    deleted = 0
+    while True:
+        #expire_date is indexed, each batch is a short range read on it
+        keys = list(model.objects.filter(expire_date__lt=now).order_by('expire_date')
+                    .values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += model.objects.filter(session_key__in=keys).delete()[0]
+
+
+class SessionStore(CachedDBStore):
+    """
+    cached_db session store with batched garbage collection.
+    """
+    cache_key_prefix = 'ecogiveapp.sessions'
+
+    @classmethod
+    def clear_expired(cls):
+        """Delete the expired sessions, SESSION_GC_BATCH_SIZE rows at a time."""
+        return clear_expired_in_batches(cls.get_model_class())
@@ -0,0 +1,47 @@
+"""
+Signal receivers of the EcoGive application, connected in EcogiveappConfig.ready.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .auth_backends import evict_user
+from .blobs import release
+from .caching import invalidate_items
+from .models import Item
+from .thumbnails import thumbnails_generated
+
+#Any Item write (views, admin, shell) evicts that item's cards and the pages it is on
+@receiver(post_save, sender=Item, dispatch_uid='ecogiveapp_item_saved_cache')
+@receiver(post_delete, sender=Item, dispatch_uid='ecogiveapp_item_deleted_cache')
+#pylint: disable-next=unused-argument
+def invalidate_item_cache(sender, instance, created=False, **kwargs):
+    """
+    Bump the version stamps of the written item, and of the first feed pages for a new one.
+    """
+    invalidate_items([instance.pk], added=created)
+
+#Flagging thumbnails ready goes through update(), which sends no post_save
+@receiver(thumbnails_generated, sender=Item, dispatch_uid='ecogiveapp_thumbnails_cache')
+def invalidate_thumbnail_cards(sender, item_ids, **kwargs):  #pylint: disable=unused-argument
+    """
+    Bump the version stamps of the items whose cards now show thumbnails.
+    """
+    invalidate_items(item_ids)
+
+#Deleting an item (views, admin, cascade from its owner) lets go of its image
+@receiver(post_delete, sender=Item, dispatch_uid='ecogiveapp_item_deleted_image')
+def release_item_image(sender, instance, **kwargs):  #pylint: disable=unused-argument
+    """
+    Drop the item's reference to its stored image, in the delete transaction.
+    """
+    if instance.image:
+        release(instance.image.name)
+
+#Any user write (profile, password, last_login, admin) evicts the cached request.user
+@receiver(post_save, sender=get_user_model(), dispatch_uid='ecogiveapp_user_saved_cache')
+@receiver(post_delete, sender=get_user_model(), dispatch_uid='ecogiveapp_user_deleted_cache')
+def evict_cached_user(sender, instance, **kwargs):  #pylint: disable=unused-argument
+    """
+    Drop the written user from the user cache of CachedModelBackend.
+    """
+    evict_user(instance.pk)
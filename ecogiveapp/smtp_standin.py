@@ -0,0 +1,145 @@
+"""
+A small local SMTP server that stands in for Mailjet so the email worker can be
+exercised offline. Messages are kept in memory and can also be written to a
+directory as .eml files. It speaks just enough SMTP for smtplib and Django's
+SMTP email backend (no TLS and no AUTH).
+
+Usage in tests:
+    with LocalSMTPServer() as server:
+        settings.EMAIL_HOST, settings.EMAIL_PORT = server.host, server.port
+        ...
+        server.messages  #list of (mail_from, recipients, raw bytes)
+"""
+import os
+import socketserver
+import threading
+import uuid
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one SMTP session.
+    """
+    def _reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    @staticmethod
+    def _address(argument):
+        return argument.split(':', 1)[1].strip().strip('<>') if ':' in argument else ''
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            if line.startswith(b'..'):  #undo SMTP dot-stuffing
+                line = line[1:]
+            lines.append(line)
+        return b''.join(lines)
+
+    def handle(self):  #pylint: disable=too-many-branches
+        server = self.server
+        server.record_connection()
+        self._reply('220 localhost EcoGive SMTP stand-in')
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(' ')
+            command = command.upper()
+            if command == 'EHLO':
+                self._reply('250-localhost')
+                self._reply('250 8BITMIME')
+            elif command == 'HELO':
+                self._reply('250 localhost')
+            elif command == 'MAIL':
+                mail_from, recipients = self._address(argument), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                recipient = self._address(argument)
+                if server.rejects(recipient):
+                    self._reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(recipient)
+                    self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                server.store(mail_from, recipients, self._read_data())
+                mail_from, recipients = None, []
+                self._reply('250 OK')
+            elif command == 'RSET':
+                mail_from, recipients = None, []
+                self._reply('250 OK')
+            elif command == 'NOOP':
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded in-memory SMTP server listening on localhost.
+    Recipients listed in reject are refused with a 550 reply.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, output_dir=None, reject=()):
+        super().__init__((host, port), _SMTPHandler)
+        self.output_dir = output_dir
+        self.reject = set(reject)
+        self.messages = []
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def host(self):
+        """Address the server listens on."""
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        """Port the server listens on (picked by the OS when 0 was given)."""
+        return self.server_address[1]
+
+    def rejects(self, recipient):
+        """True when the recipient should be refused."""
+        return recipient in self.reject
+
+    def record_connection(self):
+        """Count SMTP sessions so tests can check that connections are reused."""
+        with self._lock:
+            self.connection_count += 1
+
+    def store(self, mail_from, recipients, data):
+        """Keep a delivered message in memory and optionally on disk."""
+        with self._lock:
+            self.messages.append((mail_from, list(recipients), data))
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f'{uuid.uuid4().hex}.eml')
+            with open(path, 'wb') as eml:
+                eml.write(data)
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
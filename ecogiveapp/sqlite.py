@@ -0,0 +1,69 @@
+"""
+SQLite tuning for production.
+apply_pragmas runs on every new SQLite connection (connection_created signal)
+and applies the SQLITE_PRAGMAS profile, DEFAULT_PRAGMAS unless set: WAL lets
+readers work while a writer commits, synchronous=NORMAL drops the fsync of
+every commit in WAL mode, and
+busy_timeout makes a writer wait for the lock instead of failing with
+"database is locked". Together with CONN_MAX_AGE the profile is paid once per
+worker connection, not once per request.
+"""
+import re
+from django.conf import settings
+
+#Used when SQLITE_PRAGMAS is not set, applied in this order
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,  #first, so switching to WAL also waits for the lock
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  #negative means KiB, i.e. 64 MB per connection
+    'temp_store': 'MEMORY',
+}
+
+#PRAGMA names and values are interpolated, so only plain words and numbers pass
+_SAFE_RE = re.compile(r'^-?\w+$')
+
+
+def pragma_statements(pragmas):
+    """
+    Return the PRAGMA statements of a profile.
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if not _SAFE_RE.match(str(name)) or not _SAFE_RE.match(str(value)):
+            raise ValueError(f'Invalid SQLite pragma {name}={value}')
+        statements.append(f'PRAGMA {name}={value}')
+    return statements
+
+
+def apply_pragmas(sender, connection, **kwargs):  #pylint: disable=unused-argument
+    """
+    connection_created receiver that applies the PRAGMA profile to SQLite connections.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+def checkpoint(connection, mode='TRUNCATE'):
+    """
+    Copy the WAL back into the database file and truncate it.
+    Returns (busy, wal pages, checkpointed pages) as reported by SQLite.
+    """
+    if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f'Invalid checkpoint mode {mode}')
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        return cursor.fetchone()
+
+
+def optimize(connection):
+    """
+    Let SQLite refresh the query planner statistics that are out of date.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
@@ -0,0 +1,71 @@
+"""
+Cold start probe of the startup benchmark (see benchmark.measure_startup).
+Run in a fresh interpreter per route:
+
+    python -m ecogiveapp.startup_probe --route home --db copy.sqlite3 \\
+        --media-root MEDIA --static-root STATIC [--warm]
+
+It times loading the application the way EcoGive/wsgi.py does, with or
+without the warm-up, then the first and the second request to the route,
+and prints the timings as one JSON line. Nothing Django is imported before
+the clock starts, so the numbers include the import time.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from ecogiveapp.bench_settings import bench_settings
+
+
+def main(argv=None):  #pylint: disable=too-many-locals
+    """
+    Probe one route and print {'startup_ms', 'first_ms', 'second_ms', 'status'}.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--route', required=True, help='Label of a benchmark.default_routes route.')
+    parser.add_argument('--db', required=True, help='Seeded SQLite database to use.')
+    parser.add_argument('--media-root', required=True)
+    parser.add_argument('--static-root', required=True)
+    parser.add_argument('--warm', action='store_true', help='Warm up while loading.')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'EcoGive.settings')
+    from django.conf import settings  #pylint: disable=import-outside-toplevel
+    for name, value in bench_settings(settings, args.media_root, args.static_root).items():
+        setattr(settings, name, value)
+    settings.DATABASES['default']['NAME'] = args.db
+    settings.WARMUP_ON_STARTUP = args.warm
+    import EcoGive.wsgi  #pylint: disable=import-outside-toplevel, unused-import
+    startup = time.perf_counter() - start
+
+    #Test client setup is not timed
+    from django.test import Client  #pylint: disable=import-outside-toplevel
+    from django.test.utils import setup_test_environment  #pylint: disable=import-outside-toplevel
+    from ecogiveapp import benchmark  #pylint: disable=import-outside-toplevel
+    setup_test_environment()
+    route = next(route for route in benchmark.default_routes() if route.label == args.route)
+    ctx = benchmark.route_context()
+    client = Client()
+    if route.login:
+        client.force_login(benchmark.User.objects.get(username=route.login))
+
+    timings, statuses = [], []
+    for n in range(2):
+        path, data = route.request(ctx, n)
+        begin = time.perf_counter()
+        response = getattr(client, route.method)(path, data, headers=route.headers)
+        timings.append(time.perf_counter() - begin)
+        statuses.append(response.status_code)
+    print(json.dumps({
+        'startup_ms': round(startup * 1000, 2),
+        'first_ms': round(timings[0] * 1000, 2),
+        'second_ms': round(timings[1] * 1000, 2),
+        'status': statuses,
+    }))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
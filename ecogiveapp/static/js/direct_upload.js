@@ -0,0 +1,44 @@
+/*
+ * Direct-to-storage photo upload for the add and edit item forms.
+ * The photo goes straight to the storage through a presigned POST and the form
+ * is submitted with only its key. Without JavaScript, or when the direct upload
+ * fails, the photo is posted with the form as before.
+ */
+document.querySelectorAll('form[data-presign-url]').forEach(function (form) {
+    form.addEventListener('submit', function (event) {
+        var input = form.querySelector('input[type=file][name=image]');
+        if (!input || !input.files.length || form.dataset.uploaded) {
+            return;
+        }
+        event.preventDefault();
+        var file = input.files[0];
+        var csrfToken = form.querySelector('[name=csrfmiddlewaretoken]').value;
+        var request = new FormData();
+        request.append('content_type', file.type);
+        request.append('size', file.size);
+
+        fetch(form.dataset.presignUrl, {
+            method: 'POST', body: request, credentials: 'same-origin',
+            headers: {'X-CSRFToken': csrfToken}
+        }).then(function (response) {
+            return response.ok ? response.json() : Promise.reject(response);
+        }).then(function (target) {
+            var upload = new FormData();
+            Object.keys(target.fields).forEach(function (name) {
+                upload.append(name, target.fields[name]);
+            });
+            upload.append('file', file);  //the file has to be the last field
+            return fetch(target.url, {method: target.method, body: upload}).then(function (response) {
+                return response.ok ? target.key : Promise.reject(response);
+            });
+        }).then(function (key) {
+            form.querySelector('[name=upload_key]').value = key;
+            input.disabled = true;  //do not send the photo a second time
+            form.dataset.uploaded = 'direct';
+            form.submit();
+        }).catch(function () {
+            form.dataset.uploaded = 'form';
+            form.submit();
+        });
+    });
+});
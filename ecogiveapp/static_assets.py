@@ -0,0 +1,193 @@
+"""
+Fingerprinted, precompressed static assets.
+collectstatic with CompressedManifestStaticFilesStorage writes every file
+under a content-hashed name (styles.css -> styles.1a2b3c4d5e6f.css) and a
+gzip copy, plus a Brotli copy when the optional brotli package is installed,
+next to each compressible file. The serve view sends the smallest variant the
+browser accepts; hashed names never change content, so they are cached for a
+year as immutable and repeat visits send no CSS or JavaScript at all.
+A file missing from the manifest (collectstatic has not run since it was
+added) is linked by its source name with a warning instead of failing the
+page; serve finds it with the static finders.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+from .query_budgets import query_budget
+
+try:
+    import brotli
+except ImportError:  #Optional, only gzip copies are written without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+#Names written by ManifestStaticFilesStorage carry a 12 character MD5 prefix
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+#Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _compress_gzip(content):
+    #mtime=0 keeps the output identical between builds
+    return gzip.compress(content, compresslevel=9, mtime=0)
+
+
+def _compress_brotli(content):
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes .gz and .br copies of compressible files.
+    """
+    compressible_extensions = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.xml',
+                               '.html', '.ico', '.ttf', '.otf', '.eot')
+    #Smaller files gain less than the Content-Encoding header costs
+    min_compress_size = 256
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unhashed = set()
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            #Not collected: a stale manifest or no collectstatic run at all
+            if name not in self.unhashed:
+                self.unhashed.add(name)
+                logger.warning('%s is not in the staticfiles manifest, run collectstatic', name)
+            return name
+
+    def post_process(self, *args, **kwargs):
+        #collectstatic calls post_process(found_files, dry_run=...)
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        if brotli is None:
+            logger.warning('brotli is not installed, only .gz copies are written')
+        names = set(args[0]) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.lower().endswith(self.compressible_extensions):
+                self.compress(name)
+
+    def compressors(self):
+        """
+        Return (suffix, function) of the encodings to write.
+        """
+        compressors = [('.gz', _compress_gzip)]
+        if brotli is not None:
+            compressors.append(('.br', _compress_brotli))
+        return compressors
+
+    def compress(self, name):
+        """
+        Write the compressed copies of one collected file, keeping only those
+        that are smaller than the original.
+        """
+        path = self.path(name)
+        if not os.path.isfile(path):
+            return
+        with open(path, 'rb') as source:
+            content = source.read()
+        for suffix, compress in self.compressors():
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+            if len(content) < self.min_compress_size:
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+
+
+def find_asset(path):
+    """
+    Return the file system path of a static asset: the collected copy in
+    STATIC_ROOT, or the source file found by the static finders before
+    collectstatic has run.
+    """
+    if settings.STATIC_ROOT:
+        try:
+            full_path = safe_join(settings.STATIC_ROOT, path)
+        except SuspiciousFileOperation:
+            return None
+        if os.path.isfile(full_path):
+            return full_path
+    try:
+        return finders.find(path)
+    except SuspiciousFileOperation:
+        return None
+
+
+def accepted_encodings(request):
+    """
+    Return the content codings the request accepts, ignoring those with q=0.
+    """
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip().replace(' ', '')
+        if quality in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_variant(request, full_path):
+    """
+    Return (path, encoding) of the precompressed copy the browser accepts,
+    or of the original file with encoding None.
+    """
+    accepted = accepted_encodings(request)
+    for encoding, suffix in ENCODINGS:
+        if (encoding in accepted or '*' in accepted) and os.path.isfile(full_path + suffix):
+            return full_path + suffix, encoding
+    return full_path, None
+
+
+@query_budget(0)
+@require_safe
+def serve(request, path):
+    """
+    Serve a static asset: the precompressed variant when accepted, immutable
+    for a year under a hashed name, revalidated by Last-Modified otherwise.
+    """
+    full_path = find_asset(path)
+    if not full_path:
+        raise Http404('Static file not found')
+
+    immutable = bool(HASHED_NAME.search(path))
+    modified = os.stat(full_path).st_mtime
+    if not immutable and not was_modified_since(
+            request.headers.get('If-Modified-Since'), modified):
+        response = HttpResponseNotModified()
+    else:
+        variant, encoding = choose_variant(request, full_path)
+        #Assets are small; read them whole so ASGI needs no sync iterator
+        with open(variant, 'rb') as asset:
+            response = HttpResponse(
+                asset.read(),
+                content_type=mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(modified)
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = IMMUTABLE if immutable else 'public, no-cache'
+    return response
@@ -0,0 +1,163 @@
+"""
+Deferred, batched deletion of storage objects.
+Views do not delete replaced or removed images inline (one S3 round-trip per
+object while the user waits). They write PendingDeletion tombstones inside
+the same transaction as the item change, and the purge_storage worker removes
+the objects in batches, with one S3 DeleteObjects call per 1000 keys.
+find_orphans lists objects in the storage that no item references any more,
+for the reconcile_storage command.
+"""
+import logging
+import posixpath
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+from .models import ImageBlob, Item, PendingDeletion
+from .thumbnails import thumbnail_names
+
+logger = logging.getLogger(__name__)
+
+#Largest number of keys S3 accepts in one DeleteObjects request
+S3_DELETE_LIMIT = 1000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _storage():
+    return Item.image_storage()
+
+
+def schedule_image_deletion(name):
+    """
+    Tombstone an item image and its thumbnails. Call it inside the transaction
+    that replaces or deletes the image, e.g. with transaction.atomic().
+    """
+    schedule_image_deletions([name])
+
+
+def schedule_image_deletions(names):
+    """
+    schedule_image_deletion for many images, with one INSERT per batch.
+    """
+    PendingDeletion.objects.bulk_create([
+        PendingDeletion(name=target, source=name)
+        for name in names for target in [name, *thumbnail_names(name)]
+    ], batch_size=500)
+
+
+def claim_batch(batch_size, now=None):
+    """
+    Return up to batch_size due tombstones and lease them so a second worker
+    skips them while they are being deleted.
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=_setting('STORAGE_GC_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        due = PendingDeletion.objects.filter(
+            next_attempt_at__lte=now, attempts__lt=_setting('STORAGE_GC_MAX_ATTEMPTS', 5),
+        ).order_by('next_attempt_at', 'id')
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        PendingDeletion.objects.filter(id__in=[entry.id for entry in batch]).update(
+            next_attempt_at=now + lease)
+    return batch
+
+
+def delete_objects(storage, names):
+    """
+    Delete the names from the storage and return {name: error} for the ones
+    that failed. S3 storages use DeleteObjects with up to 1000 keys per call,
+    other storages delete one name at a time.
+    """
+    failures = {}
+    bucket = getattr(storage, 'bucket', None)
+    if bucket is None:
+        for name in names:
+            try:
+                storage.delete(name)
+            except OSError as error:
+                failures[name] = f'{type(error).__name__}: {error}'
+        return failures
+
+    for start in range(0, len(names), S3_DELETE_LIMIT):
+        chunk = names[start:start + S3_DELETE_LIMIT]
+        #_normalize_name prefixes AWS_LOCATION exactly like storage.delete does
+        keys = {storage._normalize_name(name): name for name in chunk}  #pylint: disable=protected-access
+        response = bucket.delete_objects(
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True})
+        for error in response.get('Errors', []):
+            failures[keys[error['Key']]] = f"{error.get('Code')}: {error.get('Message')}"
+    return failures
+
+
+def purge_pending(batch_size=None):
+    """
+    Delete one batch of tombstoned objects and return a dict with the
+    deleted, kept (referenced again) and failed counts.
+    """
+    batch_size = batch_size or _setting('STORAGE_GC_BATCH_SIZE', S3_DELETE_LIMIT)
+    batch = claim_batch(batch_size)
+    counts = {'deleted': 0, 'kept': 0, 'failed': 0}
+    if not batch:
+        return counts
+
+    #An image can be referenced again, e.g. by an imported item sharing it or by
+    #an upload of the same photo committed after this batch was claimed
+    sources = {entry.source for entry in batch}
+    referenced = set(Item.objects.filter(image__in=sources).values_list('image', flat=True))
+    referenced.update(ImageBlob.objects.filter(name__in=sources).values_list('name', flat=True))
+    kept = [entry for entry in batch if entry.source in referenced]
+    doomed = [entry for entry in batch if entry.source not in referenced]
+
+    failures = delete_objects(_storage(), list(dict.fromkeys(entry.name for entry in doomed)))
+    failed = [entry for entry in doomed if entry.name in failures]
+    for entry in failed:
+        entry.attempts += 1
+        entry.last_error = failures[entry.name]
+        logger.warning('Could not delete %s: %s', entry.name, entry.last_error)
+    #Failed entries keep their lease as retry delay
+    PendingDeletion.objects.bulk_update(failed, ['attempts', 'last_error'])
+
+    done = [entry.id for entry in kept] + [
+        entry.id for entry in doomed if entry.name not in failures]
+    PendingDeletion.objects.filter(id__in=done).delete()
+    counts.update(deleted=len(doomed) - len(failed), kept=len(kept), failed=len(failed))
+    return counts
+
+
+def _walk(storage, path):
+    directories, files = storage.listdir(path)
+    for file_name in files:
+        yield posixpath.join(path, file_name) if path else file_name
+    for directory in directories:
+        yield from _walk(storage, posixpath.join(path, directory) if path else directory)
+
+
+def referenced_names():
+    """
+    Return every storage name the items use: their images and thumbnails.
+    """
+    names = set()
+    for image in Item.objects.exclude(image='').values_list('image', flat=True).iterator():
+        if image:
+            names.add(image)
+            names.update(thumbnail_names(image))
+    return names
+
+
+def find_orphans(prefix=''):
+    """
+    Yield the storage names under prefix (relative to the storage location,
+    i.e. AWS_LOCATION on S3) that no item references and that are not
+    already waiting for deletion.
+    """
+    storage = _storage()
+    keep = referenced_names()
+    keep.update(PendingDeletion.objects.values_list('name', flat=True))
+    for name in _walk(storage, prefix):
+        if name not in keep:
+            yield name
@@ -0,0 +1,50 @@
+"""
+Template tags for the Bootstrap assets.
+Bootstrap comes from the jsDelivr CDN unless BOOTSTRAP_VENDORED is on; then
+the copies stored by the vendor_bootstrap command are served from our own
+static files under fingerprinted, immutable names.
+"""
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+BOOTSTRAP_VERSION = '5.1.3'
+BOOTSTRAP_CDN = f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/'
+BOOTSTRAP_CSS = 'css/bootstrap.min.css'
+BOOTSTRAP_JS = 'js/bootstrap.bundle.min.js'
+#Subresource integrity of the CDN copy of BOOTSTRAP_JS
+BOOTSTRAP_JS_INTEGRITY = 'sha384-ka7Sk0Gln4gmtz2MlQnikT1wXgYsOg+OMhuP+IlRH9sENBO0LRn5q+8nbTov4+1p'
+
+
+def vendored_name(name):
+    """
+    Return the static files name of a vendored Bootstrap file.
+    """
+    return f'vendor/bootstrap/{name}'
+
+
+@register.simple_tag
+def bootstrap_css():
+    """
+    Return the Bootstrap stylesheet link.
+    Usage: {% bootstrap_css %}
+    """
+    if getattr(settings, 'BOOTSTRAP_VENDORED', False):
+        return format_html('<link href="{}" rel="stylesheet">',
+                           static(vendored_name(BOOTSTRAP_CSS)))
+    return format_html('<link href="{}" rel="stylesheet">', BOOTSTRAP_CDN + BOOTSTRAP_CSS)
+
+
+@register.simple_tag
+def bootstrap_js():
+    """
+    Return the Bootstrap bundle script tag.
+    Usage: {% bootstrap_js %}
+    """
+    if getattr(settings, 'BOOTSTRAP_VENDORED', False):
+        return format_html('<script src="{}"></script>', static(vendored_name(BOOTSTRAP_JS)))
+    return format_html('<script src="{}" integrity="{}" crossorigin="anonymous"></script>',
+                       BOOTSTRAP_CDN + BOOTSTRAP_JS, BOOTSTRAP_JS_INTEGRITY)
@@ -0,0 +1,42 @@
+"""
+Template tags for item images and their thumbnails.
+URLs come from item.media_urls when the view prefetched them for the page
+(see ecogiveapp.media_urls.prefetch_item_urls) and from the URL cache otherwise.
+"""
+from django import template
+from ecogiveapp.media_urls import resolve_urls
+from ecogiveapp.thumbnails import FORMATS, thumbnail_name
+
+register = template.Library()
+
+
+def _url(item, name):
+    prefetched = getattr(item, 'media_urls', None)
+    if prefetched and name in prefetched:
+        return prefetched[name]
+    return resolve_urls(item.image.storage, [name])[name]
+
+
+@register.simple_tag
+def image_url(item):
+    """
+    Return the URL of the original item image.
+    Usage: {% image_url item %}
+    """
+    if not item.image:
+        return ''
+    return _url(item, item.image.name)
+
+
+@register.simple_tag
+def thumbnail_url(item, size_name='card', fmt='jpeg'):
+    """
+    Return the URL of an item thumbnail, or of the original image until the
+    thumbnail worker has stored the derivatives.
+    Usage: {% thumbnail_url item 'card' 'webp' %}
+    """
+    if not item.image:
+        return ''
+    if not item.thumbnails_ready or fmt not in FORMATS:
+        return _url(item, item.image.name)
+    return _url(item, thumbnail_name(item.image.name, size_name, fmt))
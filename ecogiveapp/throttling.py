@@ -0,0 +1,222 @@
+"""
+Request throttling for the abuse-prone views: inquiries (each one is an email
+through our Mailjet quota) and login (each attempt is a password hash check).
+Limits are sliding windows per client IP, user, item or login username,
+configured per scope in THROTTLE_RATES, e.g. {'login': {'ip': '30/5m'}}.
+Every limit keeps one atomic counter per fixed window in the cache; the
+count of the previous window is weighted by how much of it still overlaps
+the sliding window. On Redis all counters of a request are incremented and
+read in one pipelined round-trip. Other backends read them with one
+get_many() and write them back with one set_many(); only the Redis path is
+atomic, so there concurrent requests can lose an increment. Counters must live
+in a cache shared by all workers: with a per-process cache (LocMem, dummy)
+every limit would be multiplied by the number of workers, so the throttled
+views refuse the requests instead (fail closed) and log an error.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import time
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+#Seconds of the period suffixes of a rate
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+RATE_PATTERN = re.compile(r'^(\d+)/(\d*)([smhd])$')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def parse_rate(rate):
+    """
+    Return (limit, window seconds) of a rate such as '5/m', '30/5m' or '100/d'.
+    """
+    match = RATE_PATTERN.match(rate.replace(' ', ''))
+    if not match:
+        raise ValueError(f'Invalid throttle rate {rate!r}.')
+    limit, periods, period = match.groups()
+    return int(limit), int(periods or 1) * PERIODS[period]
+
+
+def client_ip(request):
+    """
+    Return the client address. Behind a load balancer set
+    THROTTLE_CLIENT_IP_HEADER (e.g. 'HTTP_X_FORWARDED_FOR'); the right-most
+    address is used, it is the one added by our own proxy.
+    """
+    header = _setting('THROTTLE_CLIENT_IP_HEADER', None)
+    if header and request.META.get(header):
+        return request.META[header].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+#What a limit can be keyed by: name: function(request, view kwargs) -> identifier or None
+IDENTIFIERS = {
+    'ip': lambda request, kwargs: client_ip(request) or None,
+    'user': lambda request, kwargs: request.user.pk if request.user.is_authenticated else None,
+    'item': lambda request, kwargs: kwargs.get('item_id'),
+    'username': lambda request, kwargs: request.POST.get('username', '').strip().lower() or None,
+}
+
+
+class Counter:  #pylint: disable=too-many-instance-attributes
+    """
+    The current and previous window counters of one limit for one identifier.
+    """
+    #pylint: disable-next=too-many-arguments, too-many-positional-arguments
+    def __init__(self, scope, name, identifier, rate, now):
+        self.name = name
+        self.limit, self.window = parse_rate(rate)
+        index = int(now // self.window)
+        self.elapsed = now - index * self.window
+        #Identifiers are hashed, usernames may contain characters memcached rejects
+        digest = hashlib.md5(str(identifier).encode('utf-8'), usedforsecurity=False).hexdigest()
+        prefix = f'throttle:{scope}:{name}:{digest}:{self.window}'
+        self.current_key = f'{prefix}:{index}'
+        self.previous_key = f'{prefix}:{index - 1}'
+        self.current = self.previous = 0
+
+    @property
+    def estimate(self):
+        """Requests in the sliding window ending now."""
+        overlap = (self.window - self.elapsed) / self.window
+        return self.previous * overlap + self.current
+
+    @property
+    def exceeded(self):
+        """True when the request is over the limit."""
+        return self.estimate > self.limit
+
+    def retry_after(self):
+        """Seconds until the sliding window is back under the limit."""
+        remaining = self.window - self.elapsed
+        if self.current > self.limit:
+            #The current count has to decay as the previous window of the next one
+            wait = remaining + self.window * (1 - self.limit / self.current)
+        else:
+            wait = remaining - (self.limit - self.current) * self.window / self.previous
+        return max(math.ceil(wait), 1)
+
+
+def _cache():
+    return caches[_setting('THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def _count_redis(cache, counters):
+    #INCR, EXPIRE and GET of every counter in one pipelined round-trip
+    keys = [(cache.make_and_validate_key(counter.current_key),
+             cache.make_and_validate_key(counter.previous_key)) for counter in counters]
+    client = cache._cache.get_client(keys[0][0], write=True)  #pylint: disable=protected-access
+    pipeline = client.pipeline(transaction=False)
+    for counter, (current, previous) in zip(counters, keys):
+        pipeline.incr(current)
+        pipeline.expire(current, 2 * counter.window)
+        pipeline.get(previous)
+    results = pipeline.execute()
+    for position, counter in enumerate(counters):
+        counter.current = int(results[3 * position])
+        counter.previous = int(results[3 * position + 2] or 0)
+
+
+def _count_generic(cache, counters):
+    #Two round-trips for all counters; not atomic, a concurrent request can lose an increment
+    found = cache.get_many([key for counter in counters
+                            for key in (counter.current_key, counter.previous_key)])
+    for counter in counters:
+        counter.current = found.get(counter.current_key, 0) + 1
+        counter.previous = found.get(counter.previous_key, 0)
+    #One timeout for the batch, window indexes in the keys keep longer-lived counters apart
+    cache.set_many({counter.current_key: counter.current for counter in counters},
+                   2 * max(counter.window for counter in counters))
+
+
+def count(counters):
+    """
+    Increment the current window of every counter and read the previous one.
+    """
+    if not counters:
+        return
+    cache = _cache()
+    if isinstance(cache, RedisCache):
+        _count_redis(cache, counters)
+    else:
+        _count_generic(cache, counters)
+
+
+def check(scope, request, view_kwargs, now=None):
+    """
+    Count the request against the limits of scope. Returns None when it is
+    allowed, otherwise the number of seconds the client has to wait.
+    """
+    if not _setting('THROTTLE_ENABLED', True):
+        return None
+    now = time.time() if now is None else now
+    counters = []
+    for name, rate in _setting('THROTTLE_RATES', {}).get(scope, {}).items():
+        identifier = IDENTIFIERS[name](request, view_kwargs)
+        if identifier is not None:
+            counters.append(Counter(scope, name, identifier, rate, now))
+    if counters and isinstance(_cache(), (LocMemCache, DummyCache)):
+        logger.error('Refused %s request by %s: THROTTLE_CACHE_ALIAS is not shared by the '
+                     'workers, configure a shared cache', scope, client_ip(request))
+        return max(counter.window for counter in counters)
+    count(counters)
+
+    exceeded = [counter for counter in counters if counter.exceeded]
+    if not exceeded:
+        return None
+    logger.warning('Throttled %s request by %s: %s limit exceeded',
+                   scope, client_ip(request), ', '.join(counter.name for counter in exceeded))
+    return max(counter.retry_after() for counter in exceeded)
+
+
+def too_many_requests(retry_after):
+    """
+    Return the 429 response telling the client when to come back.
+    """
+    response = HttpResponse(
+        f'Too many requests. Please try again in {retry_after} seconds.',
+        status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def throttle(scope, methods=('POST',)):
+    """
+    Limit a view with the THROTTLE_RATES of scope. Only requests with one of
+    the methods count, so showing a form is never throttled.
+    Works on sync and async views.
+    """
+    def decorator(view_func):
+        if asyncio.iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = await sync_to_async(check)(scope, request, kwargs)
+                    if retry_after:
+                        return too_many_requests(retry_after)
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check(scope, request, kwargs)
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,155 @@
+"""
+Thumbnail (derivative image) pipeline for item images.
+When an item image is saved, fixed-size WebP and JPEG thumbnails are produced
+by a background worker and stored next to the original, e.g.
+images/bike.jpg -> images/bike.card.webp and images/bike.card.jpg.
+Item.thumbnails_ready tells the templates when they can be served.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import Item
+from .routers import primary
+
+logger = logging.getLogger(__name__)
+
+#File extension and Pillow format name of every derivative format
+FORMATS = {
+    'webp': ('webp', 'WEBP'),
+    'jpeg': ('jpg', 'JPEG'),
+}
+
+#Sent with item_ids after update() flags items ready, which sends no post_save
+thumbnails_generated = Signal()
+
+_executor = None
+
+
+def get_sizes():
+    """
+    Return the configured thumbnail sizes as {name: (width, height)}.
+    """
+    return getattr(settings, 'THUMBNAIL_SIZES', {'card': (400, 300)})
+
+
+def thumbnail_name(name, size_name, fmt):
+    """
+    Return the storage name of a derivative stored next to the original image.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size_name}.{FORMATS[fmt][0]}'
+
+
+def thumbnail_names(name):
+    """
+    Return the storage names of every derivative of an original image.
+    """
+    return [
+        thumbnail_name(name, size_name, fmt)
+        for size_name in get_sizes() for fmt in FORMATS
+    ]
+
+
+def _render(image, size, pillow_format):
+    thumb = ImageOps.fit(image, size, Image.LANCZOS)
+    buffer = BytesIO()
+    thumb.save(buffer, pillow_format, quality=getattr(settings, 'THUMBNAIL_QUALITY', 80))
+    return buffer.getvalue()
+
+
+def generate_thumbnails(item_id):
+    """
+    Produce every derivative of the item's current image and mark the item ready.
+    Returns True when the thumbnails were stored.
+    """
+    with primary():  #the item was committed a moment ago, a replica may not have it yet
+        item = Item.objects.filter(id=item_id).only('id', 'image').first()
+    if item is None or not item.image:
+        return False
+    name = item.image.name
+    storage = item.image.storage
+
+    try:
+        with storage.open(name, 'rb') as original:
+            image = Image.open(original)
+            #Phone photos are often stored sideways with an EXIF rotation flag
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, UnidentifiedImageError, ValueError):
+        logger.warning('Could not read image %s of item %s', name, item_id, exc_info=True)
+        return False
+
+    for size_name, size in get_sizes().items():
+        for fmt, (_, pillow_format) in FORMATS.items():
+            target = thumbnail_name(name, size_name, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(_render(image, size, pillow_format)))
+
+    #Flag every item still using this image (it can be shared, see blobs.py),
+    #not the ones whose image was replaced while we were working
+    with primary():
+        waiting = list(Item.objects.filter(
+            image=name, thumbnails_ready=False).values_list('id', flat=True))
+    if Item.objects.filter(id__in=waiting, image=name).update(
+            thumbnails_ready=True, updated_at=timezone.now()):
+        thumbnails_generated.send(sender=Item, item_ids=waiting)
+    return True
+
+
+def thumbnails_exist(name):
+    """
+    True when the thumbnails of a stored image were generated for another item.
+    """
+    return Item.objects.filter(image=name, thumbnails_ready=True).exists()
+
+
+def _run(item_id):
+    #The worker threads have their own DB connections which must not go stale
+    close_old_connections()
+    try:
+        generate_thumbnails(item_id)
+    except Exception:  #pylint: disable=broad-exception-caught
+        logger.exception('Thumbnail generation failed for item %s', item_id)
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor  #pylint: disable=global-statement
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2),
+            thread_name_prefix='thumbnails')
+    return _executor
+
+
+def wait_for_pending():
+    """
+    Block until every queued thumbnail job has finished, e.g. before a
+    benchmark tears down its database.
+    """
+    global _executor  #pylint: disable=global-statement
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def schedule_thumbnails(item):
+    """
+    Queue thumbnail generation for the item once the current transaction commits.
+    With THUMBNAIL_ASYNC disabled the thumbnails are generated inline instead.
+    """
+    if not item.image:
+        return
+    item_id = item.pk
+    if getattr(settings, 'THUMBNAIL_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run, item_id))
+    else:
+        transaction.on_commit(lambda: generate_thumbnails(item_id))
@@ -0,0 +1,242 @@
+"""
+Bulk item import and export in CSV or JSON Lines.
+Both directions stream: import reads one row at a time and handles a fixed-size
+chunk at once (owner lookup, concurrent image uploads into the content-addressed
+store of blobs.py, one bulk_create), and
+export walks the table with .iterator(), so memory stays flat for any file
+size. Import writes a checkpoint after every committed chunk so an interrupted
+run can be resumed where it stopped.
+"""
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+from .blobs import acquire, save_blob
+from .caching import PAGES_ALL, bump
+from .models import Item
+
+#Columns of an import or export file, owner is the owner's username
+FIELDS = ('owner', 'title', 'description', 'quantity', 'image', 'posted_at')
+
+FORMATS = ('csv', 'jsonl')
+
+
+class RowError(ValueError):
+    """
+    A row that cannot be imported.
+    """
+
+
+def detect_format(path):
+    """
+    Guess the format from the file extension, CSV unless it is .jsonl/.ndjson.
+    """
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """
+    Yield the rows of an import file as dicts, one at a time, and a RowError
+    in place of a JSON Lines line that is not a JSON object.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield RowError(f'invalid JSON: {error}')
+                continue
+            yield row if isinstance(row, dict) else RowError('not a JSON object')
+
+
+def parse_posted_at(value):
+    """
+    Return the datetime of a posted_at column, None when it is empty.
+    """
+    if not value:
+        return None
+    try:
+        posted_at = parse_datetime(value)
+    except (TypeError, ValueError) as error:  #well-formed but impossible, e.g. month 13
+        raise RowError(f'invalid posted_at {value!r}') from error
+    if posted_at is None:
+        raise RowError(f'invalid posted_at {value!r}')
+    return posted_at
+
+
+def read_checkpoint(path):
+    """
+    Return the number of rows a previous run has already imported.
+    """
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as checkpoint:
+        return json.load(checkpoint)['rows']
+
+
+def write_checkpoint(path, rows):
+    """
+    Record that the first `rows` rows are imported; replaced atomically.
+    """
+    if not path:
+        return
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as checkpoint:
+        json.dump({'rows': rows}, checkpoint)
+    os.replace(temporary, path)
+
+
+def _upload(image_root, name):
+    #Runs in a worker thread which has its own DB connection
+    close_old_connections()
+    try:
+        with open(os.path.join(image_root, name), 'rb') as source:
+            return save_blob(File(source, name=os.path.basename(name)))
+    finally:
+        close_old_connections()
+
+
+def upload_images(names, image_root, workers):
+    """
+    Upload the local image files (relative to image_root) concurrently to the
+    item image storage and return {name: (stored name, digest) or exception}.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-images') as pool:
+        futures = {name: pool.submit(_upload, image_root, name) for name in names}
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except OSError as error:
+            results[name] = error
+    return results
+
+
+def build_item(row, owners, images):
+    """
+    Turn one row into an unsaved Item, raising RowError when it is invalid.
+    """
+    if isinstance(row, RowError):
+        raise row
+    owner = owners.get(row.get('owner'))
+    if owner is None:
+        raise RowError(f"unknown owner {row.get('owner')!r}")
+    title = (row.get('title') or '').strip()
+    if not title:
+        raise RowError('title is required')
+    try:
+        quantity = int(row.get('quantity') or 1)
+    except (TypeError, ValueError) as error:
+        raise RowError(f"invalid quantity {row.get('quantity')!r}") from error
+    if quantity <= 0:
+        raise RowError('quantity must be a positive integer')
+
+    image, digest = row.get('image') or '', ''
+    if image in images:
+        if isinstance(images[image], Exception):
+            raise RowError(f'image {image!r}: {images[image]}')
+        image, digest = images[image]
+
+    item = Item(owner_id=owner, title=title, description=row.get('description') or '',
+                quantity=quantity, image=image, image_digest=digest)
+    item.imported_posted_at = parse_posted_at(row.get('posted_at'))
+    return item
+
+
+def import_chunk(rows, image_root=None, workers=4):  #pylint: disable=too-many-locals
+    """
+    Import one chunk of rows in a single transaction.
+    Returns (created count, [(row offset in chunk, error message)]).
+    """
+    valid = [row for row in rows if not isinstance(row, RowError)]
+    usernames = {row.get('owner') for row in valid}
+    owners = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+    images = {}
+    if image_root:
+        images = upload_images(
+            {row['image'] for row in valid if row.get('image')}, image_root, workers)
+
+    items, errors = [], []
+    for offset, row in enumerate(rows):
+        try:
+            items.append(build_item(row, owners, images))
+        except RowError as error:
+            errors.append((offset, str(error)))
+
+    with transaction.atomic():
+        Item.objects.bulk_create(items)
+        #posted_at is auto_now_add, so imported dates are applied afterwards
+        dated = [item for item in items if item.imported_posted_at]
+        for item in dated:
+            item.posted_at = item.imported_posted_at
+        if dated:
+            Item.objects.bulk_update(dated, ['posted_at'])
+        #Count the references to the uploaded images, one per created item
+        uses = Counter((item.image.name, item.image_digest) for item in items if item.image_digest)
+        for (name, digest), count in uses.items():
+            acquire(name, digest, count)
+    return len(items), errors
+
+
+#pylint: disable-next=too-many-arguments, too-many-positional-arguments
+def import_items(stream, fmt, batch_size=500, image_root=None, workers=4, checkpoint=None):
+    """
+    Import every row of the stream, chunk by chunk, resuming after the rows
+    recorded in the checkpoint file. Yields (rows done, created, errors) after
+    each chunk so callers can report progress.
+    """
+    done = read_checkpoint(checkpoint)
+    rows = read_rows(stream, fmt)
+    for _ in islice(rows, done):  #rows of a previous run
+        pass
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        created, errors = import_chunk(chunk, image_root, workers)
+        errors = [(done + offset + 1, message) for offset, message in errors]
+        done += len(chunk)
+        write_checkpoint(checkpoint, done)
+        #bulk_create sends no post_save, so the cached feed pages are evicted here
+        if created:
+            bump(PAGES_ALL)
+        yield done, created, errors
+
+
+def export_rows(queryset=None, chunk_size=2000):
+    """
+    Yield every item as a dict with the FIELDS columns, streaming from the database.
+    """
+    queryset = Item.objects.all() if queryset is None else queryset
+    values = queryset.order_by('id').values_list(
+        'owner__username', 'title', 'description', 'quantity', 'image', 'posted_at')
+    for owner, title, description, quantity, image, posted_at in values.iterator(chunk_size):
+        yield {
+            'owner': owner, 'title': title, 'description': description,
+            'quantity': quantity, 'image': image or '', 'posted_at': posted_at.isoformat(),
+        }
+
+
+def write_rows(rows, stream, fmt):
+    """
+    Write rows to the stream as CSV or JSON Lines and return how many were written.
+    """
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+        return count
+    for count, row in enumerate(rows, 1):
+        stream.write(json.dumps(row) + '\n')
+    return count
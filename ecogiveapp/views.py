@@ -3,24 +3,38 @@ Views for the EcoGive application.
 This module contains views for handling user registration, login, logout,
 as well as item management (adding, editing, deleting), user dashboard, item inquiries.
 """
-from smtplib import SMTPException
-from django.core.mail import EmailMessage
-from django.core.mail import BadHeaderError
 from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 #from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
-from django.conf import settings
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_POST, require_http_methods
 from .models import Item
 from .forms import RegistrationForm
+from .instrumentation import store as performance_store
+from .blobs import acquire, release, store_image
+from .direct_uploads import (
+    LocalPresigner, UploadError, check_policy, get_presigner, max_upload_bytes, new_key,
+    verify_upload)
+from .caching import cache_anonymous_page, card_cache_ttl, remember_page_items
+from .cards import CARD_FIELDS, prepare_cards
+from .inquiries import record_inquiry, set_digest, wants_digest
+from .pagination import KeysetPaginator, RankedPaginator
+from .query_budgets import query_budget
+from .search import get_search_backend
+from .thumbnails import schedule_thumbnails, thumbnails_exist
+from .throttling import throttle
 
 #For User Registration
+@query_budget(4)
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #GET is needed for form rendering, POST is for submission
 def register(request):
@@ -59,8 +73,10 @@ def register(request):
     return render(request, 'register.html', {'form': form})
 
 #For User login
+@query_budget(9)
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #GET is needed for form rendering, POST is for submission
+@throttle('login') #limits password checks per IP and username
 def user_login(request):
     """
     This is user login function and will redirect to user dashboard after successful login.
@@ -78,6 +94,7 @@ def user_login(request):
     return render(request, 'login.html')
 
 #For User logout
+@query_budget(4)
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #GET is needed for form rendering, POST is for submission
 def user_logout(request):
@@ -87,7 +104,21 @@ def user_logout(request):
     logout(request)
     return redirect('login')
 
+def _store_submitted_image(request):
+    """
+    Store the photo of the add/edit form, either posted with the form or
+    uploaded directly to storage beforehand (upload_key).
+    Returns (storage name, digest, True if the image was already in use).
+    """
+    upload_key = request.POST.get('upload_key', '').strip()
+    if upload_key:
+        verify_upload(upload_key, request.user)
+        #Direct uploads never pass through Django, so they are not hashed
+        return upload_key, '', acquire(upload_key, '')
+    return store_image(request.FILES['image'])
+
 #For new item addition
+@query_budget(10)
 @login_required  #User needs to login first to add a new item
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #GET is needed for form rendering, POST is for submission
@@ -100,8 +131,9 @@ def add_item(request):
         description = request.POST['description']
         quantity = request.POST['quantity']
         image = request.FILES.get('image')  #Get the uploaded image
+        upload_key = request.POST.get('upload_key')  #or the key of a direct upload
 
-        if not image:
+        if not image and not upload_key:
             messages.error(request, "Image is required.")
             return render(request, 'add_item.html')
 
@@ -111,16 +143,21 @@ def add_item(request):
             if quantity <= 0:
                 raise ValueError("Quantity must be a positive integer.")
 
-            #The variable 'item' is not explicitly used after being created
-            # but it is needed to add the item to the database. Therefore, the 'item' variable
-            # might seem no-member and unused to pylint and it is false positive.
-            item = Item.objects.create( #pylint: disable=no-member, unused-variable
-                title=title,
-                description=description,
-                quantity=quantity,
-                image=image,  #Save the image field
-                owner=request.user
-            )
+            with transaction.atomic():
+                #Each distinct photo is stored once, see blobs.py
+                name, digest, already_stored = _store_submitted_image(request)
+                item = Item.objects.create( #pylint: disable=no-member
+                    title=title,
+                    description=description,
+                    quantity=quantity,
+                    image=name,  #Save the image field
+                    image_digest=digest,
+                    thumbnails_ready=already_stored and thumbnails_exist(name),
+                    owner=request.user
+                )
+            #Thumbnails are produced in the background after the item is committed
+            if not item.thumbnails_ready:
+                schedule_thumbnails(item)
             messages.success(request, 'Item added successfully!')
             return redirect('dashboard')
 
@@ -135,6 +172,7 @@ def add_item(request):
     return render(request, 'add_item.html')
 
 #For Editing an Item
+@query_budget(15)
 @login_required #Only authenticated users to edit their existing item
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #fix after sonar-scan
@@ -149,13 +187,24 @@ def edit_item(request, item_id):
         item.quantity = request.POST['quantity']
 
         #Handling the image replacement
-        if 'image' in request.FILES:
-            if item.image:
-                #Delete the old image from S3 before updating
-                item.image.delete(save=False)
-            item.image = request.FILES['image']
-
-        item.save()
+        image_replaced = 'image' in request.FILES or bool(request.POST.get('upload_key'))
+        with transaction.atomic():
+            if image_replaced:
+                #Count the new image before letting go of the old one, they may be the same
+                try:
+                    name, digest, already_stored = _store_submitted_image(request)
+                except UploadError as e:
+                    messages.error(request, f'Invalid image: {e}')
+                    return render(request, 'edit_item.html', {'item': item})
+                if item.image:
+                    #Removed later by purge_storage once no other item uses it
+                    release(item.image.name)
+                item.image = name
+                item.image_digest = digest
+                item.thumbnails_ready = already_stored and thumbnails_exist(name)
+            item.save()
+        if image_replaced and not item.thumbnails_ready:
+            schedule_thumbnails(item)
 
         #Add a success message and redirect to avoid form resubmission
         messages.success(request, 'Item updated successfully!')
@@ -165,6 +214,7 @@ def edit_item(request, item_id):
 
 
 #For Deleting an Item
+@query_budget(8)
 @login_required
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #fix after sonar-scan
@@ -174,9 +224,8 @@ def delete_item(request, item_id):
     """
     item = get_object_or_404(Item, id=item_id, owner=request.user)
     if request.method == 'POST':
-        #Delete the image from S3 before deleting the item
-        if item.image:
-            item.image.delete(save=False)
+        #Deleting releases the image (signals.py), purge_storage removes it from S3
+        #later if no other item uses it
         item.delete()
         messages.success(request, 'Item deleted successfully!')
         return redirect('dashboard')
@@ -184,14 +233,17 @@ def delete_item(request, item_id):
     return render(request, 'delete_item.html', {'item': item})
 
 #For item inquiry
+@query_budget(5)
 @csrf_protect #fix after sonar-scan
 @require_http_methods(["GET", "POST"]) #fix after sonar-scan
+@throttle('inquiry') #every inquiry is an email on our quota
 def inquire_item(request, item_id):
     """
     This is for inquiry function while user wants to ask something to item owner
     about the listed item on EcoGive site.
     """
-    item = get_object_or_404(Item, id=item_id)
+    item = get_object_or_404(
+        Item.objects.select_related('owner', 'owner__inquiry_preference'), id=item_id)
     if request.method == 'POST':
         email = request.POST.get('email').strip()  #Get the user's email from the form
         message = request.POST.get('message').strip()
@@ -201,58 +253,41 @@ def inquire_item(request, item_id):
             messages.error(request, "Email is required to send an inquiry.")
             return render(request, 'inquire_item.html', {'item': item})
 
-        #Prepare the email message content
-        inquiry_message = f"""
-        You have a new inquiry as below:
-        
-        Message:
-        {message}
-        """
-
-        try:
-            #Create an email message with reply-to header
-            email_message = EmailMessage(
-                subject=f'Inquiry about {item.title}',
-                body=inquiry_message,
-                #Use the default sender email from settings.py
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[item.owner.email],  #Send to item owner
-                reply_to=[email],  #Set reply-to to the user's email
-            )
-            email_message.send(fail_silently=False)
-
-            messages.success(request, 'Inquiry sent successfully.')
-
-        #handling the possible exceptions
-        except BadHeaderError as e:
-            messages.error(request, f'Invalid header found: {e}')
-        except SMTPException as e:
-            messages.error(request, f'Failed to send email: {e}')
-        except ValueError as e:
-            messages.error(request, f'Invalid email address: {e}')
-        except ConnectionError as e:
-            messages.error(request, f'Failed to connect to the email server: {e}')
+        #Stored and queued in the outbox (or kept for the owner's digest), the
+        #request does not wait for the SMTP server
+        record_inquiry(item, email, message)
+        messages.success(request, 'Inquiry sent successfully.')
 
         return redirect('item_list')
 
     return render(request, 'inquire_item.html', {'item': item})
 
 #For home page view
+@query_budget(2)
 @csrf_protect #fix after sonar-scan
+@cache_anonymous_page #whole page cached for anonymous visitors until an item on it changes
 def home(request):
     """
     This is home page view with search query function for filtered view
     """
-    query = request.GET.get('query', '')
-    if query:   #filtered items based on a search query
-        items = Item.objects.filter(title__icontains=query).order_by('-posted_at')
+    query = request.GET.get('query', '').strip()
+    if query:   #filtered items based on a search query, best match first
+        backend = get_search_backend()
+        page = RankedPaginator(
+            lambda offset, limit: backend.search(query, offset, limit)).get_page(request)
     else:   #Displays the home page with all items
-        items = Item.objects.all().order_by('-posted_at')
+        page = KeysetPaginator(Item.objects.only(*CARD_FIELDS)).get_page(request)
 
-    return render(request, 'home.html', {'items': items})
+    #Image URLs and card versions in one cache round-trip each, card values once per item
+    prepare_cards(page.object_list)
+    remember_page_items(request, page.object_list)
+    return render(request, 'home.html', {
+        'items': page.object_list, 'page': page, 'card_ttl': card_cache_ttl()})
 
 #For item list view
+@query_budget(3)
 @csrf_protect #fix after sonar-scan
+@cache_anonymous_page #anonymous visitors always get the public list
 def item_list(request):
     """
     Check if query parameter "all=true" is set to show all items and 
@@ -261,29 +296,106 @@ def item_list(request):
     all_items = request.GET.get('all', 'false').lower() == 'true'
 
     if all_items or not request.user.is_authenticated:
-        items = Item.objects.all().order_by('-posted_at')  #Show all items for public users
+        items = Item.objects.only(*CARD_FIELDS)  #Show all items for public users
     else:
         #Show only the logged-in user's items
-        items = Item.objects.filter(owner=request.user).order_by('-posted_at')
+        items = Item.objects.only(*CARD_FIELDS).filter(owner=request.user)
 
-    return render(request, 'item_list.html', {'items': items})
+    page = KeysetPaginator(items).get_page(request)
+    prepare_cards(page.object_list)
+    remember_page_items(request, page.object_list)
+    return render(request, 'item_list.html', {
+        'items': page.object_list, 'page': page, 'card_ttl': card_cache_ttl()})
 
 
 #Dashboard for registered users
+@query_budget(4)
 @csrf_protect #fix after sonar-scan
 @login_required
 def dashboard(request):
     """
     Display the user's dashboard with a list of items owned by the user.
     """
-    user_items = Item.objects.filter(owner=request.user).order_by('-posted_at')
-    return render(request, 'dashboard.html', {'items': user_items})
+    user_items = Item.objects.only(*CARD_FIELDS).filter(owner=request.user)
+    page = KeysetPaginator(user_items).get_page(request)
+    prepare_cards(page.object_list, owned=True)
+    return render(request, 'dashboard.html', {
+        'items': page.object_list, 'page': page, 'card_ttl': card_cache_ttl(),
+        'inquiry_digest': wants_digest(request.user)})
+
+#Inquiry email preference of an owner
+@query_budget(8)
+@login_required
+@csrf_protect #fix after sonar-scan
+@require_POST
+def inquiry_preferences(request):
+    """
+    Switch between one email per inquiry (default) and the inquiry digest.
+    """
+    digest = request.POST.get('digest') == 'on'
+    set_digest(request.user, digest)
+    if digest:
+        messages.success(request, 'Inquiries will be emailed to you as a digest.')
+    else:
+        messages.success(request, 'Each inquiry will be emailed to you right away.')
+    return redirect('dashboard')
 
 #View Item Detail Displays for an individual item
+@query_budget(1)
 @csrf_protect #fix after sonar-scan
 def view_item_detail(request, item_id):
     """
     Display detailed information for a specific item.
     """
-    item = get_object_or_404(Item, id=item_id)
+    item = get_object_or_404(Item.objects.only(*CARD_FIELDS), id=item_id)
     return render(request, 'item_detail.html', {'item': item})
+
+#For direct-to-storage image uploads
+@query_budget(2)
+@login_required
+@csrf_protect #fix after sonar-scan
+@require_POST
+def presign_upload(request):
+    """
+    Issue an upload target for a photo the browser sends straight to storage.
+    """
+    content_type = request.POST.get('content_type', '')
+    try:
+        size = int(request.POST.get('size', ''))
+        key = new_key(request.user, content_type)
+    except ValueError as e:  #UploadError is a ValueError too
+        return JsonResponse({'error': str(e)}, status=400)
+    if not 0 < size <= max_upload_bytes():
+        return JsonResponse({'error': 'The image is too large.'}, status=400)
+    return JsonResponse(get_presigner().presign(key, content_type))
+
+#Local stand-in for the storage endpoint of a presigned POST
+@query_budget(0)
+@csrf_exempt #authorized by the signed policy, like S3
+@require_POST
+def local_upload(request):
+    """
+    Accept a presigned POST when LocalPresigner is the upload backend.
+    """
+    presigner = get_presigner()
+    if not isinstance(presigner, LocalPresigner):
+        return HttpResponse(status=404)
+    key = request.POST.get('key', '')
+    upload = request.FILES.get('file')
+    try:
+        check_policy(request.POST.get('policy', ''), key, request.POST.get('Content-Type'),
+                     upload.size if upload else 0)
+    except UploadError as e:
+        return HttpResponse(str(e), status=403, content_type='text/plain')
+    presigner.storage.save(key, upload)
+    return HttpResponse(status=204)
+
+#Performance report for staff, filled by PerformanceMiddleware
+@query_budget(2)
+@staff_member_required
+def performance_report(request):  #pylint: disable=unused-argument
+    """
+    Show the slowest routes and repeated-query (N+1) patterns seen by this process.
+    """
+    limit = getattr(settings, 'PERF_SLOWEST_ROUTES', 10)
+    return JsonResponse(performance_store.report(limit))
@@ -0,0 +1,122 @@
+"""
+Worker warm-up.
+The first requests of a fresh worker pay for work that every later request
+reuses: importing the views, resolving the URLconf, compiling templates,
+creating the storage's boto3 client, decompressing the common password list
+of CommonPasswordValidator and opening the database. warm_up() does all of
+it up front. EcoGive/wsgi.py and EcoGive/asgi.py call warm_up_on_startup()
+once the application is loaded, when DJANGO_WARMUP=true. The Procfile starts
+gunicorn with --preload, so that happens in the master and the forked
+workers share the result copy-on-write, and gc.freeze() keeps the collector
+from touching (and copying) those pages. Without --preload every worker
+warms itself up before its first request.
+"""
+import gc
+import logging
+import time
+from importlib import import_module
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+#Modules imported on the first request otherwise
+MODULES = (
+    'ecogiveapp.views', 'ecogiveapp.async_views', 'ecogiveapp.api', 'ecogiveapp.admin',
+    'ecogiveapp.forms', 'ecogiveapp.static_assets',
+)
+
+
+def _import_modules():
+    for name in MODULES:
+        import_module(name)
+
+
+def _resolve_urls():
+    #Builds the reverse lookup tables of every pattern, admin included
+    resolver = get_resolver()
+    resolver.resolve('/')
+    return len(resolver.reverse_dict)
+
+
+def template_names():
+    """
+    Return the names of the templates of the ecogiveapp app.
+    """
+    directory = Path(apps.get_app_config('ecogiveapp').path) / 'templates'
+    return sorted(str(path.relative_to(directory)) for path in directory.rglob('*.html'))
+
+
+def _compile_templates():
+    #Stored in the cached template loader of the engine
+    for name in template_names():
+        get_template(name)
+    return len(template_names())
+
+
+def _load_password_validators():
+    #CommonPasswordValidator reads and decompresses its list when created
+    return len(get_default_password_validators())
+
+
+def _create_storage_client():
+    from .models import Item  #pylint: disable=import-outside-toplevel
+    storage = Item.image_storage()
+    #S3Boto3Storage creates the boto3 session, resource and client lazily
+    getattr(storage, 'connection', None)
+    #Building a (signed) URL loads the endpoint and signing configuration, no request is sent
+    storage.url('images/warm-up.jpg')
+
+
+def _open_databases(keep_open):
+    for alias in settings.DATABASES:
+        connections[alias].ensure_connection()
+    if not keep_open:
+        #A forked worker must never reuse a connection of its parent
+        connections.close_all()
+
+
+def warm_up(keep_connections=False):
+    """
+    Run every warm-up step and return {step: milliseconds}. A failing step
+    is logged and skipped, warm-up never stops a worker from starting.
+    With keep_connections the opened database connections stay open;
+    leave it off when the process forks workers afterwards.
+    """
+    steps = [
+        ('imports', _import_modules),
+        ('urls', _resolve_urls),
+        ('templates', _compile_templates),
+        ('password validators', _load_password_validators),
+        ('storage client', _create_storage_client),
+        ('databases', lambda: _open_databases(keep_connections)),
+    ]
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:  #pylint: disable=broad-exception-caught
+            logger.warning('Warm-up step %s failed', name, exc_info=True)
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    return timings
+
+
+def warm_up_on_startup():
+    """
+    Warm up when WARMUP_ON_STARTUP is on, then freeze the warmed objects with
+    gc.freeze() unless WARMUP_GC_FREEZE is off.
+    """
+    if not getattr(settings, 'WARMUP_ON_STARTUP', False):
+        return None
+    timings = warm_up(keep_connections=False)
+    if getattr(settings, 'WARMUP_GC_FREEZE', True):
+        gc.collect()
+        gc.freeze()
+    logger.info('Warm-up took %.1f ms: %s', sum(timings.values()), timings)
+    return timings
@@ -0,0 +1,33 @@
+"""
+Shared pytest fixtures for the EcoGive tests
+"""
+import pytest
+from django.core.cache import caches
+
+#budget_data and assert_query_budget fixtures
+pytest_plugins = ['ecogiveapp.query_budget_plugin']
+
+@pytest.fixture(autouse=True)
+def local_media_storage(settings, tmp_path):
+    """
+    Store uploaded media in a temporary directory instead of the S3 bucket
+    """
+    settings.DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.MEDIA_URL = '/media/'
+    return settings.MEDIA_ROOT
+
+@pytest.fixture(autouse=True)
+def plain_static_storage(settings):
+    """
+    Link static files by their source names so tests need no collectstatic manifest
+    """
+    settings.STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    """
+    Start every test with empty caches so cached pages do not leak between tests
+    """
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,147 @@
+"""
+This is test functions with pytest for the Item admin on large catalogues
+"""
+import pytest
+from django.contrib.admin import helpers
+from django.contrib.admin.models import DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ecogiveapp import admin as item_admin
+from ecogiveapp.models import ImageBlob, Inquiry, Item, PendingDeletion
+
+def make_items(count, owner=None, **fields):
+    """
+    Items of one owner
+    """
+    owner = owner or User.objects.create_user(username=f'owner{count}', password='P@ssw0rd123')
+    return [Item.objects.create(title=f'Chair {n}', description='Wooden chair', owner=owner,
+                                **fields) for n in range(count)]
+
+def delete_selected(client, items):
+    """
+    Confirm the delete action for the items
+    """
+    return client.post(reverse('admin:ecogiveapp_item_changelist'), {
+        'action': 'delete_selected', 'post': 'yes',
+        helpers.ACTION_CHECKBOX_NAME: [item.id for item in items]})
+
+##Test for the changelist not counting the whole table
+@pytest.mark.django_db
+def test_changelist_uses_the_estimated_count(admin_client, settings):
+    """
+    This is test function with pytest for EstimatedCountPaginator
+    """
+    settings.ADMIN_EXACT_COUNT_LIMIT = 5
+    make_items(12)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    url = reverse('admin:ecogiveapp_item_changelist')
+
+    with CaptureQueriesContext(connection) as captured:
+        response = admin_client.get(url)
+    assert response.status_code == 200
+    assert response.context['cl'].result_count == 12
+    assert not [query for query in captured if 'COUNT(' in query['sql'].upper()
+                and 'ecogiveapp_item' in query['sql']]
+
+    #Filtered changelists are counted exactly
+    owner = User.objects.get(username='owner12')
+    response = admin_client.get(url, {'owner': owner.id})
+    assert response.context['cl'].result_count == 12
+    assert f'?owner={owner.id}' in response.content.decode()
+
+##Test for the owner field of the change form
+@pytest.mark.django_db
+def test_change_form_has_no_user_select(admin_client):
+    """
+    This is test function with pytest for raw_id_fields on the owner
+    """
+    item = make_items(1)[0]
+    for n in range(20):
+        User.objects.create_user(username=f'extra{n}', password='P@ssw0rd123')
+    url = reverse('admin:ecogiveapp_item_change', args=[item.id])
+    html = admin_client.get(url).content.decode()
+    assert 'vForeignKeyRawIdAdminField' in html
+    assert 'extra19' not in html
+
+##Test for search through the search index
+@pytest.mark.django_db
+def test_search_uses_the_search_backend(admin_client):
+    """
+    This is test function with pytest for admin search and id lookups
+    """
+    items = make_items(3)
+    Item.objects.create(title='Lamp', description='Desk lamp', owner=items[0].owner)
+    url = reverse('admin:ecogiveapp_item_changelist')
+
+    found = admin_client.get(url, {'q': 'lamp'}).context['cl'].result_list
+    assert [item.title for item in found] == ['Lamp']
+    lamp = Item.objects.get(title='Lamp')
+    found = admin_client.get(url, {'q': str(lamp.id)}).context['cl'].result_list
+    assert [item.id for item in found] == [lamp.id]
+
+##Test for the capped search telling the admin
+@pytest.mark.django_db
+def test_capped_search_says_so(admin_client, monkeypatch):
+    """
+    This is test function with pytest for the ADMIN_SEARCH_LIMIT warning
+    """
+    make_items(3)
+    monkeypatch.setattr(item_admin, 'ADMIN_SEARCH_LIMIT', 2)
+    response = admin_client.get(reverse('admin:ecogiveapp_item_changelist'), {'q': 'chair'})
+    assert len(response.context['cl'].result_list) == 2
+    assert 'Only the best 2 matches are listed' in response.content.decode()
+
+##Test for the batched bulk delete
+@pytest.mark.django_db
+def test_bulk_delete_releases_images_through_the_receivers(admin_client):
+    """
+    This is test function with pytest for the batched delete behind Django's action
+    """
+    admin_client.get(reverse('admin:ecogiveapp_item_changelist'))  #caches request.user
+    queries = []
+    for count in (2, 8):
+        items = make_items(count, image=f'images/shared{count}.jpg')
+        ImageBlob.objects.create(name=f'images/shared{count}.jpg', digest='d', refcount=count + 1)
+        for item in items:
+            Inquiry.objects.create(item=item, owner=item.owner, email='a@example.com', message='?')
+        with CaptureQueriesContext(connection) as captured:
+            assert delete_selected(admin_client, items).status_code == 302
+        #Besides the audit trail of one LogEntry per item
+        queries.append(len([query for query in captured
+                            if 'django_admin_log' not in query['sql']]))
+        assert not Item.objects.filter(owner=items[0].owner).exists()
+        assert LogEntry.objects.filter(
+            action_flag=DELETION, object_id__in=[str(item.id) for item in items]).count() == count
+        #One item still uses the image
+        assert ImageBlob.objects.get(name=f'images/shared{count}.jpg').refcount == 1
+    #Only the image release of the post_delete receiver runs per item, nothing per inquiry
+    assert queries[1] - queries[0] == 8 - 2
+    assert not Inquiry.objects.exists()
+    assert not PendingDeletion.objects.exists()
+
+    last = make_items(1, owner=User.objects.get(username='owner8'), image='images/shared8.jpg')
+    delete_selected(admin_client, last)
+    assert not ImageBlob.objects.filter(name='images/shared8.jpg').exists()
+    assert PendingDeletion.objects.filter(source='images/shared8.jpg', name='images/shared8.jpg')
+
+@pytest.mark.django_db
+def test_delete_asks_for_confirmation_and_thumbnails_regenerate(admin_client):
+    """
+    This is test function with pytest for the confirmation page and the thumbnail action
+    """
+    items = make_items(3, thumbnails_ready=True)
+    url = reverse('admin:ecogiveapp_item_changelist')
+    ids = [item.id for item in items]
+
+    response = admin_client.post(url, {'action': 'delete_selected',
+                                       helpers.ACTION_CHECKBOX_NAME: ids})
+    assert response.status_code == 200
+    assert 'Are you sure?' in response.content.decode()
+    assert Item.objects.count() == 3
+
+    admin_client.post(url, {'action': 'regenerate_thumbnails',
+                            helpers.ACTION_CHECKBOX_NAME: ids[:2]})
+    assert list(Item.objects.filter(thumbnails_ready=True).values_list('id', flat=True)) == [ids[2]]
@@ -0,0 +1,92 @@
+"""
+This is test functions with pytest for the read-only JSON API
+"""
+import json
+from unittest import mock
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ecogiveapp.models import Item
+
+@pytest.fixture(name='items')
+def fixture_items():
+    """
+    Five items of one owner, oldest first
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    return [
+        Item.objects.create(title=f'Chair {n}', description='Wooden', quantity=1, owner=user)
+        for n in range(5)]
+
+def _json(response):
+    return json.loads(b''.join(response.streaming_content))
+
+##Test for cursor pagination and sparse fields of the list API
+@pytest.mark.django_db
+def test_item_list_api_pages_with_sparse_fields(client, items):
+    """
+    This is test function with pytest for the item list API
+    """
+    first = _json(client.get(reverse('item_list_api'), {'limit': 3, 'fields': 'id,title'}))
+    assert first['results'] == [
+        {'id': item.id, 'title': item.title} for item in reversed(items[2:])]
+
+    second = _json(client.get(reverse('item_list_api'), {
+        'limit': 3, 'fields': 'id', 'cursor': first['next']}))
+    assert second == {'results': [{'id': items[1].id}, {'id': items[0].id}], 'next': None}
+
+    assert client.get(reverse('item_list_api'), {'fields': 'password'}).status_code == 400
+
+##Test for conditional GET on the list API
+@pytest.mark.django_db
+def test_unchanged_list_is_not_modified_without_queries(client, items, django_assert_num_queries):
+    """
+    This is test function with pytest for ETag revalidation
+    """
+    response = client.get(reverse('item_list_api'))
+    etag = response['ETag']
+
+    #One aggregate query, no rows
+    with django_assert_num_queries(1):
+        cached = client.get(reverse('item_list_api'), HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+
+    items[0].title = 'Renamed'
+    items[0].save()
+    assert client.get(reverse('item_list_api'), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+##Test for validators shared by every worker
+@pytest.mark.django_db
+def test_validators_change_without_the_writing_process_cache(client, items):
+    """
+    This is test function with pytest for ETags read from the database
+    """
+    list_etag = client.get(reverse('item_list_api'))['ETag']
+    detail = client.get(reverse('item_detail_api', args=[items[1].id]))
+    assert detail.has_header('Last-Modified')
+
+    #Written by another worker: no signal, no cache stamp reaches this process
+    with mock.patch('django.db.models.signals.post_save.send'), \
+            mock.patch('django.db.models.signals.post_delete.send'):
+        Item.objects.filter(id=items[0].id).delete()
+        Item.objects.get(id=items[1].id).save()
+
+    assert client.get(reverse('item_list_api'),
+                      HTTP_IF_NONE_MATCH=list_etag).status_code == 200
+    assert client.get(reverse('item_detail_api', args=[items[1].id]),
+                      HTTP_IF_NONE_MATCH=detail['ETag']).status_code == 200
+
+##Test for the detail and search API
+@pytest.mark.django_db
+def test_item_detail_and_search_api(client, items):
+    """
+    This is test function with pytest for the detail and search API
+    """
+    detail = client.get(reverse('item_detail_api', args=[items[0].id]))
+    assert detail.json()['owner'] == 'testuser1'
+    assert detail.json()['image_url'] == ''
+    assert client.get(reverse('item_detail_api', args=[9999])).status_code == 404
+
+    found = _json(client.get(reverse('item_search_api'), {'query': 'chair 3', 'fields': 'title'}))
+    assert found['results'][0] == {'title': 'Chair 3'}
+    assert client.get(reverse('item_search_api')).status_code == 400
@@ -0,0 +1,145 @@
+"""
+This is test functions with pytest for the async views served under ASGI
+"""
+import importlib.util
+import logging
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.urls import reverse
+from EcoGive import settings as project_settings
+from ecogiveapp import async_views, benchmark
+from ecogiveapp.models import Item, OutboundEmail
+
+def fetch(method, *args, **kwargs):
+    """
+    Run an AsyncClient request from a sync test
+    """
+    async def request():
+        return await method(*args, **kwargs)
+    return async_to_sync(request)()
+
+@pytest.fixture(name='async_urls')
+def fixture_async_urls(settings):
+    """
+    Route the URLs like EcoGive/asgi.py does
+    """
+    settings.ROOT_URLCONF = 'EcoGive.asgi_urls'
+
+@pytest.fixture(name='owner')
+def fixture_owner():
+    """
+    Owner of the test items
+    """
+    return User.objects.create_user(
+        username='testuser1', password='P@ssw0rd123', email='owner@example.com')
+
+##Test for the async URL configuration
+def test_asgi_urls_swap_in_async_views():
+    """
+    This is test function with pytest for the async views replacing the sync ones
+    """
+    from EcoGive import asgi_urls  #pylint: disable=import-outside-toplevel
+    views = {pattern.name: pattern.callback for pattern in asgi_urls.urlpatterns
+             if getattr(pattern, 'name', None)}
+    assert views['home'] is async_views.home
+    assert views['inquire_item'] is async_views.inquire_item
+    assert views['add_item'].__module__ == 'ecogiveapp.views'
+
+##Test for persistent connections being off with the async views
+def test_async_views_disable_persistent_connections(monkeypatch):
+    """
+    This is test function with pytest for CONN_MAX_AGE under ASGI
+    """
+    def load_settings():
+        #A fresh copy, the configured settings module is left alone
+        spec = importlib.util.spec_from_file_location('settings_probe', project_settings.__file__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    monkeypatch.setenv('DJANGO_CONN_MAX_AGE', '600')
+    monkeypatch.setenv('DJANGO_ASYNC_VIEWS', 'false')
+    assert load_settings().DATABASES['default']['CONN_MAX_AGE'] == 600
+    monkeypatch.setenv('DJANGO_ASYNC_VIEWS', 'true')
+    assert load_settings().DATABASES['default']['CONN_MAX_AGE'] == 0
+
+##Test for the feeds and the detail page
+@pytest.mark.django_db
+@pytest.mark.usefixtures('async_urls')
+def test_async_feed_and_detail_pages(async_client, owner, settings, caplog):
+    """
+    This is test function with pytest for home, item_list and view_item_detail
+    """
+    item = Item.objects.create(title='Async chair', description='Wooden', quantity=1, owner=owner)
+    settings.DEBUG = True  #Django only logs adapted middleware in debug mode
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        home = fetch(async_client.get, reverse('home'))
+    assert home.status_code == 200
+    assert 'Async chair' in home.content.decode()
+    #Every active middleware runs natively, no request hops between threads for them;
+    #PerformanceMiddleware is adapted before it reports MiddlewareNotUsed
+    adapted = [line for line in caplog.messages if 'adapted' in line]
+    assert all('PerformanceMiddleware' in line for line in adapted)
+
+    assert fetch(async_client.get, reverse('home'), {'query': 'chair'}).status_code == 200
+    listed = fetch(async_client.get, reverse('item_list'), {'all': 'true'})
+    assert list(listed.context['items']) == [item]
+
+    detail = fetch(async_client.get, reverse('view_item_detail', args=[item.id]))
+    assert detail.status_code == 200
+    missing = fetch(async_client.get, reverse('view_item_detail', args=[item.id + 1]))
+    assert missing.status_code == 404
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('async_urls')
+def test_async_item_list_of_logged_in_user(async_client, owner):
+    """
+    This is test function with pytest for item_list showing the user's own items
+    """
+    other = User.objects.create_user(username='testuser2', password='P@ssw0rd123')
+    mine = Item.objects.create(title='Mine', description='-', quantity=1, owner=owner)
+    Item.objects.create(title='Theirs', description='-', quantity=1, owner=other)
+    async_client.force_login(owner)
+
+    response = fetch(async_client.get, reverse('item_list'))
+    assert list(response.context['items']) == [mine]
+
+##Test for the inquiry form
+@pytest.mark.django_db
+@pytest.mark.usefixtures('async_urls')
+def test_async_inquire_item_queues_email(async_client, owner):
+    """
+    This is test function with pytest for inquire_item queueing the email
+    """
+    item = Item.objects.create(title='Async chair', description='Wooden', quantity=1, owner=owner)
+    url = reverse('inquire_item', args=[item.id])
+    assert fetch(async_client.get, url).status_code == 200
+    assert fetch(async_client.put, url).status_code == 405
+
+    response = fetch(async_client.post, url, {'email': '', 'message': 'Hi'})
+    assert response.status_code == 200
+    assert not OutboundEmail.objects.exists()
+
+    response = fetch(
+        async_client.post, url, {'email': 'user@example.com', 'message': 'Is it available?'})
+    assert response.status_code == 302
+    queued = OutboundEmail.objects.get()
+    assert queued.subject == 'Inquiry about Async chair'
+    assert queued.to == ['owner@example.com']
+    assert queued.reply_to == ['user@example.com']
+
+##Test for the WSGI/ASGI comparison
+@pytest.mark.django_db(transaction=True)
+def test_compare_servers_serves_every_mode():
+    """
+    This is test function with pytest for a small WSGI vs ASGI run
+    """
+    benchmark.seed(users=2, items=5)
+    results = benchmark.compare_servers(concurrency=4, requests=10)
+
+    assert set(results) == set(benchmark.SERVER_MODES)
+    for mode, row in results.items():
+        assert row['status'] == [200], mode
+        assert row['requests_per_second'] > 0
+        assert row['peak_memory_mib'] > 0
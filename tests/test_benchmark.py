@@ -0,0 +1,40 @@
+"""
+This is test functions with pytest for the route benchmark harness
+"""
+import pytest
+from django.urls import get_resolver
+from ecogiveapp import benchmark
+
+##Test for the harness covering every route
+def test_every_url_name_is_benchmarked():
+    """
+    This is test function with pytest for route coverage of the benchmark
+    """
+    url_names = {name for name in get_resolver().reverse_dict if isinstance(name, str)}
+    covered = {route.url_name for route in benchmark.default_routes()}
+    app_routes = {name for name in url_names if ':' not in name}
+    assert app_routes <= covered
+
+@pytest.mark.django_db
+def test_run_routes_on_seeded_data():
+    """
+    This is test function with pytest for a small benchmark run
+    """
+    benchmark.seed(users=2, items=5)
+    results = benchmark.run_routes(iterations=2)
+
+    assert set(results) == {route.label for route in benchmark.default_routes()}
+    for label, row in results.items():
+        assert all(status < 400 for status in row['status']), label
+        assert row['p50_ms'] <= row['p95_ms'] <= row['p99_ms']
+    assert results['home']['bytes'] > 0
+
+##Test for the baseline diff
+def test_compare_flags_slower_and_chattier_routes():
+    """
+    This is test function with pytest for regression detection
+    """
+    baseline = {'home': {'p95_ms': 10.0, 'queries': 2}, 'login GET': {'p95_ms': 5.0, 'queries': 0}}
+    results = {'home': {'p95_ms': 14.0, 'queries': 3}, 'login GET': {'p95_ms': 5.5, 'queries': 0}}
+    assert benchmark.compare(results, baseline, threshold=0.25) == [
+        'home: p95 10.00ms -> 14.00ms', 'home: queries 2 -> 3']
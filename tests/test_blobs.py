@@ -0,0 +1,112 @@
+"""
+This is test functions with pytest for content-addressed image storage
+"""
+import hashlib
+from importlib import import_module
+from io import BytesIO
+from types import SimpleNamespace
+import pytest
+from PIL import Image
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.urls import reverse
+from ecogiveapp.models import ImageBlob, Item, PendingDeletion
+from ecogiveapp.storage_gc import purge_pending
+
+def _photo_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (600, 450), 'green').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+@pytest.fixture(name='owner')
+def fixture_owner(client, settings):
+    """
+    Logged-in owner, thumbnails generated inline
+    """
+    settings.THUMBNAIL_ASYNC = False
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client.login(username='testuser1', password='P@ssw0rd123')
+    return user
+
+def _add(client, title, photo):
+    return client.post(reverse('add_item'), {
+        'title': title, 'description': 'desc', 'quantity': 1,
+        'image': SimpleUploadedFile(f'{title}.JPG', photo, content_type='image/jpeg')})
+
+##Test for identical uploads stored once
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_same_photo_is_stored_once(client, django_capture_on_commit_callbacks):
+    """
+    This is test function with pytest for upload deduplication
+    """
+    photo = _photo_bytes()
+    digest = hashlib.sha256(photo).hexdigest()
+    with django_capture_on_commit_callbacks(execute=True):
+        _add(client, 'first', photo)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        _add(client, 'second', photo)
+
+    first, second = Item.objects.order_by('id')
+    assert first.image.name == second.image.name == f'images/{digest}.jpg'
+    assert second.image_digest == digest
+    assert second.thumbnails_ready and not callbacks  #thumbnails of the first item reused
+    assert ImageBlob.objects.get(name=first.image.name).refcount == 2
+    assert default_storage.listdir('images')[1].count(f'{digest}.jpg') == 1
+
+##Test for reference counted deletes
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_blob_is_deleted_with_its_last_item(client):
+    """
+    This is test function with pytest for blob reference counts
+    """
+    photo = _photo_bytes()
+    _add(client, 'first', photo)
+    _add(client, 'second', photo)
+    first, second = Item.objects.order_by('id')
+
+    client.post(reverse('edit_item', args=[first.id]), {
+        'title': 'first', 'description': 'desc', 'quantity': 1,
+        'image': SimpleUploadedFile('again.jpg', photo, content_type='image/jpeg')})
+    assert ImageBlob.objects.get(name=first.image.name).refcount == 2
+
+    client.post(reverse('delete_item', args=[first.id]))
+    assert ImageBlob.objects.get(name=second.image.name).refcount == 1
+    assert not PendingDeletion.objects.exists()
+
+    client.post(reverse('delete_item', args=[second.id]))
+    assert not ImageBlob.objects.exists()
+    assert PendingDeletion.objects.filter(name=second.image.name).exists()
+
+    #The same photo uploaded again before the GC ran reuses the object
+    _add(client, 'third', photo)
+    third = Item.objects.get(title='third')
+    assert third.image.name == second.image.name
+    assert not PendingDeletion.objects.exists()
+    assert purge_pending()['deleted'] == 0
+    assert default_storage.exists(third.image.name)
+
+##Test for the digest backfill migration
+@pytest.mark.django_db
+def test_backfill_hashes_existing_images(owner):
+    """
+    This is test function with pytest for the image digest backfill
+    """
+    shared = default_storage.save('images/legacy.jpg', ContentFile(b'legacy bytes'))
+    for title in ('one', 'two'):
+        Item.objects.create(title=title, description='d', quantity=1, owner=owner, image=shared)
+    Item.objects.create(
+        title='lost', description='d', quantity=1, owner=owner, image='images/gone.jpg')
+
+    migration = import_module('ecogiveapp.migrations.0009_image_blobs')
+    migration.backfill_image_digests(apps, SimpleNamespace(connection=connection))
+
+    digest = hashlib.sha256(b'legacy bytes').hexdigest()
+    assert set(Item.objects.values_list('image_digest', flat=True)) == {digest, ''}
+    blob = ImageBlob.objects.get()
+    assert (blob.name, blob.digest, blob.refcount) == (shared, digest, 2)
@@ -0,0 +1,118 @@
+"""
+This is test functions with pytest for the card fragment and page cache
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ecogiveapp.caching import get_versions, item_scope
+from ecogiveapp.models import Item
+
+@pytest.fixture(autouse=True)
+def shared_cache(settings):
+    """
+    Caching is only on with a cache shared by the workers; the tests run in one process
+    """
+    settings.SHARED_CACHE = True
+
+@pytest.fixture(name='two_items')
+def fixture_two_items():
+    """
+    Two items of one owner
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    return [
+        Item.objects.create(title=f'Item {n}', description='desc', quantity=1, owner=user)
+        for n in range(2)]
+
+def _card_key(item):
+    version = get_versions([item_scope(item.id)])[item_scope(item.id)]
+    return make_template_fragment_key('list_card', [item.id, version])
+
+##Test for anonymous page caching
+@pytest.mark.django_db
+@pytest.mark.usefixtures('two_items')
+def test_anonymous_home_is_served_from_cache(client, django_assert_num_queries):
+    """
+    This is test function with pytest for whole page caching
+    """
+    first = client.get(reverse('home'))
+    with django_assert_num_queries(0):
+        second = client.get(reverse('home'))
+    assert second.content == first.content
+
+##Test for targeted invalidation on item writes
+@pytest.mark.django_db
+def test_edit_evicts_only_the_edited_card_and_feed_pages(client, two_items):
+    """
+    This is test function with pytest for version stamp invalidation
+    """
+    edited, untouched = two_items
+    client.get(reverse('item_list'))
+    untouched_key = _card_key(untouched)
+    assert cache.get(untouched_key) is not None
+
+    client.login(username='testuser1', password='P@ssw0rd123')
+    client.post(reverse('edit_item', args=[edited.id]), {
+        'title': 'Renamed item', 'description': 'desc', 'quantity': 1})
+    client.logout()
+
+    assert cache.get(untouched_key) is not None
+    assert cache.get(_card_key(edited)) is None
+    assert b'Renamed item' in client.get(reverse('item_list')).content
+
+##Test for writes leaving the pages of other items cached
+@pytest.mark.django_db
+def test_writes_only_evict_the_pages_they_change(client, settings, two_items,
+                                                 django_assert_num_queries):
+    """
+    This is test function with pytest for the page scopes of item writes
+    """
+    settings.ITEMS_PAGE_SIZE = 1
+    older, newer = two_items
+    first = client.get(reverse('home'))
+    second_path = reverse('home') + '?' + first.context['page'].next_query
+    client.get(second_path)
+    client.get(reverse('home'), {'query': 'Item'})
+
+    #Editing the item of the first page keeps the second page cached
+    newer.title = 'Renamed item'
+    newer.save()
+    with django_assert_num_queries(0):
+        client.get(second_path)
+    assert b'Renamed item' in client.get(reverse('home')).content
+    with django_assert_num_queries(0):
+        client.get(reverse('home'))
+
+    #A new item goes on top of the feed and may match any search
+    Item.objects.create(title='Item 2', description='desc', quantity=1, owner=older.owner)
+    with django_assert_num_queries(0):
+        client.get(second_path)
+    assert b'Item 2' in client.get(reverse('home')).content
+    with CaptureQueriesContext(connection) as search:
+        client.get(reverse('home'), {'query': 'Item'})
+    assert search.captured_queries
+
+    #Deleting the item of the second page evicts that page only
+    client.get(reverse('home'))
+    older.delete()
+    with django_assert_num_queries(0):
+        client.get(reverse('home'))
+    assert b'Item 0' not in client.get(second_path).content
+
+##Test for no caching with a per-process cache
+@pytest.mark.django_db
+def test_nothing_is_cached_without_a_shared_cache(client, settings, two_items):
+    """
+    This is test function with pytest for caching turned off under LocMemCache
+    """
+    settings.SHARED_CACHE = False
+    with CaptureQueriesContext(connection) as first:
+        client.get(reverse('item_list'))
+    with CaptureQueriesContext(connection) as second:
+        client.get(reverse('item_list'))
+    assert len(second.captured_queries) == len(first.captured_queries) > 0
+    assert cache.get(make_template_fragment_key('list_card', [two_items[0].id, 0])) is None
@@ -0,0 +1,79 @@
+"""
+This is test functions with pytest for the shared item card and its precomputed values
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse
+from ecogiveapp import benchmark
+from ecogiveapp.cards import attach_card_fields
+from ecogiveapp.models import Item
+
+##Test for the precomputed card values
+@pytest.mark.parametrize('description', [
+    '', 'Short', 'x' * 100, 'x' * 101, 'A sofa in good condition. ' * 10,
+    'Café table ' * 20, 'é' * 150])
+def test_summary_matches_truncatechars(description):
+    """
+    This is test function with pytest for the card summary
+    """
+    [item] = attach_card_fields([Item(id=1, description=description)])
+    assert item.summary == truncatechars(description, 100)
+
+def test_card_urls_match_reverse():
+    """
+    This is test function with pytest for the card URLs
+    """
+    items = attach_card_fields([Item(id=7, description='-'), Item(id=12345, description='-')])
+    for item in items:
+        assert item.detail_url == reverse('view_item_detail', args=[item.id])
+        assert item.inquire_url == reverse('inquire_item', args=[item.id])
+        assert not hasattr(item, 'edit_url')
+        assert item.card_image == '/static/images/default-placeholder.png'
+        assert item.card_webp == ''
+
+    [item] = attach_card_fields([Item(id=7, description='-')], owned=True)
+    assert item.edit_url == reverse('edit_item', args=[7])
+    assert item.delete_url == reverse('delete_item', args=[7])
+
+##Test for the feeds rendering the shared card
+@pytest.mark.django_db
+def test_feeds_render_the_shared_card(client):
+    """
+    This is test function with pytest for home and item_list using item_card.html
+    """
+    owner = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Desk', description='Oak desk ' * 20, owner=owner)
+    for url, button in [(reverse('home'), 'btn btn-success'),
+                        (reverse('item_list') + '?all=true', 'btn btn-primary')]:
+        response = client.get(url)
+        assert 'item_card.html' in [template.name for template in response.templates]
+        html = response.content.decode()
+        assert f'href="{reverse("view_item_detail", args=[item.id])}"' in html
+        assert f'<a href="{reverse("inquire_item", args=[item.id])}" class="{button}">' in html
+        assert truncatechars(item.description, 100) in html
+
+@pytest.mark.django_db
+def test_dashboard_renders_the_shared_card(client):
+    """
+    This is test function with pytest for the dashboard using item_card.html
+    """
+    owner = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Desk', description='Oak desk', owner=owner)
+    client.login(username='testuser1', password='P@ssw0rd123')
+    response = client.get(reverse('dashboard'))
+    assert 'item_card.html' in [template.name for template in response.templates]
+    html = response.content.decode()
+    assert f'href="{reverse("edit_item", args=[item.id])}"' in html
+    assert f'href="{reverse("delete_item", args=[item.id])}"' in html
+    assert f'href="{reverse("inquire_item", args=[item.id])}"' not in html
+
+##Test for the card render benchmark
+def test_measure_cards_reports_time_per_card():
+    """
+    This is test function with pytest for the card micro-benchmark
+    """
+    row = benchmark.measure_cards(50)
+    assert row['cards'] == 50
+    assert row['render_us_per_card'] > 0
+    assert row['bytes_per_card'] > 500
@@ -0,0 +1,109 @@
+"""
+This is test functions with pytest for direct-to-storage uploads
+"""
+from io import BytesIO
+import pytest
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from ecogiveapp.models import ImageBlob, Item
+
+def _photo():
+    buffer = BytesIO()
+    Image.new('RGB', (300, 200), 'green').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+@pytest.fixture(name='owner')
+def fixture_owner(client):
+    """
+    Logged-in owner
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client.login(username='testuser1', password='P@ssw0rd123')
+    return user
+
+def _direct_upload(client, photo, content_type='image/jpeg'):
+    target = client.post(reverse('presign_upload'), {
+        'content_type': content_type, 'size': len(photo)}).json()
+    response = client.post(target['url'], {
+        **target['fields'], 'file': SimpleUploadedFile('photo', photo, content_type)})
+    return target, response
+
+##Test for the presign, upload, submit flow
+@pytest.mark.django_db
+def test_add_item_with_a_direct_upload(client, owner):
+    """
+    This is test function with pytest for add_item with an object key
+    """
+    photo = _photo()
+    target, response = _direct_upload(client, photo)
+    assert response.status_code == 204
+    assert target['key'].startswith(f'images/direct/{owner.pk}/')
+
+    client.post(reverse('add_item'), {
+        'title': 'Lamp', 'description': 'desc', 'quantity': 1, 'upload_key': target['key']})
+    item = Item.objects.get(title='Lamp')
+    assert item.image.name == target['key']
+    assert default_storage.size(item.image.name) == len(photo)
+    assert ImageBlob.objects.get(name=target['key']).refcount == 1
+
+##Test for keys and policies that must be refused
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_foreign_keys_and_tampered_uploads_are_refused(client):
+    """
+    This is test function with pytest for upload verification
+    """
+    target = client.post(reverse('presign_upload'), {
+        'content_type': 'image/jpeg', 'size': 10}).json()
+    tampered = {**target['fields'], 'key': 'images/direct/999/evil.jpg'}
+    response = client.post(target['url'], {
+        **tampered, 'file': SimpleUploadedFile('x', b'0123456789')})
+    assert response.status_code == 403
+
+    assert client.post(reverse('presign_upload'), {
+        'content_type': 'text/html', 'size': 10}).status_code == 400
+
+    other = User.objects.create_user(username='other', password='P@ssw0rd123')
+    client.post(reverse('add_item'), {
+        'title': 'Stolen', 'description': 'desc', 'quantity': 1,
+        'upload_key': f'images/direct/{other.pk}/photo.jpg'})
+    assert not Item.objects.filter(title='Stolen').exists()
+
+##Test for uploads whose bytes are not the declared image
+@pytest.mark.django_db
+@pytest.mark.parametrize('content', [b'<html><script>alert(1)</script></html>', _photo()[:200]],
+                         ids=['html', 'truncated'])
+@pytest.mark.usefixtures('owner')
+def test_non_image_uploads_are_refused(client, content):
+    """
+    This is test function with pytest for sniffing the stored bytes
+    """
+    target, response = _direct_upload(client, content)
+    assert response.status_code == 204
+    assert target['key'].endswith('.jpg')
+    client.post(reverse('add_item'), {
+        'title': 'Fake', 'description': 'desc', 'quantity': 1, 'upload_key': target['key']})
+    assert not Item.objects.filter(title='Fake').exists()
+
+    png = BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(png, 'PNG')
+    target, _ = _direct_upload(client, png.getvalue())  #declared image/jpeg
+    client.post(reverse('add_item'), {
+        'title': 'Fake', 'description': 'desc', 'quantity': 1, 'upload_key': target['key']})
+    assert not Item.objects.filter(title='Fake').exists()
+
+##Test for replacing an image with a direct upload
+@pytest.mark.django_db
+def test_edit_item_with_a_direct_upload(client, owner):
+    """
+    This is test function with pytest for edit_item with an object key
+    """
+    item = Item.objects.create(title='Lamp', description='desc', quantity=1, owner=owner)
+    target, _ = _direct_upload(client, _photo())
+    client.post(reverse('edit_item', args=[item.id]), {
+        'title': 'Lamp', 'description': 'desc', 'quantity': 1, 'upload_key': target['key']})
+    item.refresh_from_db()
+    assert item.image.name == target['key']
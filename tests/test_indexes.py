@@ -0,0 +1,56 @@
+"""
+This is test functions with pytest for the query plans of the hot queries
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from ecogiveapp.models import Item
+from ecogiveapp.pagination import KeysetPaginator
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN output is SQLite specific')
+
+def _plan(queryset):
+    return queryset.explain()
+
+@pytest.fixture(name='owner')
+def fixture_owner():
+    """
+    Item owner for the query plan tests
+    """
+    return User.objects.create_user(
+        username='testuser1', password='P@ssw0rd123', email='testuser1@example.com')
+
+##Test for the feed and ownership queries using an index without a temp sort
+@pytest.mark.django_db
+def test_dashboard_query_uses_owner_index(owner):
+    """
+    This is test function with pytest for Item.objects.filter(owner=...) newest first
+    """
+    plan = _plan(Item.objects.filter(owner=owner).order_by('-posted_at', '-id')[:25])
+    assert 'item_owner_posted_idx' in plan
+    assert 'TEMP B-TREE' not in plan
+
+@pytest.mark.django_db
+def test_feed_query_uses_posted_index(owner):
+    """
+    This is test function with pytest for Item.objects.order_by('-posted_at')
+    """
+    item = Item.objects.create(title='Chair', description='Wooden', owner=owner)
+    first_page = Item.objects.order_by('-posted_at', '-id')[:25]
+    #pylint: disable=protected-access
+    next_page = KeysetPaginator(Item.objects.all())._rows_after(item.posted_at, item.id)[:25]
+    for queryset in (first_page, next_page):
+        plan = _plan(queryset)
+        assert 'item_posted_idx' in plan
+        assert 'TEMP B-TREE' not in plan
+
+##Test for the registration email lookup
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_registration_email_lookup_uses_index():
+    """
+    This is test function with pytest for User.objects.filter(email=...)
+    """
+    plan = _plan(User.objects.filter(email='testuser1@example.com'))
+    assert 'ecogive_auth_user_email_idx' in plan
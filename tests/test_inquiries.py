@@ -0,0 +1,158 @@
+"""
+This is test functions with pytest for stored inquiries and owner digests
+"""
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ecogiveapp import inquiries
+from ecogiveapp.inquiries import arecord_inquiry, queue_digests, set_digest
+from ecogiveapp.outbox import drain_outbox
+from ecogiveapp.models import Inquiry, Item, OutboundEmail
+
+class RefusingBackend(EmailBackend):
+    """
+    Locmem backend whose relay refuses owner1
+    """
+    def send_messages(self, messages):
+        if any('owner1@example.com' in message.to for message in messages):
+            raise SMTPRecipientsRefused({'owner1@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+def make_owner(username):
+    """
+    Owner with two items
+    """
+    owner = User.objects.create_user(
+        username=username, password='P@ssw0rd123', email=f'{username}@example.com')
+    items = [Item.objects.create(title=f'{username} item {n}', description='-', quantity=1,
+                                 owner=owner) for n in range(2)]
+    return owner, items
+
+def inquire(client, item, email='visitor@example.com', message='Still available?'):
+    """
+    Post the inquiry form, every visitor from an own address so no throttle applies
+    """
+    return client.post(reverse('inquire_item', args=[item.id]),
+                       {'email': email, 'message': message}, REMOTE_ADDR=f'10.1.0.{len(email)}')
+
+##Test for immediate delivery being the default
+@pytest.mark.django_db
+def test_inquiry_is_stored_and_emailed_right_away(client):
+    """
+    This is test function with pytest for the default immediate delivery
+    """
+    _, items = make_owner('owner1')
+    assert inquire(client, items[0]).status_code == 302
+
+    inquiry = Inquiry.objects.get()
+    assert inquiry.notified_at is not None
+    assert OutboundEmail.objects.get().to == ['owner1@example.com']
+    assert queue_digests(now=timezone.now() + timedelta(days=1)) == {'owners': 0, 'inquiries': 0}
+
+##Test for the digest opt-in
+@pytest.mark.django_db
+def test_owner_opts_into_digest_from_dashboard(client):
+    """
+    This is test function with pytest for the dashboard preference form
+    """
+    owner, _ = make_owner('owner1')
+    client.force_login(owner)
+    response = client.post(reverse('inquiry_preferences'), {'digest': 'on'})
+    assert response.status_code == 302
+    assert client.get(reverse('dashboard')).context['inquiry_digest'] is True
+
+    client.post(reverse('inquiry_preferences'), {})
+    assert client.get(reverse('dashboard')).context['inquiry_digest'] is False
+
+##Test for one digest per owner and window
+@pytest.mark.django_db
+def test_digest_groups_inquiries_per_owner_and_item(client, settings):
+    """
+    This is test function with pytest for one queued digest per owner
+    """
+    settings.INQUIRY_DIGEST_WINDOW_SECONDS = 3600
+    owners = [make_owner('owner1'), make_owner('owner2')]
+    for number, (owner, items) in enumerate(owners):
+        set_digest(owner, True)
+        inquire(client, items[0], f'a{number}@example.com', 'First question')
+        inquire(client, items[0], f'bb{number}@example.com', 'Second question')
+        inquire(client, items[1], f'ccc{number}@example.com', 'Third question')
+    assert not OutboundEmail.objects.exists()
+
+    #Nothing is due before the window has passed
+    assert queue_digests() == {'owners': 0, 'inquiries': 0}
+
+    later = timezone.now() + timedelta(hours=1, seconds=1)
+    assert queue_digests(now=later) == {'owners': 2, 'inquiries': 6}
+    assert OutboundEmail.objects.count() == 2
+    assert drain_outbox()['sent'] == 2
+    assert len(mail.outbox) == 2
+    digest = next(message for message in mail.outbox if message.to == ['owner1@example.com'])
+    assert digest.subject == '3 new inquiries about your items'
+    assert 'owner1 item 0 (2 new)' in digest.body
+    assert 'owner1 item 1 (1 new)' in digest.body
+    assert 'ccc0@example.com' in digest.body
+
+    assert queue_digests(now=later) == {'owners': 0, 'inquiries': 0}
+    assert not Inquiry.objects.filter(notified_at__isnull=True).exists()
+
+@pytest.mark.django_db
+def test_refused_digest_does_not_hold_up_the_others(client):
+    """
+    This is test function with pytest for digests delivered through the outbox
+    """
+    for number, username in enumerate(['owner1', 'owner2']):
+        owner, items = make_owner(username)
+        set_digest(owner, True)
+        inquire(client, items[0], f'{"a" * (number + 1)}@example.com')
+    later = timezone.now() + timedelta(days=1)
+
+    assert queue_digests(now=later) == {'owners': 2, 'inquiries': 2}
+    assert drain_outbox(mail_connection=RefusingBackend()) == {'sent': 1, 'retried': 0, 'dead': 1}
+    assert [message.to for message in mail.outbox] == [['owner2@example.com']]
+    #Both were handed over, neither digest is queued again
+    assert not Inquiry.objects.filter(notified_at__isnull=True).exists()
+    assert queue_digests(now=later) == {'owners': 0, 'inquiries': 0}
+
+@pytest.mark.django_db
+def test_async_inquiry_respects_digest(async_client, settings):
+    """
+    This is test function with pytest for the async inquiry view and digests
+    """
+    settings.ROOT_URLCONF = 'EcoGive.asgi_urls'
+    owner, items = make_owner('owner1')
+    set_digest(owner, True)
+
+    async def post():
+        return await async_client.post(
+            reverse('inquire_item', args=[items[0].id]),
+            {'email': 'visitor@example.com', 'message': 'Hi'})
+    assert async_to_sync(post)().status_code == 302
+    assert Inquiry.objects.get().notified_at is None
+    assert not OutboundEmail.objects.exists()
+
+##Test for the async inquiry and its email committing together
+@pytest.mark.django_db
+def test_async_inquiry_and_email_commit_together(monkeypatch):
+    """
+    This is test function with pytest for arecord_inquiry in one transaction
+    """
+    _, items = make_owner('owner1')
+    item = Item.objects.select_related('owner').get(id=items[0].id)
+
+    def broken(**kwargs):
+        raise RuntimeError('outbox unavailable')
+    monkeypatch.setattr(inquiries, 'enqueue_email', broken)
+    with pytest.raises(RuntimeError):
+        async_to_sync(arecord_inquiry)(item, 'visitor@example.com', 'Still available?')
+    assert not Inquiry.objects.exists()
+
+    monkeypatch.undo()
+    async_to_sync(arecord_inquiry)(item, 'visitor@example.com', 'Still available?')
+    assert Inquiry.objects.count() == OutboundEmail.objects.count() == 1
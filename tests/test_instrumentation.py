@@ -0,0 +1,102 @@
+"""
+This is test functions with pytest for the per-request performance instrumentation
+"""
+import contextvars
+import threading
+import pytest
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import ResolverMatch, reverse
+from ecogiveapp import views
+from ecogiveapp.instrumentation import (
+    PerformanceMiddleware, RequestMetrics, normalize_sql, store)
+
+@pytest.fixture(name='instrumented')
+def fixture_instrumented(settings):
+    """
+    Client with PerformanceMiddleware switched on and an empty report
+    """
+    settings.PERF_INSTRUMENTATION = True
+    store.clear()
+    yield Client()  #the middleware chain is built when the client is created
+    store.clear()
+
+##Test for the Server-Timing header
+@pytest.mark.django_db
+def test_server_timing_reports_queries_and_templates(instrumented):
+    """
+    This is test function with pytest for the Server-Timing header
+    """
+    response = instrumented.get(reverse('item_list'), {'all': 'true'})
+    timing = response['Server-Timing']
+    assert 'db;dur=' in timing
+    assert 'template;dur=' in timing
+    assert 'total;dur=' in timing
+    assert store.report()['slowest_routes'][0]['route'] == 'item_list'
+
+##Test for queries run in other threads
+@pytest.mark.django_db
+def test_queries_of_sync_to_async_threads_are_counted(settings, rf):
+    """
+    This is test function with pytest for connections opened outside the request thread
+    """
+    settings.PERF_INSTRUMENTATION = True
+
+    def query():
+        #Like a sync_to_async thread: a connection of its own, the request's context
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connections.close_all()
+
+    def view(request):  #pylint: disable=unused-argument
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(query,))
+        thread.start()
+        thread.join()
+        return HttpResponse()
+
+    request = rf.get('/')
+    request.resolver_match = ResolverMatch(views.home, (), {}, url_name='home')
+    response = PerformanceMiddleware(view)(request)
+    assert 'db;dur=' in response['Server-Timing']
+    assert 'desc="1 queries"' in response['Server-Timing']
+
+##Test for instrumentation being off by default
+@pytest.mark.django_db
+def test_no_header_when_disabled(client):
+    """
+    This is test function with pytest for the disabled middleware
+    """
+    assert 'Server-Timing' not in client.get(reverse('home'))
+
+##Test for N+1 detection
+def test_repeated_statements_are_grouped():
+    """
+    This is test function with pytest for repeated-query detection
+    """
+    metrics = RequestMetrics()
+    for pk in range(6):
+        metrics.add_query(f'SELECT * FROM "auth_user" WHERE "auth_user"."id" = {pk}', 0.1)
+    metrics.add_query('SELECT * FROM "ecogiveapp_item" WHERE "id" IN (%s, %s, %s)', 0.1)
+    assert metrics.repeated_queries(5) == {
+        'SELECT * FROM "auth_user" WHERE "auth_user"."id" = ?': 6}
+    assert normalize_sql('WHERE "id" IN (%s, %s)') == 'WHERE "id" IN (...)'
+
+##Test for the staff-only report
+@pytest.mark.django_db
+def test_performance_report_is_staff_only(instrumented):
+    """
+    This is test function with pytest for the performance report view
+    """
+    User.objects.create_user(username='member', password='P@ssw0rd123')
+    User.objects.create_user(username='staff', password='P@ssw0rd123', is_staff=True)
+
+    instrumented.login(username='member', password='P@ssw0rd123')
+    assert instrumented.get(reverse('performance_report')).status_code == 302
+
+    instrumented.login(username='staff', password='P@ssw0rd123')
+    instrumented.get(reverse('dashboard'))
+    report = instrumented.get(reverse('performance_report')).json()
+    assert 'dashboard' in [row['route'] for row in report['slowest_routes']]
+    assert 'n_plus_one' in report
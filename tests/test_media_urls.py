@@ -0,0 +1,73 @@
+"""
+This is test functions with pytest for the cached media URL resolution
+"""
+import pytest
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import User
+from django.urls import reverse
+from ecogiveapp.media_urls import resolve_urls, url_ttl
+from ecogiveapp.models import Item
+
+class CountingStorage(FileSystemStorage):
+    """
+    FileSystemStorage that counts url() calls
+    """
+    calls = 0
+
+    def url(self, name):
+        CountingStorage.calls += 1
+        return super().url(name)
+
+class SignedStorage:
+    """
+    Looks like S3Boto3Storage with query string signatures
+    """
+    querystring_auth = True
+    querystring_expire = 900
+    custom_domain = None
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Start every test with an empty cache
+    """
+    cache.clear()
+    CountingStorage.calls = 0
+
+##Test for the bulk resolver and the cache
+def test_resolve_urls_builds_each_url_once(settings):
+    """
+    This is test function with pytest for caching URLs per storage and name
+    """
+    storage = CountingStorage(location=settings.MEDIA_ROOT, base_url='/media/')
+    first = resolve_urls(storage, ['images/a.jpg', 'images/b.jpg', 'images/a.jpg'])
+    assert first == {'images/a.jpg': '/media/images/a.jpg', 'images/b.jpg': '/media/images/b.jpg'}
+    assert CountingStorage.calls == 2
+
+    assert resolve_urls(storage, ['images/a.jpg', 'images/b.jpg']) == first
+    assert CountingStorage.calls == 2
+
+def test_signed_urls_expire_before_their_signature(settings):
+    """
+    This is test function with pytest for the TTL of signed URLs
+    """
+    settings.MEDIA_URL_CACHE_EXPIRY_MARGIN = 300
+    assert url_ttl(SignedStorage()) == 600
+    assert url_ttl(FileSystemStorage()) == settings.MEDIA_URL_CACHE_TTL
+
+##Test for the list page using prefetched URLs
+@pytest.mark.django_db
+def test_home_renders_cached_image_urls(client):
+    """
+    This is test function with pytest for the home page image URLs
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(
+        title='Chair', description='Wooden', owner=user,
+        image=SimpleUploadedFile('chair.jpg', b'jpeg', content_type='image/jpeg'))
+
+    response = client.get(reverse('home'))
+    assert response.context['items'][0].media_urls == {item.image.name: item.image.url}
+    assert item.image.url.encode() in response.content
@@ -0,0 +1,87 @@
+"""
+This is test functions with pytest for the outbound email queue
+"""
+from smtplib import SMTPServerDisconnected
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from ecogiveapp.models import Item, OutboundEmail
+from ecogiveapp.outbox import drain_outbox, enqueue_email
+from ecogiveapp.smtp_standin import LocalSMTPServer
+
+class FlakyBackend(EmailBackend):
+    """
+    Locmem backend that fails every send
+    """
+    def send_messages(self, messages):
+        raise SMTPServerDisconnected('relay went away')
+
+##Test for inquire_item enqueueing instead of sending
+@pytest.mark.django_db
+def test_inquire_item_enqueues_email(client):
+    """
+    This is test function with pytest for the inquiry being queued
+    """
+    user = User.objects.create_user(
+        username='testuser1', password='P@ssw0rd123', email='owner@example.com')
+    item = Item.objects.create(title='Test Item', description='Test', quantity=1, owner=user)
+    response = client.post(reverse('inquire_item', args=[item.id]), {
+        'email': 'user@example.com', 'message': 'I am interested in your item.'})
+
+    assert response.status_code == 302
+    assert len(mail.outbox) == 0
+    queued = OutboundEmail.objects.get()
+    assert queued.to == ['owner@example.com']
+    assert queued.reply_to == ['user@example.com']
+
+    assert drain_outbox() == {'sent': 1, 'retried': 0, 'dead': 0}
+    assert mail.outbox[0].subject == 'Inquiry about Test Item'
+    assert OutboundEmail.objects.get().status == OutboundEmail.STATUS_SENT
+
+##Test for retries with backoff and dead-lettering
+@pytest.mark.django_db
+def test_failed_email_is_retried_then_dead_lettered(settings):
+    """
+    This is test function with pytest for backoff and dead letters
+    """
+    settings.OUTBOX_MAX_ATTEMPTS = 2
+    entry = enqueue_email('Subject', 'Body', ['owner@example.com'])
+
+    assert drain_outbox(mail_connection=FlakyBackend()) == {'sent': 0, 'retried': 1, 'dead': 0}
+    entry.refresh_from_db()
+    assert entry.attempts == 1
+    assert entry.next_attempt_at > timezone.now()
+    #Not due yet, so nothing is claimed
+    assert drain_outbox(mail_connection=FlakyBackend()) == {'sent': 0, 'retried': 0, 'dead': 0}
+
+    OutboundEmail.objects.update(next_attempt_at=timezone.now())
+    assert drain_outbox(mail_connection=FlakyBackend()) == {'sent': 0, 'retried': 0, 'dead': 1}
+    entry.refresh_from_db()
+    assert entry.status == OutboundEmail.STATUS_DEAD
+    assert 'relay went away' in entry.last_error
+
+##Test for batching over one SMTP connection against the local stand-in
+@pytest.mark.django_db
+def test_drain_reuses_one_smtp_connection(settings):
+    """
+    This is test function with pytest for the SMTP worker path
+    """
+    with LocalSMTPServer(reject={'gone@example.com'}) as server:
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST, settings.EMAIL_PORT = server.host, server.port
+        settings.EMAIL_USE_TLS = False
+        settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ''
+        for n in range(3):
+            enqueue_email(f'Subject {n}', 'Body', [f'owner{n}@example.com'], 'site@example.com')
+
+        assert drain_outbox() == {'sent': 3, 'retried': 0, 'dead': 0}
+        assert server.connection_count == 1
+        assert [recipients for _, recipients, _ in server.messages] == [
+            ['owner0@example.com'], ['owner1@example.com'], ['owner2@example.com']]
+
+        #A refused mailbox will not come back, so it is dead-lettered straight away
+        enqueue_email('Bounce', 'Body', ['gone@example.com'], 'site@example.com')
+        assert drain_outbox() == {'sent': 0, 'retried': 0, 'dead': 1}
@@ -0,0 +1,56 @@
+"""
+This is test functions with pytest for the keyset pagination of item feeds
+"""
+import pytest
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ecogiveapp.models import Item
+from ecogiveapp.pagination import CURSOR_PARAM
+
+@pytest.fixture(name='five_items')
+def fixture_five_items():
+    """
+    Five items where two share the same posted_at to exercise the id tie-breaker
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    items = [
+        Item.objects.create(title=f'Item {n}', description='desc', quantity=1, owner=user)
+        for n in range(5)]
+    Item.objects.filter(id=items[2].id).update(posted_at=items[1].posted_at)
+    return items
+
+def _ids(response):
+    return [item.id for item in response.context['items']]
+
+##Test for walking the home feed page by page
+@pytest.mark.django_db
+def test_home_pages_forward_and_back(client, settings, five_items):
+    """
+    This is test function with pytest for next/previous cursor links on home page
+    """
+    settings.ITEMS_PAGE_SIZE = 2
+    expected = [item.id for item in reversed(five_items)]
+
+    first = client.get(reverse('home'))
+    assert _ids(first) == expected[:2]
+    assert not first.context['page'].has_previous
+
+    second = client.get(reverse('home') + '?' + first.context['page'].next_query)
+    assert _ids(second) == expected[2:4]
+
+    third = client.get(reverse('home') + '?' + second.context['page'].next_query)
+    assert _ids(third) == expected[4:]
+    assert not third.context['page'].has_next
+
+    back = client.get(reverse('home') + '?' + third.context['page'].previous_query)
+    assert _ids(back) == expected[2:4]
+
+@pytest.mark.django_db
+def test_tampered_cursor_falls_back_to_first_page(client, settings, five_items):
+    """
+    This is test function with pytest for invalid cursor handling
+    """
+    settings.ITEMS_PAGE_SIZE = 2
+    response = client.get(reverse('item_list'), {'all': 'true', CURSOR_PARAM: 'not-a-cursor'})
+    assert response.status_code == 200
+    assert _ids(response) == [five_items[4].id, five_items[3].id]
@@ -0,0 +1,60 @@
+"""
+This is test functions with pytest for the per-view query budgets
+"""
+import pytest
+from EcoGive.asgi_urls import ASYNC_VIEWS
+from ecogiveapp import benchmark, views
+from ecogiveapp.query_budgets import QueryBudgetExceeded, budgets
+
+#The admin is budgeted by Django, not by @query_budget
+ROUTES = [route for route in benchmark.default_routes() if ':' not in route.url_name]
+
+##Test for every view declaring a budget
+@pytest.mark.parametrize('urlconf', ['EcoGive.urls', 'EcoGive.asgi_urls'])
+def test_every_url_name_has_a_budget(urlconf):
+    """
+    This is test function with pytest for @query_budget coverage of the URLconfs
+    """
+    declared = budgets(urlconf)
+    assert {name for name, budget in declared.items() if budget is None} == set()
+    assert {route.url_name for route in ROUTES} == set(declared)
+
+##Test for the views staying within their budgets
+@pytest.mark.parametrize('route', ROUTES, ids=lambda route: route.label)
+def test_route_is_within_its_budget(route, assert_query_budget):
+    """
+    This is test function with pytest for the query budget of each route
+    """
+    response = assert_query_budget(route)
+    assert response.status_code < 400
+
+@pytest.mark.parametrize('route', [route for route in ROUTES if route.url_name in ASYNC_VIEWS],
+                         ids=lambda route: route.label)
+def test_async_route_is_within_its_budget(route, assert_query_budget):
+    """
+    This is test function with pytest for the query budget of the async views
+    """
+    response = assert_query_budget(route, urlconf='EcoGive.asgi_urls')
+    assert response.status_code < 400
+
+##Test for an N+1 pattern failing with its SQL
+def test_n_plus_one_fails_with_the_offending_sql(assert_query_budget, monkeypatch):
+    """
+    This is test function with pytest for the failure report of an exceeded budget
+    """
+    prepare_cards = views.prepare_cards
+
+    def with_owners(items):
+        #A card showing the owner without select_related
+        for item in items:
+            str(item.owner.email)
+        return prepare_cards(items)
+    monkeypatch.setattr(views, 'prepare_cards', with_owners)
+
+    with pytest.raises(QueryBudgetExceeded) as failure:
+        assert_query_budget(ROUTES[0])
+    report = str(failure.value)
+    assert report.startswith('home: ')
+    assert 'budget 2' in report
+    assert 'FROM "auth_user"' in report
+    assert '[x24]' in report
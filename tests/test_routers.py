@@ -0,0 +1,82 @@
+"""
+This is test functions with pytest for the primary/replica database router
+"""
+import sqlite3
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.urls import reverse
+from ecogiveapp.models import Item
+from ecogiveapp.search import SQLiteFTS5Backend
+
+@pytest.fixture(name='replicas')
+def fixture_replicas(transactional_db, settings, tmp_path):  #pylint: disable=unused-argument
+    """
+    Two SQLite replica files; calling the fixture value copies the primary
+    into them, standing in for replication
+    """
+    aliases = ['replica1', 'replica2']
+    for alias in aliases:
+        connections.settings[alias] = {
+            **connections.settings['default'], 'NAME': str(tmp_path / f'{alias}.sqlite3')}
+    settings.DATABASE_REPLICAS = aliases
+
+    def replicate():
+        connection.ensure_connection()
+        for alias in aliases:
+            connections[alias].close()
+            target = sqlite3.connect(connections.settings[alias]['NAME'])
+            connection.connection.backup(target)
+            target.close()
+
+    replicate()
+    yield replicate
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+##Test for public reads served by the replicas
+def test_anonymous_reads_use_replicas(client, replicas):
+    """
+    This is test function with pytest for replica reads
+    """
+    owner = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Fresh chair', description='desc', quantity=1, owner=owner)
+
+    assert client.get(reverse('view_item_detail', args=[item.id])).status_code == 404
+    replicas()
+    assert client.get(reverse('view_item_detail', args=[item.id])).status_code == 200
+
+##Test for search reading the replicas
+def test_search_reads_the_replicas(replicas):
+    """
+    This is test function with pytest for the routed search index
+    """
+    owner = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Fresh chair', description='desc', quantity=1, owner=owner)
+
+    backend = SQLiteFTS5Backend()
+    assert backend.search_ids('chair', 0, 10) == []
+    replicas()
+    assert backend.search_ids('chair', 0, 10) == [item.id]
+
+##Test for reading your own writes
+def test_reads_stick_to_primary_after_a_write(client, replicas):
+    """
+    This is test function with pytest for the primary pin after a write
+    """
+    owner = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Old title', description='desc', quantity=1, owner=owner)
+    replicas()
+
+    #auth reads the primary, so login works without replicating the session
+    assert client.login(username='testuser1', password='P@ssw0rd123')
+    response = client.post(reverse('edit_item', args=[item.id]), {
+        'title': 'New title', 'description': 'desc', 'quantity': 1})
+    assert response.cookies['ecogive_primary']['max-age'] == 10
+    detail = reverse('view_item_detail', args=[item.id])
+    assert b'New title' in client.get(detail).content
+
+    del client.cookies['ecogive_primary']  #the pin expired, replica still lags behind
+    assert b'Old title' in client.get(detail).content
@@ -0,0 +1,84 @@
+"""
+This is test functions with pytest for the item full-text search
+"""
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth.models import User
+from ecogiveapp.models import Item
+from ecogiveapp.search import SQLiteFTS5Backend
+
+@pytest.fixture(name='owner')
+def fixture_owner():
+    """
+    Item owner for the search tests
+    """
+    return User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+
+##Test for ranking and prefix matching on the home page search
+@pytest.mark.django_db
+def test_home_search_ranks_title_matches_first(client, owner):
+    """
+    This is test function with pytest for BM25 ranked prefix search
+    """
+    in_description = Item.objects.create(
+        title='Wooden chair', description='Comes with a bicycle bell', owner=owner)
+    in_title = Item.objects.create(
+        title='Bicycle for kids', description='Blue frame', owner=owner)
+    Item.objects.create(title='Desk lamp', description='Warm light', owner=owner)
+
+    response = client.get(reverse('home'), {'query': 'bicyc'})
+    assert response.status_code == 200
+    assert [item.id for item in response.context['items']] == [in_title.id, in_description.id]
+
+##Test for a stable order among equal scores
+@pytest.mark.django_db
+def test_equal_scores_are_newest_first(owner):
+    """
+    This is test function with pytest for the id tiebreak of the BM25 order
+    """
+    items = [Item.objects.create(title='Oak chair', description='Sturdy', owner=owner)
+             for _ in range(4)]
+    backend = SQLiteFTS5Backend()
+    expected = [item.id for item in reversed(items)]
+    assert backend.search_ids('chair', 0, 10) == expected
+    assert backend.search_ids('chair', 0, 2) + backend.search_ids('chair', 2, 2) == expected
+
+##Test for the triggers keeping the index in sync
+@pytest.mark.django_db
+def test_index_follows_updates_and_deletes(owner):
+    """
+    This is test function with pytest for index sync on update and delete
+    """
+    backend = SQLiteFTS5Backend()
+    item = Item.objects.create(title='Old kettle', description='Steel', owner=owner)
+    assert backend.search_ids('kettle', 0, 10) == [item.id]
+
+    item.title = 'Old teapot'
+    item.save()
+    assert backend.search_ids('kettle', 0, 10) == []
+    assert backend.search_ids('teapot', 0, 10) == [item.id]
+
+    item.delete()
+    assert backend.search_ids('teapot', 0, 10) == []
+
+@pytest.mark.django_db
+def test_rebuild_search_index_command(owner):
+    """
+    This is test function with pytest for the rebuild_search_index command
+    """
+    item = Item.objects.create(title='Garden hose', description='Green', owner=owner)
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO ecogiveapp_item_fts(ecogiveapp_item_fts) VALUES ('delete-all')")
+    assert SQLiteFTS5Backend().search_ids('hose', 0, 10) == []
+
+    call_command('rebuild_search_index')
+    assert SQLiteFTS5Backend().search_ids('hose', 0, 10) == [item.id]
+
+def test_match_expression_strips_fts_syntax():
+    """
+    This is test function with pytest for query sanitising
+    """
+    assert SQLiteFTS5Backend.match_expression('red "bike" OR*') == '"red"* "bike"* "OR"*'
+    assert SQLiteFTS5Backend.match_expression('  -- ') == ''
@@ -0,0 +1,115 @@
+"""
+This is test functions with pytest for cached sessions and the cached request.user
+"""
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ecogiveapp.models import Item
+
+def session_and_user_queries(client, url):
+    """
+    Request url and return the django_session and auth_user statements it ran
+    """
+    with CaptureQueriesContext(connection) as captured:
+        assert client.get(url).status_code == 200
+    return [query['sql'] for query in captured
+            if 'django_session' in query['sql'] or '"auth_user"' in query['sql']]
+
+##Test for authenticated pages without session and user queries
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name', ['dashboard', 'item_list', 'edit_item'])
+def test_authenticated_pages_run_fewer_queries(settings, url_name):
+    """
+    This is test function with pytest for the queries saved by the cached engines
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Chair', description='-', quantity=1, owner=user)
+    url = reverse(url_name, args=[item.id] if url_name == 'edit_item' else [])
+
+    counts = {}
+    for engine, backend in [
+            ('django.contrib.sessions.backends.db', 'django.contrib.auth.backends.ModelBackend'),
+            ('ecogiveapp.sessions', 'ecogiveapp.auth_backends.CachedModelBackend')]:
+        settings.SESSION_ENGINE = engine
+        settings.AUTHENTICATION_BACKENDS = [backend]
+        client = Client()
+        client.login(username='testuser1', password='P@ssw0rd123')
+        session_and_user_queries(client, url)  #warm up
+        counts[engine] = len(session_and_user_queries(client, url))
+
+    assert counts['django.contrib.sessions.backends.db'] == 2
+    assert counts['ecogiveapp.sessions'] == 0
+
+##Test for evicting the cached user
+@pytest.mark.django_db
+def test_saving_or_deleting_a_user_evicts_it(client):
+    """
+    This is test function with pytest for signal based invalidation of request.user
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client.login(username='testuser1', password='P@ssw0rd123')
+    assert client.get(reverse('dashboard')).status_code == 200
+
+    user.is_active = False
+    user.save()
+    #A deactivated user is logged out on the next request, not after the cache TTL
+    assert client.get(reverse('dashboard')).status_code == 302
+
+    user.is_active = True
+    user.save()
+    client.login(username='testuser1', password='P@ssw0rd123')
+    user.set_password('N3w-P@ssw0rd')
+    user.save()
+    #The session hash no longer matches the new password
+    assert client.get(reverse('dashboard')).status_code == 302
+
+##Test for session garbage collection
+@pytest.mark.django_db
+def test_clearsessions_deletes_expired_sessions_in_batches(settings):
+    """
+    This is test function with pytest for batched clear_expired
+    """
+    settings.SESSION_GC_BATCH_SIZE = 2
+    now = timezone.now()
+    Session.objects.bulk_create(
+        [Session(session_key=f'expired{n:02d}', session_data='', expire_date=now - timedelta(1))
+         for n in range(5)]
+        + [Session(session_key='live', session_data='', expire_date=now + timedelta(1))])
+
+    with CaptureQueriesContext(connection) as captured:
+        call_command('clearsessions')
+    deletes = [query for query in captured if query['sql'].startswith('DELETE')]
+    assert len(deletes) == 3
+    assert list(Session.objects.values_list('session_key', flat=True)) == ['live']
+
+##Test for the cached engines being opt-in and keeping older sessions
+@pytest.mark.django_db
+def test_cached_backend_keeps_model_backend_sessions(settings):
+    """
+    This is test function with pytest for the backend switch on a shared cache
+    """
+    #The default LocMemCache is per process, so nothing is cached across workers
+    assert not settings.SHARED_CACHE
+    assert settings.SESSION_ENGINE == 'ecogiveapp.db_sessions'
+    assert settings.AUTHENTICATION_BACKENDS == ['django.contrib.auth.backends.ModelBackend']
+
+    User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client = Client()
+    client.login(username='testuser1', password='P@ssw0rd123')
+    settings.SESSION_ENGINE = 'ecogiveapp.sessions'
+    settings.AUTHENTICATION_BACKENDS = ['ecogiveapp.auth_backends.CachedModelBackend',
+                                        'django.contrib.auth.backends.ModelBackend']
+    #Logged in by ModelBackend before the switch, still logged in after it
+    assert client.get(reverse('dashboard')).status_code == 200
+
+    with CaptureQueriesContext(connection) as captured:
+        assert not Client().login(username='testuser1', password='wrong')
+    #A wrong password is checked once, not again by ModelBackend
+    assert len([query for query in captured if '"auth_user"' in query['sql']]) == 1
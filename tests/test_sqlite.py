@@ -0,0 +1,102 @@
+"""
+This is test functions with pytest for the SQLite PRAGMA profile
+"""
+import threading
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+
+@pytest.fixture(name='file_database')
+def fixture_file_database(tmp_path, django_db_blocker):
+    """
+    A separate connection handler on a file database, so WAL really applies
+    """
+    with django_db_blocker.unblock():
+        yield ConnectionHandler({'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(tmp_path / 'stress.sqlite3')}})
+
+def _pragma(db, name):
+    with db.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+##Test for the PRAGMA profile on new connections
+def test_file_database_gets_pragma_profile(file_database):
+    """
+    This is test function with pytest for the connection_created hook
+    """
+    db = file_database['default']
+    try:
+        assert _pragma(db, 'journal_mode') == 'wal'
+        assert _pragma(db, 'synchronous') == 1  #NORMAL
+        assert _pragma(db, 'busy_timeout') == 5000
+        assert _pragma(db, 'temp_store') == 2  #MEMORY
+    finally:
+        db.close()
+
+##Test for parallel writers and readers on a file database
+def test_parallel_writers_and_readers_do_not_lock(file_database):
+    """
+    This is test function with pytest for concurrent access under WAL
+    """
+    handler = file_database
+    with handler['default'].cursor() as cursor:
+        cursor.execute('CREATE TABLE stress (id INTEGER PRIMARY KEY, writer INTEGER, n INTEGER)')
+    writers, readers, rows = 4, 4, 200
+    errors, done = [], threading.Event()
+
+    def write(writer):
+        db = handler['default']  #connections are per thread
+        try:
+            for n in range(rows):
+                with db.cursor() as cursor:
+                    cursor.execute('INSERT INTO stress (writer, n) VALUES (%s, %s)', [writer, n])
+        except Exception as error:  #pylint: disable=broad-exception-caught
+            errors.append(error)
+        finally:
+            db.close()
+
+    def read():
+        db = handler['default']
+        try:
+            while not done.is_set():
+                with db.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*), MAX(n) FROM stress')
+                    cursor.fetchone()
+        except Exception as error:  #pylint: disable=broad-exception-caught
+            errors.append(error)
+        finally:
+            db.close()
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    assert not errors
+    db = handler['default']
+    try:
+        assert _pragma(db, 'journal_mode') == 'wal'
+        with db.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM stress')
+            assert cursor.fetchone()[0] == writers * rows
+    finally:
+        db.close()
+
+##Test for the maintenance command
+@pytest.mark.django_db
+def test_sqlite_maintenance_command():
+    """
+    This is test function with pytest for wal_checkpoint and optimize
+    """
+    assert connection.vendor == 'sqlite'
+    out = StringIO()
+    call_command('sqlite_maintenance', stdout=out)
+    assert 'statistics optimized' in out.getvalue()
@@ -0,0 +1,111 @@
+"""
+This is test functions with pytest for the deferred storage deletion
+"""
+from io import StringIO
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from ecogiveapp.models import ImageBlob, Item, PendingDeletion
+from ecogiveapp.storage_gc import delete_objects, purge_pending
+
+@pytest.fixture(name='owner')
+def fixture_owner(client):
+    """
+    Logged-in owner of the items
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client.login(username='testuser1', password='P@ssw0rd123')
+    return user
+
+def _item(owner, name='images/old.jpg'):
+    stored = default_storage.save(name, ContentFile(b'jpeg bytes'))
+    return Item.objects.create(
+        title='Chair', description='desc', quantity=1, owner=owner, image=stored)
+
+##Test for tombstones written by edit_item and drained by the worker
+@pytest.mark.django_db
+def test_replaced_image_is_deleted_by_the_worker(client, owner):
+    """
+    This is test function with pytest for deferred image deletion
+    """
+    item = _item(owner)
+    old_name = item.image.name
+    client.post(reverse('edit_item', args=[item.id]), {
+        'title': 'Chair', 'description': 'desc', 'quantity': 1,
+        'image': SimpleUploadedFile('new.jpg', b'new bytes', content_type='image/jpeg')})
+
+    assert default_storage.exists(old_name)  #not deleted during the request
+    assert PendingDeletion.objects.filter(name=old_name).exists()
+
+    counts = purge_pending()
+    assert counts['deleted'] == 3  #the image and its two thumbnails
+    assert not default_storage.exists(old_name)
+    assert not PendingDeletion.objects.exists()
+
+##Test for images still referenced by another item
+@pytest.mark.django_db
+def test_shared_image_is_kept(client, owner):
+    """
+    This is test function with pytest for referenced tombstones
+    """
+    item = _item(owner)
+    Item.objects.create(
+        title='Twin', description='desc', quantity=1, owner=owner, image=item.image.name)
+    client.post(reverse('delete_item', args=[item.id]))
+
+    assert purge_pending()['kept'] == 3
+    assert default_storage.exists(item.image.name)
+
+    #Counted again after its tombstone was claimed
+    ImageBlob.objects.create(name='images/uploading.jpg', digest='d', refcount=1)
+    stored = default_storage.save('images/uploading.jpg', ContentFile(b'jpeg bytes'))
+    PendingDeletion.objects.create(name=stored, source=stored)
+    assert purge_pending()['kept'] == 1
+    assert default_storage.exists(stored)
+
+##Test for S3 multi-object delete batching
+def test_s3_deletes_in_batches_of_1000():
+    """
+    This is test function with pytest for DeleteObjects batching
+    """
+    class Bucket:
+        """Records DeleteObjects calls"""
+        def __init__(self):
+            self.calls = []
+
+        def delete_objects(self, Delete):  #pylint: disable=invalid-name
+            """Fail the first key of every call"""
+            self.calls.append([entry['Key'] for entry in Delete['Objects']])
+            return {'Errors': [{'Key': self.calls[-1][0], 'Code': 'AccessDenied', 'Message': 'no'}]}
+
+    class Storage:
+        """Stands in for S3Boto3Storage with location 'media'"""
+        bucket = Bucket()
+
+        @staticmethod
+        def _normalize_name(name):
+            return f'media/{name}'
+
+    names = [f'images/{n}.jpg' for n in range(2500)]
+    failures = delete_objects(Storage, names)
+    assert [len(call) for call in Storage.bucket.calls] == [1000, 1000, 500]
+    assert sorted(failures) == ['images/0.jpg', 'images/1000.jpg', 'images/2000.jpg']
+
+##Test for the reconciliation command
+@pytest.mark.django_db
+def test_reconcile_finds_orphans(owner):
+    """
+    This is test function with pytest for reconcile_storage
+    """
+    item = _item(owner)
+    orphan = default_storage.save('images/orphan.jpg', ContentFile(b'lost'))
+    out = StringIO()
+
+    call_command('reconcile_storage', '--min-age', '0', '--delete', stdout=out)
+    assert orphan in out.getvalue()
+    assert item.image.name not in out.getvalue()
+    assert list(PendingDeletion.objects.values_list('name', flat=True)) == [orphan]
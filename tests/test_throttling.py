@@ -0,0 +1,206 @@
+"""
+This is test functions with pytest for request throttling
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache.backends.redis import RedisCache
+from django.urls import reverse
+from ecogiveapp import throttling
+from ecogiveapp.models import Item, OutboundEmail
+
+class FakePipeline:
+    """
+    Redis pipeline over a dict that counts its round-trips
+    """
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def incr(self, key):
+        """Queue INCR"""
+        self.commands.append(('incr', key))
+
+    def expire(self, key, seconds):  #pylint: disable=unused-argument
+        """Queue EXPIRE, the fake keeps keys forever"""
+        self.commands.append(('expire', key))
+
+    def get(self, key):
+        """Queue GET"""
+        self.commands.append(('get', key))
+
+    def execute(self):
+        """Run the queued commands in one round-trip"""
+        self.server.round_trips += 1
+        results = []
+        for command, key in self.commands:
+            if command == 'incr':
+                self.server.data[key] = self.server.data.get(key, 0) + 1
+                results.append(self.server.data[key])
+            elif command == 'expire':
+                results.append(True)
+            else:
+                value = self.server.data.get(key)
+                results.append(None if value is None else str(value).encode())
+        return results
+
+class FakeRedis:
+    """
+    Stand-in for the redis client of RedisCache
+    """
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    def get_client(self, key=None, write=False):  #pylint: disable=unused-argument
+        """The one fake server"""
+        return self
+
+    def pipeline(self, transaction=True):  #pylint: disable=unused-argument
+        """New pipeline on the fake server"""
+        return FakePipeline(self)
+
+@pytest.fixture(name='item')
+def fixture_item():
+    """
+    Item of an owner with an email address
+    """
+    owner = User.objects.create_user(
+        username='testuser1', password='P@ssw0rd123', email='owner@example.com')
+    return Item.objects.create(title='Test Item', description='Test', quantity=1, owner=owner)
+
+##Test for rate parsing
+def test_parse_rate():
+    """
+    This is test function with pytest for the rate syntax
+    """
+    assert throttling.parse_rate('5/m') == (5, 60)
+    assert throttling.parse_rate('30/5m') == (30, 300)
+    assert throttling.parse_rate('100 / d') == (100, 86400)
+    with pytest.raises(ValueError):
+        throttling.parse_rate('5 per minute')
+
+##Test for the sliding window
+def test_previous_window_is_weighted_by_its_overlap():
+    """
+    This is test function with pytest for the sliding window estimate and Retry-After
+    """
+    counter = throttling.Counter('inquiry', 'ip', '10.0.0.1', '10/m', now=615.0)
+    assert counter.elapsed == 15.0
+    counter.previous, counter.current = 8, 5
+    assert counter.estimate == 11.0  #8 * 45/60 + 5
+    assert counter.exceeded
+    #8 * (45 - t)/60 + 5 <= 10 once t >= 7.5
+    assert counter.retry_after() == 8
+
+    counter.previous, counter.current = 0, 12
+    #45s until this window ends, then 12 * (1 - e/60) <= 10 after 10 more seconds
+    assert counter.retry_after() == 55
+
+##Test for throttled inquiries
+@pytest.mark.django_db
+def test_inquiries_are_limited_per_ip(client, settings, item):
+    """
+    This is test function with pytest for a 429 after the inquiry limit
+    """
+    settings.THROTTLE_RATES = {'inquiry': {'ip': '3/10m'}}
+    url = reverse('inquire_item', args=[item.id])
+    data = {'email': 'user@example.com', 'message': 'Still available?'}
+    for _ in range(3):
+        assert client.post(url, data).status_code == 302
+
+    response = client.post(url, data)
+    assert response.status_code == 429
+    assert 1 <= int(response['Retry-After']) <= 1200
+    assert OutboundEmail.objects.count() == 3
+    #Showing the form is never throttled
+    assert client.get(url).status_code == 200
+    #Another client is not affected
+    assert client.post(url, data, REMOTE_ADDR='10.0.0.2').status_code == 302
+
+@pytest.mark.django_db
+def test_async_inquiry_is_throttled(async_client, settings, item):
+    """
+    This is test function with pytest for throttling the async inquiry view
+    """
+    settings.ROOT_URLCONF = 'EcoGive.asgi_urls'
+    settings.THROTTLE_RATES = {'inquiry': {'item': '1/h'}}
+    url = reverse('inquire_item', args=[item.id])
+    data = {'email': 'user@example.com', 'message': 'Still available?'}
+
+    async def post():
+        return await async_client.post(url, data)
+    assert async_to_sync(post)().status_code == 302
+    assert async_to_sync(post)().status_code == 429
+
+##Test for throttled logins
+@pytest.mark.django_db
+@pytest.mark.usefixtures('item')
+def test_login_attempts_are_limited_per_username(client, settings):
+    """
+    This is test function with pytest for password guessing spread over many IPs
+    """
+    settings.THROTTLE_RATES = {'login': {'ip': '100/m', 'username': '2/5m'}}
+    url = reverse('login')
+    for n in range(2):
+        response = client.post(
+            url, {'username': 'TestUser1', 'password': 'wrong'}, REMOTE_ADDR=f'10.0.0.{n}')
+        assert response.status_code == 200
+
+    response = client.post(
+        url, {'username': 'testuser1', 'password': 'P@ssw0rd123'}, REMOTE_ADDR='10.0.1.1')
+    assert response.status_code == 429
+    assert client.post(
+        url, {'username': 'other', 'password': 'wrong'}, REMOTE_ADDR='10.0.1.1').status_code == 200
+
+##Test for the shared counter store
+def test_redis_counts_every_limit_in_one_round_trip(monkeypatch, rf, settings):
+    """
+    This is test function with pytest for one pipelined round-trip per request
+    """
+    settings.THROTTLE_RATES = {'inquiry': {'ip': '2/m', 'item': '20/h'}}
+    cache = RedisCache('redis://localhost:6379/0', {})
+    server = FakeRedis()
+    cache.__dict__['_cache'] = server
+    monkeypatch.setattr(throttling, '_cache', lambda: cache)
+
+    request = rf.post('/items/1/inquire/')
+    results = [throttling.check('inquiry', request, {'item_id': 1}, now=30.0) for _ in range(3)]
+    assert results[:2] == [None, None]
+    assert results[2] == 30 + 20  #rest of the window, then 3 * (1 - e/60) <= 2
+    assert server.round_trips == 3
+
+##Test for the generic counter store
+@pytest.mark.django_db
+def test_generic_cache_counts_in_two_round_trips(monkeypatch, rf, settings):
+    """
+    This is test function with pytest for one get_many and one set_many per request
+    """
+    settings.THROTTLE_RATES = {'inquiry': {'ip': '2/m', 'item': '20/h'}}
+    cache = throttling._cache()  #pylint: disable=protected-access
+    calls = []
+
+    def counted(method):
+        original = getattr(cache, method)
+        def wrapper(*args, **kwargs):
+            calls.append(method)
+            return original(*args, **kwargs)
+        return wrapper
+    for method in ('get_many', 'set_many'):
+        monkeypatch.setattr(cache, method, counted(method))
+
+    request = rf.post('/items/1/inquire/')
+    results = [throttling.check('inquiry', request, {'item_id': 1}, now=30.0) for _ in range(3)]
+    assert results[:2] == [None, None]
+    assert results[2] == 30 + 20
+    assert calls == ['get_many', 'set_many'] * 3
+
+##Test for failing closed without a shared cache
+def test_per_process_cache_refuses_throttled_requests(rf, settings, caplog):
+    """
+    This is test function with pytest for throttling on a LocMem cache
+    """
+    settings.THROTTLE_CACHE_ALIAS = 'default'
+    settings.THROTTLE_RATES = {'login': {'ip': '30/5m'}}
+    assert throttling.check('login', rf.post('/login/'), {}) == 300
+    assert 'not shared by the workers' in caplog.text
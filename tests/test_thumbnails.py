@@ -0,0 +1,54 @@
+"""
+This is test functions with pytest for the item thumbnail pipeline
+"""
+from io import BytesIO
+import pytest
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.urls import reverse
+from ecogiveapp.models import Item
+from ecogiveapp.thumbnails import thumbnail_name
+
+def _photo(name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (1200, 900), 'green').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+##Test for thumbnails generated after add_item
+@pytest.mark.django_db
+def test_add_item_generates_thumbnails(client, settings, django_capture_on_commit_callbacks):
+    """
+    This is test function with pytest for thumbnail generation on upload
+    """
+    settings.THUMBNAIL_ASYNC = False
+    User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    client.login(username='testuser1', password='P@ssw0rd123')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(reverse('add_item'), {
+            'title': 'Green chair', 'description': 'Comfy', 'quantity': 1, 'image': _photo()})
+    assert response.status_code == 302
+
+    item = Item.objects.get(title='Green chair')
+    assert item.thumbnails_ready
+    for fmt in ('webp', 'jpeg'):
+        with default_storage.open(thumbnail_name(item.image.name, 'card', fmt)) as thumb:
+            assert Image.open(thumb).size == (400, 300)
+
+##Test for the template tag fallback
+@pytest.mark.django_db
+def test_thumbnail_url_falls_back_to_original():
+    """
+    This is test function with pytest for the thumbnail_url template tag
+    """
+    user = User.objects.create_user(username='testuser1', password='P@ssw0rd123')
+    item = Item.objects.create(title='Lamp', description='Bright', owner=user, image=_photo())
+    template = Template("{% load item_images %}{% thumbnail_url item 'card' 'webp' %}")
+
+    assert template.render(Context({'item': item})) == item.image.url
+
+    item.thumbnails_ready = True
+    assert template.render(Context({'item': item})).endswith('.card.webp')
@@ -0,0 +1,112 @@
+"""
+This is test functions with pytest for the import_items and export_items commands
+"""
+import json
+from io import StringIO
+import pytest
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from ecogiveapp.models import Item
+
+@pytest.fixture(name='owner')
+def fixture_owner():
+    """
+    Owner of the imported items
+    """
+    return User.objects.create_user(username='charity', password='P@ssw0rd123')
+
+##Test for CSV import with images and invalid rows
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_import_csv_uploads_images_and_skips_bad_rows(tmp_path):
+    """
+    This is test function with pytest for the CSV import
+    """
+    photos = tmp_path / 'photos'
+    photos.mkdir()
+    Image.new('RGB', (40, 30), 'green').save(photos / 'chair.jpg')
+    source = tmp_path / 'items.csv'
+    source.write_text(
+        'owner,title,description,quantity,image,posted_at\n'
+        'charity,Chair,Wooden,2,chair.jpg,2024-01-02T03:04:05+00:00\n'
+        'nobody,Lamp,Desk lamp,1,,\n'
+        'charity,Table,,1,missing.jpg,\n'
+        'charity,Books,Novels,3,,\n', encoding='utf-8')
+    errors = StringIO()
+
+    call_command('import_items', str(source), '--image-root', str(photos),
+                 '--batch-size', '2', stdout=StringIO(), stderr=errors)
+
+    assert sorted(Item.objects.values_list('title', flat=True)) == ['Books', 'Chair']
+    chair = Item.objects.get(title='Chair')
+    assert default_storage.exists(chair.image.name)
+    assert chair.posted_at.year == 2024
+    assert 'Row 2: unknown owner' in errors.getvalue()
+    assert 'Row 3: image' in errors.getvalue()
+
+##Test for JSON Lines rows that cannot be parsed
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_import_jsonl_reports_bad_lines_and_dates(tmp_path):
+    """
+    This is test function with pytest for malformed lines and impossible dates
+    """
+    source = tmp_path / 'items.jsonl'
+    source.write_text('\n'.join([
+        json.dumps({'owner': 'charity', 'title': 'Chair', 'posted_at': '2024-01-02T03:04:05'}),
+        '{"owner": "charity", "title": ',
+        json.dumps({'owner': 'charity', 'title': 'Lamp', 'posted_at': '2024-13-45T00:00'}),
+        json.dumps({'owner': 'charity', 'title': 'Desk', 'posted_at': 'yesterday'}),
+        json.dumps(['charity', 'Sofa']),
+        json.dumps({'owner': 'charity', 'title': 'Books'}),
+    ]) + '\n', encoding='utf-8')
+    errors = StringIO()
+
+    call_command('import_items', str(source), '--batch-size', '2',
+                 stdout=StringIO(), stderr=errors)
+
+    assert sorted(Item.objects.values_list('title', flat=True)) == ['Books', 'Chair']
+    assert 'Row 2: invalid JSON' in errors.getvalue()
+    assert "Row 3: invalid posted_at '2024-13-45T00:00'" in errors.getvalue()
+    assert "Row 4: invalid posted_at 'yesterday'" in errors.getvalue()
+    assert 'Row 5: not a JSON object' in errors.getvalue()
+
+##Test for resuming an import from its checkpoint
+@pytest.mark.django_db
+@pytest.mark.usefixtures('owner')
+def test_import_resumes_from_checkpoint(tmp_path):
+    """
+    This is test function with pytest for checkpoint resume
+    """
+    source = tmp_path / 'items.jsonl'
+    source.write_text(''.join(
+        json.dumps({'owner': 'charity', 'title': f'Item {n}', 'quantity': 1}) + '\n'
+        for n in range(5)), encoding='utf-8')
+    checkpoint = tmp_path / 'import.checkpoint'
+    checkpoint.write_text(json.dumps({'rows': 3}), encoding='utf-8')
+
+    call_command('import_items', str(source), '--checkpoint', str(checkpoint), stdout=StringIO())
+
+    assert sorted(Item.objects.values_list('title', flat=True)) == ['Item 3', 'Item 4']
+    assert json.loads(checkpoint.read_text(encoding='utf-8')) == {'rows': 5}
+
+##Test for an export and re-import round trip
+@pytest.mark.django_db
+def test_export_round_trips_through_import(owner, tmp_path):
+    """
+    This is test function with pytest for export_items
+    """
+    Item.objects.create(owner=owner, title='Sofa', description='Green, "comfy"', quantity=1)
+    exported = tmp_path / 'items.jsonl'
+    call_command('export_items', '--output', str(exported), stdout=StringIO())
+    Item.objects.all().delete()
+
+    call_command('import_items', str(exported), stdout=StringIO())
+    sofa = Item.objects.get()
+    assert (sofa.title, sofa.description, sofa.owner) == ('Sofa', 'Green, "comfy"', owner)
+
+    out = StringIO()
+    call_command('export_items', stdout=out)
+    assert out.getvalue().splitlines()[0] == 'owner,title,description,quantity,image,posted_at'
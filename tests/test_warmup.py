@@ -0,0 +1,67 @@
+"""
+This is test functions with pytest for the worker warm-up
+"""
+import importlib.util
+import pytest
+from django.contrib.auth import password_validation
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.db import connections
+from django.template import engines
+from EcoGive import settings as project_settings
+from ecogiveapp import warmup
+
+##Test for the warm-up steps
+@pytest.mark.django_db
+def test_warm_up_runs_every_step(caplog, monkeypatch):
+    """
+    This is test function with pytest for templates, validators and connections warmed up
+    """
+    get_default_password_validators.cache_clear()
+    loader = engines.all()[0].engine.template_loaders[0]
+    loader.reset()
+
+    timings = warmup.warm_up(keep_connections=True)
+    assert list(timings) == ['imports', 'urls', 'templates', 'password validators',
+                             'storage client', 'databases']
+    assert not [record for record in caplog.records if record.levelname == 'WARNING']
+    assert 'item_card.html' in warmup.template_names()
+    assert len(loader.get_template_cache) >= len(warmup.template_names())
+    #Cached by warm-up, building the validators again would fail
+    monkeypatch.setattr(password_validation, 'get_password_validators', None)
+    assert get_default_password_validators()
+    assert connections['default'].connection is not None
+
+##Test for the startup hook
+def test_startup_hook_follows_the_setting(settings, monkeypatch):
+    """
+    This is test function with pytest for WARMUP_ON_STARTUP and a failing step
+    """
+    settings.WARMUP_ON_STARTUP = False
+    assert warmup.warm_up_on_startup() is None
+
+    def broken():
+        raise RuntimeError('no bucket')
+    monkeypatch.setattr(warmup, '_create_storage_client', broken)
+    monkeypatch.setattr(warmup, '_open_databases', lambda keep_open: None)
+    settings.WARMUP_ON_STARTUP = True
+    settings.WARMUP_GC_FREEZE = False
+    timings = warmup.warm_up_on_startup()
+    assert set(timings) == {'imports', 'urls', 'templates', 'password validators',
+                            'storage client', 'databases'}
+
+##Test for warm-up being off by default
+def test_warm_up_is_off_unless_enabled(monkeypatch):
+    """
+    This is test function with pytest for the DJANGO_WARMUP default
+    """
+    def load_settings():
+        #A fresh copy, the configured settings module is left alone
+        spec = importlib.util.spec_from_file_location('settings_probe', project_settings.__file__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    monkeypatch.delenv('DJANGO_WARMUP', raising=False)
+    assert load_settings().WARMUP_ON_STARTUP is False
+    monkeypatch.setenv('DJANGO_WARMUP', 'true')
+    assert load_settings().WARMUP_ON_STARTUP is True